@@ -0,0 +1,49 @@
+"""Top-k latency of the typeahead trie.
+
+    python benchmarks/autocomplete.py
+
+Builds a SuggestionTrie from the shipped vocabulary plus synthetic titles
+and times prefix lookups of every length. Fails if the p99 lookup exceeds
+``LOOKUP_TARGET_MS``.
+"""
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from components.autocomplete import Suggestion, SuggestionTrie, load_suggestions  # noqa: E402
+
+LOOKUP_TARGET_MS = 5.0
+
+
+def main() -> int:
+    rng = random.Random(7)
+    seed = load_suggestions()
+    words = sorted({w for s in seed for w in s.text.split()})
+    synthetic = [
+        Suggestion(" ".join(rng.sample(words, 3)), "title", rng.paretovariate(1.2))
+        for _ in range(100_000)
+    ]
+
+    start = time.perf_counter()
+    trie = SuggestionTrie(seed + synthetic)
+    print(f"built trie over {trie.size} terms in {time.perf_counter() - start:.1f} s")
+
+    prefixes = [s.text[:rng.randint(1, 12)] for s in rng.sample(synthetic, 20_000)]
+    timings = []
+    for prefix in prefixes:
+        start = time.perf_counter()
+        trie.search(prefix)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    p99 = statistics.quantiles(timings, n=100)[98]
+    print(f"lookup: median {statistics.median(timings) * 1000:.1f} us, "
+          f"p99 {p99 * 1000:.1f} us (target {LOOKUP_TARGET_MS:.0f} ms)")
+    return 0 if p99 <= LOOKUP_TARGET_MS else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
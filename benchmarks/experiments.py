@@ -0,0 +1,49 @@
+"""Per-render cost of experiment assignment and exposure tracking.
+
+    python benchmarks/experiments.py
+
+Each render of the home page and the plan cards assigns a variant and
+records an exposure. Also reports the split of 200k random ids across the
+plan badge variants. Fails if the p99 of assign + expose is slower than
+``RENDER_TARGET_US``.
+"""
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from components.experiments import ExperimentTracker, get_experiment  # noqa: E402
+
+RENDER_TARGET_US = 50.0
+
+
+def main() -> int:
+    experiment = get_experiment("plan_badges")
+    units = [uuid.uuid4().hex for _ in range(200_000)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tracker = ExperimentTracker(Path(tmp) / "counters.jsonl")
+        timings = []
+        for unit_id in units:
+            start = time.perf_counter()
+            experiment.variant(unit_id)
+            tracker.expose("plan_badges", unit_id)
+            timings.append((time.perf_counter() - start) * 1e6)
+        tracker.flush()
+
+    split = Counter(experiment.variant(unit_id).name for unit_id in units)
+    median_us = statistics.median(timings)
+    p99_us = statistics.quantiles(timings, n=100)[98]
+    print("split: " + ", ".join(f"{name} {count / len(units):.2%}" for name, count in sorted(split.items())))
+    print(f"assign + expose: median {median_us:.1f} us, p99 {p99_us:.1f} us "
+          f"(target {RENDER_TARGET_US:.0f} us, includes batched flushes)")
+    return 0 if p99_us <= RENDER_TARGET_US else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
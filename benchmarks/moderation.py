@@ -0,0 +1,62 @@
+"""Throughput of ingest-time moderation on a bulk import of postings.
+
+    python benchmarks/moderation.py
+
+Builds 20k postings of ~500 characters by joining seed examples of the
+same label, trains the model on the seed set and moderates them in
+batches of 500 without the review queue. Fails if fewer than
+``TARGET_PER_SECOND`` postings are scored per second on one core.
+"""
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from components.moderation import (  # noqa: E402
+    HashedLinearModel,
+    JobPosting,
+    Moderator,
+    TermMatcher,
+    load_seed_examples,
+)
+
+TARGET_PER_SECOND = 2_000.0
+POSTINGS = 20_000
+BATCH = 500
+
+
+def main() -> int:
+    seed = load_seed_examples()
+    moderator = Moderator(TermMatcher.from_csv(), HashedLinearModel())
+    moderator.model = moderator.train(seed)
+
+    rng = random.Random(0)
+    by_label = {
+        label: [posting.description for posting, is_spam in seed if is_spam == label]
+        for label in (0, 1)
+    }
+    postings = []
+    for i in range(POSTINGS):
+        base, label = rng.choice(seed)
+        body = " ".join([base.description] + rng.sample(by_label[label], 3))
+        postings.append(JobPosting(f"bench-{i}", base.title, body))
+
+    decisions: Counter = Counter()
+    start = time.perf_counter()
+    for i in range(0, len(postings), BATCH):
+        decisions.update(result.decision for result in moderator.moderate_many(postings[i:i + BATCH]))
+    elapsed = time.perf_counter() - start
+
+    rate = len(postings) / elapsed
+    chars = sum(len(posting.text) for posting in postings) / len(postings)
+    print("decisions: " + ", ".join(f"{name} {count}" for name, count in sorted(decisions.items())))
+    print(f"{rate:,.0f} postings/s ({elapsed * 1e6 / len(postings):.0f} us each, "
+          f"avg {chars:.0f} chars; target {TARGET_PER_SECOND:,.0f}/s)")
+    return 0 if rate >= TARGET_PER_SECOND else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+"""Hit latency and hit rate of SearchResultCache under a skewed query mix.
+
+    python benchmarks/search_cache.py
+
+Queries follow a Zipf-like distribution over a synthetic vocabulary, which
+is roughly what the home page search bar sees. Fails if the median cache
+hit is slower than ``HIT_TARGET_US``.
+"""
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from components.search_cache import SearchResultCache  # noqa: E402
+
+HIT_TARGET_US = 1000.0
+
+
+def main() -> int:
+    rng = random.Random(7)
+    queries = [f"Query {i}  Engineer" for i in range(50_000)]
+    weights = [1 / (rank + 1) for rank in range(len(queries))]
+    stream = rng.choices(queries, weights=weights, k=200_000)
+
+    cache = SearchResultCache(capacity=2_000)
+    hit_times = []
+    for query in stream:
+        start = time.perf_counter()
+        hit, _ = cache.get(query, {"location": "Remote"})
+        elapsed = time.perf_counter() - start
+        if hit:
+            hit_times.append(elapsed * 1e6)
+        else:
+            cache.put(query, [query.lower()], {"location": "Remote"})
+
+    stats = cache.stats()
+    median_us = statistics.median(hit_times)
+    p99_us = statistics.quantiles(hit_times, n=100)[98]
+    print(f"hit rate {stats['hit_rate']:.1%} over {len(stream)} searches "
+          f"(capacity {cache.capacity})")
+    print(f"hit latency: median {median_us:.1f} us, p99 {p99_us:.1f} us "
+          f"(target {HIT_TARGET_US:.0f} us)")
+    return 0 if median_us <= HIT_TARGET_US else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
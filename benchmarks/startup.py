@@ -0,0 +1,104 @@
+"""Cold-start profile for the JobGenie pages.
+
+Runs each measurement in a fresh interpreter so module caches from one run
+never leak into the next:
+
+    python benchmarks/startup.py            # import profile + first render
+    python benchmarks/startup.py --top 25   # show more import entries
+
+The import profile is the ``-X importtime`` report for ``home`` sorted by
+cumulative time. Time-to-first-render drives ``home.py`` once through
+Streamlit's ``AppTest`` harness and fails if it exceeds
+``FIRST_RENDER_TARGET_MS``.
+"""
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Budget for a cold process to import and render home.py once.
+FIRST_RENDER_TARGET_MS = 1500.0
+
+# Modules that must not be imported just by importing home.py.
+DEFERRED_MODULES = ("stripe", "PIL")
+
+# Modules that must not be imported even after home.py has rendered. PIL is
+# allowed here because it is needed when no prebuilt icon has been built.
+RENDER_EXCLUDED_MODULES = ("stripe",)
+
+_FIRST_RENDER_SNIPPET = """
+import sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("home.py", default_timeout=30)
+at.run()
+elapsed = (time.perf_counter() - start) * 1000
+if at.exception:
+    raise SystemExit(f"home.py raised: {at.exception}")
+print(f"{elapsed:.1f}")
+print(",".join(sorted(m for m in {excluded!r} if m in sys.modules)))
+"""
+
+
+def profile_imports(module: str = "home") -> List[Tuple[int, int, str]]:
+    """Return (self_us, cumulative_us, name) for every import of ``module``"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((int(self_us), int(cumulative_us), name.rstrip()))
+    return rows
+
+
+def measure_first_render() -> Tuple[float, List[str]]:
+    """Return (milliseconds, excluded modules that were imported anyway)"""
+    snippet = _FIRST_RENDER_SNIPPET.format(excluded=RENDER_EXCLUDED_MODULES)
+    result = subprocess.run(
+        [sys.executable, "-c", snippet], cwd=ROOT, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or result.stdout.strip())
+    lines = result.stdout.splitlines()
+    elapsed, leaked = lines[-2], lines[-1]
+    return float(elapsed), [m for m in leaked.split(",") if m]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--top", type=int, default=15, help="import entries to show")
+    args = parser.parse_args()
+
+    rows = profile_imports()
+    total_us = max((cumulative for _, cumulative, _ in rows), default=0)
+    print(f"Import profile for home ({total_us / 1000:.1f} ms total)")
+    print(f"{'self ms':>9} {'cum ms':>9}  module")
+    for self_us, cumulative_us, name in sorted(rows, key=lambda r: -r[1])[:args.top]:
+        print(f"{self_us / 1000:>9.1f} {cumulative_us / 1000:>9.1f}  {name}")
+
+    eager = sorted({name.strip() for _, _, name in rows} & set(DEFERRED_MODULES))
+    if eager:
+        print(f"\nEagerly imported heavy modules: {', '.join(eager)}")
+
+    elapsed_ms, leaked = measure_first_render()
+    status = "OK" if elapsed_ms <= FIRST_RENDER_TARGET_MS else "OVER TARGET"
+    print(f"\nTime to first render of home.py: {elapsed_ms:.1f} ms "
+          f"(target {FIRST_RENDER_TARGET_MS:.0f} ms) {status}")
+    if leaked:
+        print(f"Excluded modules imported during render: {', '.join(leaked)}")
+
+    return 0 if status == "OK" and not eager and not leaked else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+import fcntl
+import json
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterator, Optional
+
+from components.application_log import DATA_DIR
+
+ACTIVATIONS_PATH = DATA_DIR / "payments" / "activations.jsonl"
+
+
+@dataclass
+class PlanActivation:
+    """What we granted locally after a checkout, to be matched against Stripe"""
+    reference: str
+    plan_id: str
+    amount: int  # major units, as shown on the plan card
+    currency: str
+    activated_at: float
+    user_id: Optional[str] = None
+    checkout_session_id: Optional[str] = None
+
+
+def new_reference() -> str:
+    """Reference shared by the checkout session, its payment and the activation"""
+    return uuid.uuid4().hex
+
+
+def record_activation(activation: PlanActivation, path: Path = ACTIVATIONS_PATH):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    line = json.dumps(asdict(activation), separators=(",", ":")) + "\n"
+    with open(path, "a", encoding="utf-8") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        f.write(line)
+
+
+def iter_activations(path: Path = ACTIVATIONS_PATH) -> Iterator[PlanActivation]:
+    if not path.exists():
+        return
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield PlanActivation(**json.loads(line))
+
+
+def activate_plan(reference: str, plan_id: str, amount: int, currency: str = "inr",
+                  user_id: Optional[str] = None, checkout_session_id: Optional[str] = None) -> PlanActivation:
+    activation = PlanActivation(reference, plan_id, amount, currency, time.time(),
+                                user_id, checkout_session_id)
+    record_activation(activation)
+    return activation
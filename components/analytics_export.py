@@ -0,0 +1,368 @@
+import json
+import os
+import shutil
+import sqlite3
+import uuid
+from datetime import date, datetime, timezone
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from components.activations import ACTIVATIONS_PATH
+from components.application_log import DATA_DIR, Position, get_application_log
+
+# pyarrow is an optional dependency, imported on first use so the pages
+# never pay for it.
+
+EXPORT_DIR = Path(os.getenv("JOBGENIE_ANALYTICS_DIR", DATA_DIR / "analytics"))
+
+
+def _schemas() -> Dict:
+    import pyarrow as pa
+
+    return {
+        "applications": pa.schema([
+            ("user_id", pa.string()),
+            ("application_id", pa.string()),
+            ("status", pa.string()),
+            ("timestamp", pa.timestamp("ms", tz="UTC")),
+            ("date", pa.string()),
+        ]),
+        "jobs": pa.schema([
+            ("job_id", pa.string()),
+            ("title", pa.string()),
+            ("company", pa.string()),
+            ("location", pa.string()),
+            ("premium", pa.bool_()),
+            ("views", pa.int64()),
+            ("timestamp", pa.timestamp("ms", tz="UTC")),
+            ("date", pa.string()),
+        ]),
+        "payments": pa.schema([
+            ("payment_id", pa.string()),
+            ("user_id", pa.string()),
+            ("plan_id", pa.string()),
+            ("amount", pa.int64()),
+            ("currency", pa.string()),
+            ("status", pa.string()),
+            ("timestamp", pa.timestamp("ms", tz="UTC")),
+            ("date", pa.string()),
+        ]),
+    }
+
+
+def _batches(schema, rows: Iterable[Dict], chunk_rows: int) -> Iterator:
+    import pyarrow as pa
+
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, chunk_rows))
+        if not chunk:
+            return
+        for row in chunk:
+            if "date" not in row or row["date"] is None:
+                row["date"] = row["timestamp"].date().isoformat()
+        yield pa.RecordBatch.from_pylist(chunk, schema=schema)
+
+
+def export_rows(table: str, rows: Iterable[Dict], chunk_rows: int = 50_000,
+                export_dir: Path = EXPORT_DIR) -> Path:
+    """Append rows to ``<export_dir>/<table>/date=YYYY-MM-DD/*.parquet``.
+
+    Rows are converted in ``chunk_rows`` record batches and streamed to
+    the writer, so memory stays bounded whatever the export size. Every
+    run writes new files, which makes incremental exports append-only.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    schema = _schemas()[table]
+    target = Path(export_dir) / table
+    reader = pa.RecordBatchReader.from_batches(schema, _batches(schema, rows, chunk_rows))
+    ds.write_dataset(
+        reader, target, format="parquet",
+        partitioning=_date_partitioning(),
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+        max_rows_per_group=chunk_rows,
+    )
+    return target
+
+
+def _read_state(export_dir: Path, table: str) -> Dict:
+    try:
+        return json.loads((Path(export_dir) / f"{table}.position.json").read_text())
+    except FileNotFoundError:
+        return {}
+
+
+def _write_state(export_dir: Path, table: str, state: Dict):
+    path = Path(export_dir) / f"{table}.position.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state))
+    os.replace(tmp, path)
+
+
+def export_position(export_dir: Path = EXPORT_DIR) -> Position:
+    """How far into the application log the exports have read; (0, 0) before the first"""
+    return tuple(_read_state(export_dir, "applications").get("position", (0, 0)))
+
+
+def export_applications(export_dir: Path = EXPORT_DIR) -> int:
+    """Export application events appended since the previous export"""
+    start = export_position(export_dir)
+    exported = 0
+    last = start
+
+    def rows():
+        nonlocal exported, last
+        for position, event in get_application_log().replay(start):
+            exported += 1
+            last = position
+            yield {
+                "user_id": event.user_id,
+                "application_id": event.application_id,
+                "status": event.status,
+                "timestamp": datetime.fromtimestamp(event.timestamp, tz=timezone.utc),
+                "date": None,
+            }
+
+    export_rows("applications", rows(), export_dir=export_dir)
+    if exported:
+        _write_state(export_dir, "applications", {"position": list(last)})
+    return exported
+
+
+def export_payments(export_dir: Path = EXPORT_DIR, activations_path: Path = ACTIVATIONS_PATH,
+                    billing_path: Optional[Path] = None) -> int:
+    """Export payments recorded since the previous export.
+
+    Paid rows come from the activations file, which has every granted
+    checkout and every successful renewal or upgrade charge, read on from
+    the byte offset of the last export. Failed billing attempts come from
+    the invoices still open in the billing database: each new attempt on
+    one is exported once, as ``<invoice>:<attempt>``.
+    """
+    if billing_path is None:
+        from components.billing import BILLING_DB_PATH as billing_path
+
+    state = _read_state(export_dir, "payments")
+    offset = state.get("activations_offset", 0)
+    exported_attempts: Dict[str, int] = state.get("failed_attempts", {})
+    rows: List[Dict] = []
+    if Path(activations_path).exists():
+        with open(activations_path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # a writer is mid-append; pick it up next time
+                offset += len(line)
+                if not line.strip():
+                    continue
+                activation = json.loads(line)
+                rows.append({
+                    "payment_id": activation["reference"],
+                    "user_id": activation.get("user_id"),
+                    "plan_id": activation["plan_id"],
+                    "amount": activation["amount"],
+                    "currency": activation["currency"],
+                    "status": "paid",
+                    "timestamp": datetime.fromtimestamp(activation["activated_at"], tz=timezone.utc),
+                    "date": None,
+                })
+
+    open_attempts: Dict[str, int] = {}
+    if Path(billing_path).exists():
+        db = sqlite3.connect(f"file:{billing_path}?mode=ro", uri=True, timeout=30)
+        try:
+            invoices = db.execute(
+                "SELECT invoices.id, subscriptions.user_id, invoices.plan_id, invoices.amount_minor, "
+                "invoices.currency, invoices.attempts, invoices.created_at FROM invoices "
+                "JOIN subscriptions ON subscriptions.id = invoices.subscription_id "
+                "WHERE invoices.status = 'open'"
+            ).fetchall()
+        finally:
+            db.close()
+        for invoice_id, user_id, plan_id, amount_minor, currency, attempts, created_at in invoices:
+            open_attempts[invoice_id] = attempts
+            for attempt in range(exported_attempts.get(invoice_id, 0) + 1, attempts + 1):
+                rows.append({
+                    "payment_id": f"{invoice_id}:{attempt}",
+                    "user_id": user_id,
+                    "plan_id": plan_id,
+                    "amount": amount_minor // 100,
+                    "currency": currency,
+                    "status": "failed",
+                    "timestamp": datetime.fromtimestamp(created_at, tz=timezone.utc),
+                    "date": None,
+                })
+
+    if rows:
+        export_rows("payments", rows, export_dir=export_dir)
+    # Invoices that are no longer open were paid (an activation row) or lapsed.
+    _write_state(export_dir, "payments", {"activations_offset": offset, "failed_attempts": open_attempts})
+    return len(rows)
+
+
+def _read_snapshot_manifest(snapshot: Path) -> Dict:
+    try:
+        return json.loads((snapshot / "manifest.json").read_text())
+    except (FileNotFoundError, NotADirectoryError):
+        return {"files": [], "parts": [], "next_part": 0}
+
+
+def _write_arrow_part(path: Path, schema, batches: Iterable):
+    import pyarrow as pa
+
+    tmp = path.with_name(f".{path.name}.tmp")
+    try:
+        with pa.OSFile(str(tmp), "wb") as sink:
+            with pa.ipc.new_file(sink, schema) as writer:
+                for batch in batches:
+                    writer.write_batch(batch)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def write_arrow_snapshot(table: str, export_dir: Path = EXPORT_DIR, max_parts: int = 48) -> Path:
+    """Bring a table's Arrow IPC snapshot up to date for mmap reads.
+
+    The snapshot is a directory of Arrow part files and a manifest of the
+    Parquet files already in them. Exports only ever add Parquet files,
+    so each run converts just the new ones into one more part, and its
+    I/O follows what was exported since the last run rather than the
+    table size. Past ``max_parts`` parts they are merged into one, which
+    costs a full copy only once every ``max_parts`` runs.
+    """
+    import pyarrow.dataset as ds
+
+    base = Path(export_dir) / table
+    snapshot = Path(export_dir) / f"{table}.arrow"
+    if snapshot.is_file():
+        snapshot.unlink()  # a single-file snapshot from before parts
+    dataset = open_dataset(table, export_dir)
+    files = sorted(os.path.relpath(path, base) for path in dataset.files)
+
+    manifest = _read_snapshot_manifest(snapshot)
+    if not set(manifest["files"]) <= set(files):
+        # Parquet files were removed or replaced; start over.
+        shutil.rmtree(snapshot, ignore_errors=True)
+        manifest = _read_snapshot_manifest(snapshot)
+    snapshot.mkdir(parents=True, exist_ok=True)
+    seen = set(manifest["files"])
+    new_files = [name for name in files if name not in seen]
+    if not new_files and manifest["parts"]:
+        return snapshot
+
+    parts = list(manifest["parts"])
+    added = ds.dataset([str(base / name) for name in new_files], schema=dataset.schema, format="parquet",
+                       partitioning=_date_partitioning(), partition_base_dir=str(base))
+    part = f"part-{manifest['next_part']:06d}.arrow"
+    _write_arrow_part(snapshot / part, dataset.schema, added.to_batches())
+    parts.append(part)
+    next_part = manifest["next_part"] + 1
+
+    merged = []
+    if len(parts) > max_parts:
+        merged, part = parts, f"part-{next_part:06d}.arrow"
+        next_part += 1
+        _write_arrow_part(snapshot / part, dataset.schema,
+                          (batch for old in merged for batch in _open_arrow_part(snapshot / old).to_batches()))
+        parts = [part]
+
+    tmp = snapshot / "manifest.tmp"
+    tmp.write_text(json.dumps({"files": manifest["files"] + new_files, "parts": parts, "next_part": next_part}))
+    os.replace(tmp, snapshot / "manifest.json")
+    # Readers already holding a merged part keep their mapping after the unlink.
+    for old in merged:
+        (snapshot / old).unlink(missing_ok=True)
+    return snapshot
+
+
+def _open_arrow_part(path: Path):
+    import pyarrow as pa
+
+    return pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+
+
+def _date_partitioning():
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    return ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive")
+
+
+def open_dataset(table: str, export_dir: Path = EXPORT_DIR):
+    import pyarrow.dataset as ds
+
+    return ds.dataset(Path(export_dir) / table, format="parquet", partitioning=_date_partitioning())
+
+
+def scan(table: str, columns: Optional[Sequence[str]] = None,
+         start: Optional[date] = None, end: Optional[date] = None,
+         where=None, export_dir: Path = EXPORT_DIR):
+    """Read a table with partition pruning and Parquet predicate pushdown.
+
+    ``start``/``end`` prune whole ``date=`` directories; ``where`` is an
+    extra ``pyarrow.dataset`` expression pushed down to row-group
+    statistics, e.g. ``ds.field("status") == "offer"``.
+    """
+    import pyarrow.dataset as ds
+
+    predicate = None
+    if start is not None:
+        predicate = ds.field("date") >= start.isoformat()
+    if end is not None:
+        clause = ds.field("date") <= end.isoformat()
+        predicate = clause if predicate is None else predicate & clause
+    if where is not None:
+        predicate = where if predicate is None else predicate & where
+    return open_dataset(table, export_dir).to_table(columns=columns, filter=predicate)
+
+
+def load_arrow_snapshot(table: str, export_dir: Path = EXPORT_DIR):
+    """Memory-map the Arrow snapshot: pages are read lazily and shared between processes"""
+    import pyarrow as pa
+
+    snapshot = Path(export_dir) / f"{table}.arrow"
+    for attempt in range(2):
+        manifest = _read_snapshot_manifest(snapshot)
+        try:
+            parts = [_open_arrow_part(snapshot / part) for part in manifest["parts"]]
+        except FileNotFoundError:
+            if attempt:
+                raise
+            continue  # merged away between reading the manifest and the parts
+        if not parts:
+            raise FileNotFoundError(f"No Arrow snapshot of {table} in {export_dir}")
+        return pa.concat_tables(parts)
+
+
+def application_funnel(start: Optional[date] = None, end: Optional[date] = None,
+                       export_dir: Path = EXPORT_DIR) -> Dict[str, int]:
+    """Distinct applications that reached each status in the date range"""
+    table = scan("applications", ["application_id", "user_id", "status"], start, end,
+                 export_dir=export_dir)
+    if table.num_rows == 0:
+        return {}
+    grouped = table.group_by(["status", "user_id", "application_id"]).aggregate([])
+    counts = grouped.group_by("status").aggregate([("application_id", "count")])
+    return dict(zip(counts["status"].to_pylist(), counts["application_id_count"].to_pylist()))
+
+
+def daily_counts(table: str, start: Optional[date] = None, end: Optional[date] = None,
+                 export_dir: Path = EXPORT_DIR) -> List[Dict]:
+    """Rows per day, read from the partition column alone"""
+    data = scan(table, ["date"], start, end, export_dir=export_dir)
+    counts = data.group_by("date").aggregate([("date", "count")]).sort_by("date")
+    return counts.to_pylist()
+
+
+if __name__ == "__main__":
+    print(f"Exported {export_applications()} application events")
+    print(f"Exported {export_payments()} payments")
+    for table in ("applications", "payments"):
+        if (EXPORT_DIR / table).exists():
+            print(f"Wrote {write_arrow_snapshot(table)}")
@@ -0,0 +1,64 @@
+from datetime import datetime
+from html import escape
+from typing import Dict, Tuple
+
+import streamlit as st
+
+from components.application_log import get_snapshot_store
+from components.notifier import get_notifier
+
+STATUS_COLORS = {
+    "applied": "#6B7280",
+    "viewed": "#2563EB",
+    "interview": "#7C3AED",
+    "offer": "#059669",
+    "rejected": "#DC2626",
+}
+
+
+def _render_row(application_id: str, status: str, timestamp: float) -> str:
+    when = datetime.fromtimestamp(timestamp).strftime("%d %b %Y, %H:%M")
+    color = STATUS_COLORS.get(status, "#374151")
+    return f"""
+    <div class="feature-card" style="display: flex; justify-content: space-between; margin-bottom: 0.5rem;">
+        <div style="font-weight: 600;">{escape(application_id)}</div>
+        <div><span style="color: {color}; font-weight: 600;">{escape(status.title())}</span>
+        <span style="color: #9CA3AF; font-size: 0.8rem; margin-left: 0.5rem;">{when}</span></div>
+    </div>
+    """
+
+
+def render_application_statuses(user_id: str, check_every: float = 2.0):
+    """Live list of a user's applications for /dashboard.
+
+    The subscription goes live first, then the rows start from the
+    snapshot plus the log records after it, so a change made between the
+    last refresh and the subscription is not lost until a reload. Pushed
+    changes patch the rows from then on. Only this fragment reruns on the
+    timer and it just drains an in-memory subscription, so neither
+    ``inject_css`` nor ``Navbar.render()`` runs again for a status update.
+    """
+    state_key = f"application_rows_{user_id}"
+    if state_key not in st.session_state:
+        st.session_state[f"{state_key}_subscription"] = get_notifier().subscribe(f"applications:{user_id}")
+        st.session_state[state_key] = get_snapshot_store().latest(user_id)
+
+    @st.fragment(run_every=check_every)
+    def _statuses():
+        rows: Dict[str, Tuple[str, float]] = st.session_state[state_key]
+        subscription = st.session_state[f"{state_key}_subscription"]
+        for change in subscription.drain():
+            # Also replayed from the log, or overtaken by a later change published first.
+            if change["timestamp"] >= rows.get(change["key"], ("", 0.0))[1]:
+                rows[change["key"]] = (change["status"], change["timestamp"])
+
+        if not rows:
+            st.info("You haven't applied to any jobs yet.")
+            return
+        ordered = sorted(rows.items(), key=lambda item: -item[1][1])
+        st.markdown(
+            "\n".join(_render_row(app_id, status, ts) for app_id, (status, ts) in ordered),
+            unsafe_allow_html=True
+        )
+
+    _statuses()
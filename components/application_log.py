@@ -0,0 +1,306 @@
+import fcntl
+import json
+import os
+import shutil
+import struct
+import time
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+DATA_DIR = Path(os.getenv("JOBGENIE_DATA_DIR", Path(__file__).resolve().parent.parent / "var"))
+
+STATUSES = ("applied", "viewed", "interview", "offer", "rejected")
+_STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+# crc32, timestamp, status code, len(user_id), len(application_id)
+_HEADER = struct.Struct("<IdBHH")
+
+# (segment sequence number, byte offset within it)
+Position = Tuple[int, int]
+
+
+@contextmanager
+def _flocked(path: Path):
+    """Exclusive lock on ``path`` across processes (and threads with their own handle)"""
+    with open(path, "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+@dataclass(frozen=True)
+class ApplicationEvent:
+    user_id: str
+    application_id: str
+    status: str
+    timestamp: float
+
+
+def _encode(event: ApplicationEvent) -> bytes:
+    user = event.user_id.encode()
+    application = event.application_id.encode()
+    body = struct.pack("<dBHH", event.timestamp, _STATUS_CODES[event.status],
+                       len(user), len(application)) + user + application
+    return struct.pack("<I", zlib.crc32(body)) + body
+
+
+class ApplicationLog:
+    """Append-only, segmented write-ahead log of application status changes.
+
+    Records are small fixed headers plus the two ids, each guarded by a
+    CRC so a torn write left by a crashed writer is skipped on replay.
+    Appends from several processes are serialised with a lock file.
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = 16 << 20, fsync: bool = False):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self._lock_path = self.directory / ".lock"
+
+    def _locked(self):
+        return _flocked(self._lock_path)
+
+    def segments(self) -> List[int]:
+        return sorted(int(path.stem.split("-")[1]) for path in self.directory.glob("segment-*.log"))
+
+    def _segment_path(self, seq: int) -> Path:
+        return self.directory / f"segment-{seq:08d}.log"
+
+    def append(self, user_id: str, application_id: str, status: str,
+               timestamp: Optional[float] = None) -> ApplicationEvent:
+        if status not in _STATUS_CODES:
+            raise ValueError(f"Unknown application status: {status}")
+        event = ApplicationEvent(user_id, application_id, status, timestamp or time.time())
+        self.append_many([event])
+        return event
+
+    def append_many(self, events: List[ApplicationEvent]):
+        payload = b"".join(_encode(event) for event in events)
+        with self._locked():
+            segments = self.segments()
+            seq = segments[-1] if segments else 0
+            path = self._segment_path(seq)
+            if path.exists() and path.stat().st_size >= self.segment_bytes:
+                seq += 1
+                path = self._segment_path(seq)
+            with open(path, "ab") as f:
+                f.write(payload)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+
+    def end_position(self) -> Position:
+        segments = self.segments()
+        if not segments:
+            return (0, 0)
+        return (segments[-1], self._segment_path(segments[-1]).stat().st_size)
+
+    def replay(self, start: Position = (0, 0)) -> Iterator[Tuple[Position, ApplicationEvent]]:
+        """Yield (position after record, event) for every intact record from ``start``"""
+        for seq in self.segments():
+            if seq < start[0]:
+                continue
+            offset = start[1] if seq == start[0] else 0
+            with open(self._segment_path(seq), "rb") as f:
+                f.seek(offset)
+                data = f.read()
+            view = memoryview(data)
+            pos = 0
+            while pos + _HEADER.size <= len(view):
+                crc, timestamp, code, user_len, app_len = _HEADER.unpack_from(view, pos)
+                end = pos + _HEADER.size + user_len + app_len
+                if end > len(view) or zlib.crc32(view[pos + 4:end]) != crc:
+                    # Torn write from a crashed writer: resync on the next
+                    # byte that starts an intact record.
+                    pos += 1
+                    continue
+                user_start = pos + _HEADER.size
+                user_id = bytes(view[user_start:user_start + user_len]).decode()
+                application_id = bytes(view[user_start + user_len:end]).decode()
+                pos = end
+                yield (seq, offset + pos), ApplicationEvent(
+                    user_id, application_id, STATUSES[code], timestamp
+                )
+
+    def compact(self, upto: Position, retain_segments: int = 2):
+        """Fold old segments down to the latest event per application.
+
+        Only whole segments strictly before ``upto`` (normally the position
+        of the last snapshot) are compacted, and the newest
+        ``retain_segments`` of those keep their full history for analytics
+        replays.
+        """
+        with self._locked():
+            sealed = [seq for seq in self.segments() if seq < upto[0]]
+            victims = sealed[:-retain_segments] if retain_segments else sealed
+            if len(victims) < 2:
+                return
+            latest: Dict[Tuple[str, str], ApplicationEvent] = {}
+            for seq in victims:
+                for _, event in self._replay_segment(seq):
+                    latest[(event.user_id, event.application_id)] = event
+            target = self._segment_path(victims[-1])
+            tmp = target.with_suffix(".compacting")
+            with open(tmp, "wb") as f:
+                for event in sorted(latest.values(), key=lambda e: e.timestamp):
+                    f.write(_encode(event))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, target)
+            for seq in victims[:-1]:
+                self._segment_path(seq).unlink()
+
+    def _replay_segment(self, seq: int):
+        for position, event in self.replay((seq, 0)):
+            if position[0] != seq:
+                return
+            yield position, event
+
+
+class SnapshotStore:
+    """Per-user current application state materialised from the log.
+
+    Users are spread over ``shards`` JSON files, so a dashboard read loads
+    one small shard and never touches the log. ``refresh()`` replays only
+    the records appended since the previous snapshot and publishes the new
+    generation with an atomic rename of the manifest. Refreshes hold a
+    lock file, so two of them never build the same generation at once.
+    """
+
+    def __init__(self, log: ApplicationLog, directory: str, shards: int = 16):
+        self.log = log
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.shards = shards
+        self._manifest_path = self.directory / "manifest.json"
+        self._lock_path = self.directory / ".lock"
+
+    def _shard_of(self, user_id: str) -> int:
+        return zlib.crc32(user_id.encode()) % self.shards
+
+    def manifest(self) -> Dict:
+        try:
+            return json.loads(self._manifest_path.read_text())
+        except FileNotFoundError:
+            return {"generation": 0, "position": [0, 0], "shards": self.shards}
+
+    def _read_shard(self, generation: int, shard: int) -> Dict[str, Dict[str, List]]:
+        if generation == 0:
+            return {}
+        path = self.directory / f"gen-{generation:08d}" / f"shard-{shard:03d}.json"
+        return json.loads(path.read_text())
+
+    def current(self, user_id: str) -> Dict[str, Tuple[str, float]]:
+        """Map of application id to (status, timestamp) for one user, as of the snapshot"""
+        return self._rows(self.manifest(), user_id)
+
+    def latest(self, user_id: str) -> Dict[str, Tuple[str, float]]:
+        """``current`` plus what was logged since the snapshot, up to the end of the log"""
+        manifest = self.manifest()
+        rows = self._rows(manifest, user_id)
+        for _, event in self.log.replay(tuple(manifest["position"])):
+            if event.user_id == user_id:
+                rows[event.application_id] = (event.status, event.timestamp)
+        return rows
+
+    def _rows(self, manifest: Dict, user_id: str) -> Dict[str, Tuple[str, float]]:
+        shard = self._read_shard(manifest["generation"], self._shard_of(user_id))
+        return {app: (status, ts) for app, (status, ts) in shard.get(user_id, {}).items()}
+
+    def refresh(self) -> Position:
+        """Publish a new generation with the records appended since the last one.
+
+        Only shards holding a user with new events are read and rewritten;
+        the rest are hard-linked into the new generation, so a refresh
+        costs I/O in proportion to what changed, not to the user count.
+        """
+        with _flocked(self._lock_path):
+            return self._refresh()
+
+    def _refresh(self) -> Position:
+        manifest = self.manifest()
+        generation = manifest["generation"]
+        start = tuple(manifest["position"])
+
+        touched: Dict[int, Dict[str, Dict[str, List]]] = {}
+        position = start
+        for position, event in self.log.replay(start):
+            shard = self._shard_of(event.user_id)
+            if shard not in touched:
+                touched[shard] = self._read_shard(generation, shard)
+            touched[shard].setdefault(event.user_id, {})[event.application_id] = [event.status, event.timestamp]
+        if position == start:
+            return start
+
+        old_dir = self.directory / f"gen-{generation:08d}"
+        new_dir = self.directory / f"gen-{generation + 1:08d}"
+        if new_dir.exists():
+            # Left by a refresh that died before publishing it.
+            shutil.rmtree(new_dir)
+        new_dir.mkdir()
+        for shard in range(self.shards):
+            name = f"shard-{shard:03d}.json"
+            if shard in touched or generation == 0:
+                # A fresh file, never written through a link shared with the old generation.
+                tmp = new_dir / f".{name}.tmp"
+                tmp.write_text(json.dumps(touched.get(shard, {})))
+                os.replace(tmp, new_dir / name)
+                continue
+            try:
+                os.link(old_dir / name, new_dir / name)
+            except OSError:
+                shutil.copyfile(old_dir / name, new_dir / name)
+        tmp = self._manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({
+            "generation": generation + 1, "position": list(position), "shards": self.shards
+        }))
+        os.replace(tmp, self._manifest_path)
+
+        # Keep the previous generation for readers that loaded the old manifest.
+        stale = self.directory / f"gen-{generation - 1:08d}"
+        if generation > 1 and stale.exists():
+            shutil.rmtree(stale)
+        return position
+
+
+def status_funnel(log: ApplicationLog) -> Counter:
+    """Count of applications that ever reached each status, from a full replay"""
+    reached = set()
+    for _, event in log.replay():
+        reached.add((event.user_id, event.application_id, event.status))
+    return Counter(status for _, _, status in reached)
+
+
+_log: Optional[ApplicationLog] = None
+_snapshots: Optional[SnapshotStore] = None
+
+
+def get_application_log() -> ApplicationLog:
+    global _log
+    if _log is None:
+        _log = ApplicationLog(str(DATA_DIR / "application-log"))
+    return _log
+
+
+def get_snapshot_store() -> SnapshotStore:
+    global _snapshots
+    if _snapshots is None:
+        _snapshots = SnapshotStore(get_application_log(), str(DATA_DIR / "application-snapshots"))
+    return _snapshots
+
+
+def record_status_change(user_id: str, application_id: str, status: str) -> ApplicationEvent:
+    """Append a status change and push it to the user's open sessions"""
+    from components.notifier import publish_application_status
+
+    event = get_application_log().append(user_id, application_id, status)
+    publish_application_status(user_id, application_id, status, event.timestamp)
+    return event
@@ -0,0 +1,58 @@
+import base64
+from io import BytesIO
+from pathlib import Path
+
+from components.cache import get_cache
+
+LOGO_PATH = "jobgenie-logo.png"
+
+
+def _prebuilt_icon_path(image_path: str, size: int) -> Path:
+    path = Path(image_path)
+    return path.with_name(f"{path.stem}-{size}{path.suffix}")
+
+
+def load_logo_base64(image_path: str = LOGO_PATH, size: int = 32) -> str:
+    """Return a square, base64-encoded PNG of the logo for HTML embedding.
+
+    A prebuilt icon next to the source image (e.g. ``jobgenie-logo-32.png``)
+    is served as-is; otherwise PIL is imported on first use to resize it.
+    The result is kept in the shared ``assets`` cache so the logo is encoded
+    once per deployment rather than once per worker.
+    """
+    return get_cache("assets").get_or_set(
+        f"logo:{image_path}:{size}", lambda: _encode_logo(image_path, size)
+    )
+
+
+def _encode_logo(image_path: str, size: int) -> str:
+    prebuilt = _prebuilt_icon_path(image_path, size)
+    if prebuilt.exists():
+        return base64.b64encode(prebuilt.read_bytes()).decode()
+
+    img_path = Path(image_path)
+    if not img_path.exists():
+        print(f"Image not found at path: {image_path}")
+        return ""
+
+    from PIL import Image
+
+    img = Image.open(img_path)
+    img = img.resize((size, size))
+    buffered = BytesIO()
+    img.save(buffered, format="PNG")
+    return base64.b64encode(buffered.getvalue()).decode()
+
+
+def build_prebuilt_icon(image_path: str = LOGO_PATH, size: int = 32) -> Path:
+    """Write the resized icon next to the source so renders can skip PIL"""
+    from PIL import Image
+
+    target = _prebuilt_icon_path(image_path, size)
+    img = Image.open(image_path)
+    img.resize((size, size)).save(target, format="PNG")
+    return target
+
+
+if __name__ == "__main__":
+    print(f"Wrote {build_prebuilt_icon()}")
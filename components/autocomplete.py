@@ -0,0 +1,125 @@
+import csv
+import heapq
+import re
+import unicodedata
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from components.cache import get_cache
+
+SUGGESTIONS_PATH = Path(__file__).resolve().parent.parent / "data" / "suggestions.csv"
+FRONTEND_DIR = Path(__file__).resolve().parent / "autocomplete_frontend"
+
+_WORD_START_RE = re.compile(r"(?:^|(?<=[\s/(&-]))\w")
+
+
+def _fold(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+@dataclass(frozen=True)
+class Suggestion:
+    text: str
+    kind: str  # "title", "company" or "skill"
+    weight: float
+
+
+class SuggestionTrie:
+    """Prefix index that answers top-k queries without walking subtrees.
+
+    Every node stores the ``k`` heaviest suggestions below it, computed once
+    at build time, so a lookup costs one step per typed character. Terms are
+    also indexed from each word start, so "engin" finds "Software Engineer".
+    """
+
+    def __init__(self, suggestions: Iterable[Suggestion], k: int = 8):
+        self.k = k
+        # node = (children, top-k suggestions), kept as a tuple for compactness
+        self.root: Tuple[Dict[str, tuple], List[Suggestion]] = ({}, [])
+        self.size = 0
+        for suggestion in suggestions:
+            self._insert(suggestion)
+        self._freeze(self.root)
+
+    def _insert(self, suggestion: Suggestion):
+        folded = _fold(suggestion.text)
+        if not folded:
+            return
+        self.size += 1
+        for match in _WORD_START_RE.finditer(folded):
+            node = self.root
+            for char in folded[match.start():]:
+                children, top = node
+                top.append(suggestion)
+                node = children.setdefault(char, ({}, []))
+            node[1].append(suggestion)
+
+    def _freeze(self, node):
+        stack = [node]
+        while stack:
+            children, top = stack.pop()
+            unique = {s.text: s for s in top}.values()
+            top[:] = heapq.nlargest(self.k, unique, key=lambda s: s.weight)
+            stack.extend(children.values())
+
+    def search(self, prefix: str, limit: Optional[int] = None) -> List[Suggestion]:
+        node = self.root
+        for char in _fold(prefix):
+            node = node[0].get(char)
+            if node is None:
+                return []
+        return node[1][:limit or self.k]
+
+
+def load_suggestions(path: Path = SUGGESTIONS_PATH) -> List[Suggestion]:
+    """Read ``text,kind,weight`` rows, e.g. exported from search logs"""
+    if not path.exists():
+        return []
+    with open(path, newline="", encoding="utf-8") as f:
+        return [
+            Suggestion(row["text"], row["kind"], float(row["weight"]))
+            for row in csv.DictReader(f)
+        ]
+
+
+def get_suggestion_trie() -> SuggestionTrie:
+    """Build the trie once per deployment and share it through the cache"""
+    return get_cache("search").get_or_set(
+        "suggestion_trie", lambda: SuggestionTrie(load_suggestions())
+    )
+
+
+_component_func = None
+
+
+def autocomplete_input(key: str, placeholder: str = "Job title, company, or keywords",
+                       debounce_ms: int = 150, trie: Optional[SuggestionTrie] = None) -> Dict:
+    """Search box with typeahead suggestions.
+
+    The browser side only reports the typed prefix after ``debounce_ms`` of
+    inactivity, so a burst of keystrokes costs one rerun, not one per
+    character. Call it from inside an ``st.fragment`` so that rerun is
+    limited to the search box. Returns ``{"query": str, "submitted": bool}``.
+    """
+    global _component_func
+    if _component_func is None:
+        import streamlit.components.v1 as components
+
+        _component_func = components.declare_component(
+            "jobgenie_autocomplete", path=str(FRONTEND_DIR)
+        )
+
+    import streamlit as st
+
+    previous = st.session_state.get(key) or {}
+    prefix = previous.get("query", "")
+    suggestions = (trie or get_suggestion_trie()).search(prefix) if prefix else []
+    value = _component_func(
+        key=key,
+        placeholder=placeholder,
+        debounce_ms=debounce_ms,
+        suggestions=[{"text": s.text, "kind": s.kind} for s in suggestions],
+        default={"query": "", "submitted": False},
+    )
+    return value or {"query": "", "submitted": False}
@@ -0,0 +1,860 @@
+import calendar
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, fields
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Optional
+
+from components.activations import ACTIVATIONS_PATH, PlanActivation, record_activation
+from components.application_log import DATA_DIR
+from components.cache import get_cache
+
+DAY = 86400.0
+BILLING_DB_PATH = DATA_DIR / "billing" / "subscriptions.sqlite3"
+
+# Failed renewals are retried after these delays, then the subscription lapses.
+RETRY_DELAYS = (1 * DAY, 3 * DAY, 5 * DAY)
+
+
+@dataclass(frozen=True)
+class BillingPlan:
+    id: str
+    name: str
+    amount: int  # major units, as shown on the plan card
+    currency: str
+    interval: Optional[str]  # None for free plans
+    features: FrozenSet[str]
+    application_limit: Optional[int] = None
+
+    @property
+    def amount_minor(self) -> int:
+        return self.amount * 100
+
+
+_BASIC_FEATURES = frozenset({"basic_listings", "application_tracker"})
+_PREMIUM_FEATURES = _BASIC_FEATURES | {"unlimited_applications", "premium_listings",
+                                       "priority_applications", "resume_review"}
+_PRO_FEATURES = _PREMIUM_FEATURES | {"career_coaching", "interview_prep", "linkedin_makeover"}
+
+BILLING_PLANS: Dict[str, BillingPlan] = {
+    "basic": BillingPlan("basic", "Basic", 0, "inr", None, _BASIC_FEATURES, application_limit=5),
+    "premium_monthly": BillingPlan("premium_monthly", "Premium", 999, "inr", "month", _PREMIUM_FEATURES),
+    "pro_monthly": BillingPlan("pro_monthly", "Pro", 1999, "inr", "month", _PRO_FEATURES),
+}
+
+
+class BillingError(Exception):
+    pass
+
+
+class Clock:
+    def now(self) -> float:
+        raise NotImplementedError
+
+
+class SystemClock(Clock):
+    def now(self) -> float:
+        return time.time()
+
+
+class FrozenClock(Clock):
+    """Clock that only moves when told to, for driving renewals in tests"""
+
+    def __init__(self, start: Optional[float] = None):
+        self._now = time.time() if start is None else start
+
+    def now(self) -> float:
+        return self._now
+
+    def advance(self, seconds: float = 0.0, days: float = 0.0):
+        self._now += seconds + days * DAY
+
+    def set(self, timestamp: float):
+        self._now = timestamp
+
+
+def add_months(timestamp: float, months: int) -> float:
+    """Same day-of-month ``months`` later, clamped to the month's last day"""
+    start = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+    index = start.month - 1 + months
+    year, month = start.year + index // 12, index % 12 + 1
+    day = min(start.day, calendar.monthrange(year, month)[1])
+    return start.replace(year=year, month=month, day=day).timestamp()
+
+
+@dataclass
+class Subscription:
+    """Billing state for one user's paid plan.
+
+    Periods are counted from ``anchor`` (``cycle`` months in), rather than
+    from the previous period end, so a subscription started on the 31st
+    renews on the last day of short months and returns to the 31st.
+    """
+    id: str
+    user_id: str
+    plan_id: str
+    status: str
+    reference: str
+    anchor: float
+    cycle: int
+    current_period_start: float
+    current_period_end: float
+    next_attempt_at: float
+    failed_attempts: int = 0
+    pending_plan_id: Optional[str] = None
+    cancel_at_period_end: bool = False
+    customer_id: Optional[str] = None
+    gateway_subscription_id: Optional[str] = None
+    checkout_session_id: Optional[str] = None
+    version: int = 0
+
+    @property
+    def plan(self) -> BillingPlan:
+        return BILLING_PLANS[self.plan_id]
+
+
+_COLUMNS = [f.name for f in fields(Subscription)]
+
+# incomplete: first charge not confirmed; past_due: renewal failed, retrying.
+_TRANSITIONS = {
+    "incomplete": {"active", "canceled"},
+    "active": {"active", "past_due", "canceled"},
+    "past_due": {"active", "past_due", "canceled"},
+    "canceled": set(),
+}
+
+# Entitlements survive a failed renewal until the retries run out.
+_ENTITLED = ("active", "past_due")
+
+
+@dataclass
+class Proration:
+    credit_minor: int
+    charge_minor: int
+    immediate: bool
+
+    @property
+    def net_minor(self) -> int:
+        return self.charge_minor - self.credit_minor
+
+
+@dataclass
+class ChargeResult:
+    succeeded: bool
+    charge_id: str = ""
+    failure: str = ""
+    pending: bool = False  # the processor hasn't settled it yet; ask again later
+
+
+@dataclass
+class PaidCheckout:
+    """A Checkout Session confirmed as paid with the processor, not from the URL"""
+    session_id: str
+    reference: str
+    plan_id: str
+    amount_minor: int
+    currency: str
+    customer_id: Optional[str] = None
+    customer_email: Optional[str] = None
+    gateway_subscription_id: Optional[str] = None
+    charge_id: str = ""
+
+
+def _get(obj: Any, *path: str) -> Any:
+    """``obj[a][b]...`` for dicts and Stripe objects alike, None where a key is missing"""
+    for key in path:
+        if obj is None or isinstance(obj, str):
+            return None
+        try:
+            obj = obj[key]
+        except (KeyError, TypeError):
+            return None
+    return obj
+
+
+def _paid_checkout(session: Any, reference: str, plan_id: str) -> PaidCheckout:
+    """Check a Checkout Session is complete, paid, and is the one the URL claims"""
+    if _get(session, "status") != "complete" or _get(session, "payment_status") != "paid":
+        raise BillingError("Checkout session has not been paid")
+    if _get(session, "metadata", "reference") != reference or _get(session, "metadata", "plan_id") != plan_id:
+        raise BillingError("Checkout session does not match this order")
+    plan = BILLING_PLANS.get(plan_id)
+    amount, currency = _get(session, "amount_total"), _get(session, "currency")
+    if plan is None or amount != plan.amount_minor or currency != plan.currency:
+        raise BillingError(f"Checkout session paid {amount} {currency}, not the {plan_id} price")
+    subscription = _get(session, "subscription")
+    return PaidCheckout(
+        session_id=_get(session, "id"), reference=reference, plan_id=plan_id,
+        amount_minor=amount, currency=currency, customer_id=_get(session, "customer"),
+        customer_email=_get(session, "customer_details", "email"),
+        gateway_subscription_id=subscription if isinstance(subscription, str) else _get(subscription, "id"),
+    )
+
+
+class PaymentGateway:
+    """What the billing engine needs from a payment processor"""
+
+    def verify_checkout(self, session_id: str, reference: str, plan_id: str) -> PaidCheckout:
+        """The paid Checkout Session, with its charge tagged for reconciliation.
+
+        Raises BillingError unless the session is complete, paid, and
+        carries ``reference`` and ``plan_id``.
+        """
+        raise NotImplementedError
+
+    def charge(self, subscription: Subscription, amount_minor: int, currency: str,
+               idempotency_key: str, description: str) -> ChargeResult:
+        raise NotImplementedError
+
+    def renew(self, subscription: Subscription, plan: BillingPlan, idempotency_key: str) -> ChargeResult:
+        return self.charge(subscription, plan.amount_minor, plan.currency, idempotency_key,
+                           f"JobGenie {plan.name} renewal")
+
+    def change_plan(self, subscription: Subscription, plan: BillingPlan, proration_minor: int,
+                    idempotency_key: str) -> ChargeResult:
+        if proration_minor <= 0:
+            return ChargeResult(True)
+        return self.charge(subscription, proration_minor, plan.currency, idempotency_key,
+                           f"JobGenie upgrade to {plan.name}")
+
+    def cancel(self, subscription: Subscription, at_period_end: bool):
+        pass
+
+
+class LocalStripe(PaymentGateway):
+    """In-memory stand-in for Stripe, with its test payment methods.
+
+    Customers pay with ``pm_card_visa`` unless given one of the declining
+    test cards. Charges are recorded (with the same metadata we send to
+    Stripe) and idempotency keys replay the first result, as Stripe does.
+    ``create_checkout_session`` plays the customer's side of Checkout.
+    """
+
+    DECLINING = {
+        "pm_card_chargeDeclined": "card_declined",
+        "pm_card_chargeDeclinedInsufficientFunds": "insufficient_funds",
+        "pm_card_chargeDeclinedExpiredCard": "expired_card",
+    }
+
+    def __init__(self, clock: Clock):
+        self.clock = clock
+        self.customers: Dict[str, str] = {}
+        self.charges: List[Dict] = []
+        self.sessions: Dict[str, Dict] = {}
+        self._results: Dict[str, ChargeResult] = {}
+        self._lock = threading.Lock()
+
+    def create_customer(self, payment_method: str = "pm_card_visa") -> str:
+        customer_id = f"cus_{uuid.uuid4().hex[:14]}"
+        self.customers[customer_id] = payment_method
+        return customer_id
+
+    def attach_payment_method(self, customer_id: str, payment_method: str):
+        self.customers[customer_id] = payment_method
+
+    def create_checkout_session(self, reference: str, plan_id: str, payment_method: str = "pm_card_visa",
+                                email: Optional[str] = None) -> str:
+        """A Checkout Session as Stripe returns it once the customer has paid (or been declined)"""
+        plan = BILLING_PLANS[plan_id]
+        customer_id = self.create_customer(payment_method)
+        paid = payment_method not in self.DECLINING
+        session_id = f"cs_test_{uuid.uuid4().hex[:24]}"
+        charge_id = ""
+        if paid:
+            charge_id = f"ch_{uuid.uuid4().hex[:24]}"
+            self.charges.append({
+                "id": charge_id, "amount": plan.amount_minor, "currency": plan.currency,
+                "status": "succeeded", "created": int(self.clock.now()), "customer": customer_id,
+                "description": f"JobGenie {plan.name}", "metadata": {},
+            })
+        self.sessions[session_id] = {
+            "id": session_id, "status": "complete" if paid else "open",
+            "payment_status": "paid" if paid else "unpaid", "client_reference_id": reference,
+            "metadata": {"reference": reference, "plan_id": plan_id},
+            "amount_total": plan.amount_minor, "currency": plan.currency, "customer": customer_id,
+            "customer_details": {"email": email},
+            "subscription": f"sub_test_{uuid.uuid4().hex[:14]}" if paid and plan.interval else None,
+            "charge": charge_id,
+        }
+        return session_id
+
+    def verify_checkout(self, session_id: str, reference: str, plan_id: str) -> PaidCheckout:
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise BillingError("Unknown checkout session")
+        paid = _paid_checkout(session, reference, plan_id)
+        with self._lock:
+            for charge in self.charges:
+                if charge["id"] == session["charge"]:
+                    charge["metadata"] = {"reference": reference, "plan_id": plan_id}
+        paid.charge_id = session["charge"]
+        return paid
+
+    def charge(self, subscription: Subscription, amount_minor: int, currency: str,
+               idempotency_key: str, description: str) -> ChargeResult:
+        with self._lock:
+            if idempotency_key in self._results:
+                return self._results[idempotency_key]
+            payment_method = self.customers.get(subscription.customer_id or "", "pm_card_visa")
+            failure = self.DECLINING.get(payment_method, "")
+            charge_id = f"ch_{uuid.uuid4().hex[:24]}"
+            self.charges.append({
+                "id": charge_id, "amount": amount_minor, "currency": currency,
+                "status": "failed" if failure else "succeeded", "created": int(self.clock.now()),
+                "customer": subscription.customer_id, "description": description,
+                "metadata": {"reference": idempotency_key.rsplit(":", 1)[0],
+                             "plan_id": subscription.plan_id},
+            })
+            result = ChargeResult(not failure, charge_id, failure)
+            self._results[idempotency_key] = result
+            return result
+
+
+class StripeGateway(PaymentGateway):
+    """Stripe Billing owns the cycle; renewals read back what Stripe charged.
+
+    Subscriptions started from Checkout (``mode='subscription'``) are billed
+    by Stripe itself, so ``renew`` never charges: it checks whether Stripe
+    has moved the subscription into the next period, and tags the paying
+    charge with our reference so reconciliation can match it.
+    """
+
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+
+    def _stripe(self):
+        import stripe
+
+        stripe.api_key = self.api_key
+        return stripe
+
+    def _subscription_id(self, subscription: Subscription) -> str:
+        if not subscription.gateway_subscription_id:
+            session = self._stripe().checkout.Session.retrieve(subscription.checkout_session_id)
+            subscription.gateway_subscription_id = session.subscription
+        return subscription.gateway_subscription_id
+
+    def verify_checkout(self, session_id: str, reference: str, plan_id: str) -> PaidCheckout:
+        stripe = self._stripe()
+        try:
+            session = stripe.checkout.Session.retrieve(
+                session_id, expand=["payment_intent", "subscription.latest_invoice"])
+        except stripe.error.InvalidRequestError:
+            raise BillingError("Unknown checkout session")
+        paid = _paid_checkout(session, reference, plan_id)
+
+        # Subscription-mode Checkout creates the first invoice's payment
+        # without our metadata, so tag it here for reconciliation.
+        if _get(session, "mode") == "subscription":
+            invoice = _get(session, "subscription", "latest_invoice")
+            intent_id, charge_id = _get(invoice, "payment_intent"), _get(invoice, "charge")
+        else:
+            intent = _get(session, "payment_intent")
+            intent_id, charge_id = _get(intent, "id"), _get(intent, "latest_charge")
+        metadata = {"reference": reference, "plan_id": plan_id}
+        if isinstance(intent_id, str):
+            stripe.PaymentIntent.modify(intent_id, metadata=metadata)
+        if isinstance(charge_id, str):
+            stripe.Charge.modify(charge_id, metadata=metadata)
+            paid.charge_id = charge_id
+        return paid
+
+    def _payment_method(self, subscription: Subscription) -> Optional[str]:
+        # Checkout saves the card on the subscription, not as the customer default.
+        stripe = self._stripe()
+        customer = stripe.Customer.retrieve(subscription.customer_id)
+        method = _get(customer, "invoice_settings", "default_payment_method")
+        if not method:
+            method = stripe.Subscription.retrieve(self._subscription_id(subscription)).default_payment_method
+        return method
+
+    def charge(self, subscription: Subscription, amount_minor: int, currency: str,
+               idempotency_key: str, description: str) -> ChargeResult:
+        stripe = self._stripe()
+        try:
+            intent = stripe.PaymentIntent.create(
+                amount=amount_minor, currency=currency, customer=subscription.customer_id,
+                payment_method=self._payment_method(subscription),
+                off_session=True, confirm=True, description=description,
+                metadata={"reference": idempotency_key.rsplit(":", 1)[0], "plan_id": subscription.plan_id},
+                idempotency_key=idempotency_key,
+            )
+        except stripe.error.CardError as e:
+            return ChargeResult(False, failure=e.code or str(e))
+        return ChargeResult(intent.status == "succeeded", intent.id, pending=intent.status == "processing")
+
+    def renew(self, subscription: Subscription, plan: BillingPlan, idempotency_key: str) -> ChargeResult:
+        stripe = self._stripe()
+        remote = stripe.Subscription.retrieve(self._subscription_id(subscription),
+                                              expand=["latest_invoice"])
+        if remote.status in ("past_due", "unpaid", "canceled", "incomplete_expired"):
+            return ChargeResult(False, failure=f"stripe subscription {remote.status}")
+        if remote.current_period_end <= subscription.current_period_end:
+            return ChargeResult(False, pending=True)
+        charge_id = getattr(remote.latest_invoice, "charge", None) or ""
+        if charge_id:
+            stripe.Charge.modify(charge_id, metadata={"reference": idempotency_key.rsplit(":", 1)[0],
+                                                      "plan_id": plan.id})
+        return ChargeResult(True, charge_id)
+
+    def change_plan(self, subscription: Subscription, plan: BillingPlan, proration_minor: int,
+                    idempotency_key: str) -> ChargeResult:
+        """Switch the price without Stripe's proration, then charge our quote.
+
+        Stripe prorates to the second, so its invoice would never match the
+        whole-rupee quote the customer confirmed, or carry the reference of
+        the activation we record for it. The price goes back if the charge
+        fails.
+        """
+        stripe = self._stripe()
+        remote = stripe.Subscription.retrieve(self._subscription_id(subscription))
+        item = remote["items"]["data"][0]
+
+        def set_price(target: BillingPlan, key: str):
+            stripe.Subscription.modify(
+                remote.id,
+                items=[{"id": item.id, "price_data": {
+                    "currency": target.currency, "product": item.price.product,
+                    "unit_amount": target.amount_minor, "recurring": {"interval": target.interval},
+                }}],
+                proration_behavior="none",
+                metadata={"plan_id": target.id, "reference": subscription.reference},
+                idempotency_key=key,
+            )
+
+        set_price(plan, f"{idempotency_key}:price")
+        result = super().change_plan(subscription, plan, proration_minor, idempotency_key)
+        if not result.succeeded:
+            set_price(subscription.plan, f"{idempotency_key}:revert")
+        return result
+
+    def cancel(self, subscription: Subscription, at_period_end: bool):
+        stripe = self._stripe()
+        if at_period_end:
+            stripe.Subscription.modify(self._subscription_id(subscription), cancel_at_period_end=True)
+        else:
+            stripe.Subscription.cancel(self._subscription_id(subscription))
+
+
+class BillingEngine:
+    """Recurring billing state in SQLite, driven by an injectable clock.
+
+    Subscriptions renew on their period end through ``renew_due``, which
+    the scheduler runs in batches. Upgrades are prorated and charged at
+    once; downgrades take effect at the next renewal. Every successful
+    charge is also recorded as a plan activation, under the same
+    reference the charge carries, for reconciliation against Stripe.
+    Anything that charges does so while holding the subscription's row
+    (``_locked``), so a concurrent writer waits rather than losing an
+    update after the customer has paid.
+    """
+
+    def __init__(self, path: Path, gateway: PaymentGateway, clock: Optional[Clock] = None,
+                 activations_path: Optional[Path] = ACTIVATIONS_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.gateway = gateway
+        self.clock = clock or SystemClock()
+        self.activations_path = activations_path
+        self._entitlements = get_cache(f"entitlements:{self.path}")
+        with self._connect() as db:
+            db.executescript("""
+                CREATE TABLE IF NOT EXISTS subscriptions (
+                    id TEXT PRIMARY KEY,
+                    user_id TEXT NOT NULL,
+                    plan_id TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    reference TEXT NOT NULL UNIQUE,
+                    anchor REAL NOT NULL,
+                    cycle INTEGER NOT NULL,
+                    current_period_start REAL NOT NULL,
+                    current_period_end REAL NOT NULL,
+                    next_attempt_at REAL NOT NULL,
+                    failed_attempts INTEGER NOT NULL DEFAULT 0,
+                    pending_plan_id TEXT,
+                    cancel_at_period_end INTEGER NOT NULL DEFAULT 0,
+                    customer_id TEXT,
+                    gateway_subscription_id TEXT,
+                    checkout_session_id TEXT,
+                    version INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS subscriptions_user ON subscriptions (user_id, status);
+                CREATE INDEX IF NOT EXISTS subscriptions_due ON subscriptions (status, next_attempt_at);
+                CREATE TABLE IF NOT EXISTS invoices (
+                    id TEXT PRIMARY KEY,
+                    subscription_id TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    plan_id TEXT NOT NULL,
+                    amount_minor INTEGER NOT NULL,
+                    currency TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    charge_id TEXT,
+                    failure TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS invoices_subscription ON invoices (subscription_id);
+                CREATE TABLE IF NOT EXISTS checkouts (
+                    reference TEXT PRIMARY KEY,
+                    session_id TEXT NOT NULL,
+                    plan_id TEXT NOT NULL,
+                    user_id TEXT,
+                    claimed_at REAL NOT NULL
+                );
+            """)
+
+    @contextmanager
+    def _connect(self, db: Optional[sqlite3.Connection] = None):
+        """New connection, or ``db`` as is when a batch already holds one"""
+        if db is not None:
+            yield db
+            return
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            yield db
+        finally:
+            db.close()
+
+    @contextmanager
+    def _locked(self, subscription_id: str, db: Optional[sqlite3.Connection] = None):
+        """The subscription re-read inside a write transaction held until the block exits.
+
+        Writers to the database queue behind it for the length of one
+        gateway call; readers (entitlements) are not blocked under WAL.
+        """
+        with self._connect(db) as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute(f"SELECT {', '.join(_COLUMNS)} FROM subscriptions WHERE id = ?",
+                                 (subscription_id,)).fetchone()
+                subscription = self._row(row) if row else None
+                yield subscription, db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+        if subscription is not None:
+            # Again after COMMIT: a render between _save and COMMIT may have cached the old plan.
+            self._entitlements.delete(subscription.user_id)
+
+    @staticmethod
+    def _row(row) -> Subscription:
+        subscription = Subscription(*row)
+        subscription.cancel_at_period_end = bool(subscription.cancel_at_period_end)
+        return subscription
+
+    def get(self, subscription_id: str) -> Optional[Subscription]:
+        with self._connect() as db:
+            row = db.execute(f"SELECT {', '.join(_COLUMNS)} FROM subscriptions WHERE id = ?",
+                             (subscription_id,)).fetchone()
+        return self._row(row) if row else None
+
+    def active_subscription(self, user_id: str) -> Optional[Subscription]:
+        with self._connect() as db:
+            row = db.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM subscriptions "
+                f"WHERE user_id = ? AND status IN {_ENTITLED} ORDER BY anchor DESC LIMIT 1",
+                (user_id,)).fetchone()
+        return self._row(row) if row else None
+
+    def _save(self, subscription: Subscription, status: Optional[str] = None,
+              db: Optional[sqlite3.Connection] = None) -> bool:
+        """Write back with an optimistic version check; False if someone else got there first"""
+        if status is not None:
+            if status not in _TRANSITIONS[subscription.status]:
+                raise BillingError(f"Cannot move a {subscription.status} subscription to {status}")
+            subscription.status = status
+        values = [getattr(subscription, name) for name in _COLUMNS]
+        expected = subscription.version
+        values[_COLUMNS.index("version")] = expected + 1
+        with self._connect(db) as db:
+            updated = db.execute(
+                f"UPDATE subscriptions SET {', '.join(f'{c} = ?' for c in _COLUMNS)} "
+                "WHERE id = ? AND version = ?",
+                (*values, subscription.id, expected),
+            ).rowcount
+        self._entitlements.delete(subscription.user_id)
+        if updated:
+            subscription.version = expected + 1
+        return bool(updated)
+
+    def _write(self, subscription: Subscription, status: Optional[str] = None,
+               db: Optional[sqlite3.Connection] = None):
+        """``_save`` under ``_locked``, where a lost version check is a bug rather than a race"""
+        if not self._save(subscription, status, db):
+            raise BillingError(f"Subscription {subscription.id} changed while locked")
+
+    def _record(self, subscription: Subscription, invoice_id: str, kind: str, plan: BillingPlan,
+                amount_minor: int, result: ChargeResult, db: Optional[sqlite3.Connection] = None):
+        now = self.clock.now()
+        with self._connect(db) as db:
+            db.execute(
+                "INSERT INTO invoices (id, subscription_id, kind, plan_id, amount_minor, currency, "
+                "status, charge_id, failure, attempts, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?) "
+                "ON CONFLICT (id) DO UPDATE SET status = excluded.status, charge_id = excluded.charge_id, "
+                "failure = excluded.failure, attempts = attempts + 1",
+                (invoice_id, subscription.id, kind, plan.id, amount_minor, plan.currency,
+                 "paid" if result.succeeded else "open", result.charge_id, result.failure, now),
+            )
+        if result.succeeded and self.activations_path is not None:
+            record_activation(
+                PlanActivation(invoice_id, plan.id, amount_minor // 100, plan.currency, now,
+                               subscription.user_id, subscription.checkout_session_id),
+                self.activations_path,
+            )
+
+    def _attempts(self, invoice_id: str, db: Optional[sqlite3.Connection] = None) -> int:
+        with self._connect(db) as db:
+            row = db.execute("SELECT attempts FROM invoices WHERE id = ?", (invoice_id,)).fetchone()
+        return row[0] if row else 0
+
+    def verify_checkout(self, session_id: str, reference: str, plan_id: str) -> PaidCheckout:
+        return self.gateway.verify_checkout(session_id, reference, plan_id)
+
+    def claim_checkout(self, checkout: PaidCheckout, user_id: Optional[str] = None) -> bool:
+        """Mark a verified checkout as fulfilled; False if something already claimed it.
+
+        The checkout reference is the idempotency key for everything done
+        once per payment (activation, conversion, receipt, subscription),
+        so opening the success URL again, in any session or process,
+        grants nothing twice.
+        """
+        with self._connect() as db:
+            return db.execute(
+                "INSERT OR IGNORE INTO checkouts (reference, session_id, plan_id, user_id, claimed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (checkout.reference, checkout.session_id, checkout.plan_id, user_id, self.clock.now()),
+            ).rowcount == 1
+
+    def start_subscription(self, user_id: str, plan_id: str, reference: Optional[str] = None,
+                           customer_id: Optional[str] = None, checkout: Optional[PaidCheckout] = None,
+                           charge_now: bool = False) -> Subscription:
+        """Open a subscription starting now.
+
+        Either ``checkout`` (from ``verify_checkout``) has already taken the
+        first payment, or ``charge_now`` bills the first period through the
+        gateway; anything else is refused. Calling again with the same
+        reference (a reloaded confirmation page) returns the existing
+        subscription.
+        """
+        plan = BILLING_PLANS.get(plan_id)
+        if plan is None or plan.interval is None:
+            raise BillingError(f"{plan_id!r} is not a recurring plan")
+        if checkout is not None:
+            if checkout.plan_id != plan_id:
+                raise BillingError(f"Checkout paid for {checkout.plan_id}, not {plan_id}")
+            reference, customer_id = checkout.reference, checkout.customer_id
+        elif not charge_now:
+            raise BillingError("A subscription needs a paid checkout or a charge")
+        reference = reference or uuid.uuid4().hex
+        with self._connect() as db:
+            existing = db.execute(f"SELECT {', '.join(_COLUMNS)} FROM subscriptions WHERE reference = ?",
+                                  (reference,)).fetchone()
+        if existing:
+            return self._row(existing)
+        current = self.active_subscription(user_id)
+        if current is not None:
+            raise BillingError(f"User already has a {current.plan.name} subscription; change its plan instead")
+
+        now = self.clock.now()
+        end = add_months(now, 1)
+        subscription = Subscription(
+            id=f"sub_{uuid.uuid4().hex[:16]}", user_id=user_id, plan_id=plan_id,
+            status="incomplete" if charge_now else "active", reference=reference,
+            anchor=now, cycle=1, current_period_start=now, current_period_end=end,
+            next_attempt_at=end, customer_id=customer_id,
+            checkout_session_id=checkout.session_id if checkout else None,
+            gateway_subscription_id=checkout.gateway_subscription_id if checkout else None,
+        )
+        with self._connect() as db:
+            db.execute(f"INSERT INTO subscriptions ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})",
+                       [getattr(subscription, name) for name in _COLUMNS])
+        self._entitlements.delete(user_id)
+
+        if charge_now:
+            invoice_id = f"{subscription.id}:1"
+            result = self.gateway.charge(subscription, plan.amount_minor, plan.currency,
+                                         f"{invoice_id}:1", f"JobGenie {plan.name}")
+            self._record(subscription, invoice_id, "initial", plan, plan.amount_minor, result)
+            self._save(subscription, "active" if result.succeeded else "canceled")
+            if not result.succeeded:
+                raise BillingError(f"Payment failed: {result.failure}")
+        return subscription
+
+    def quote_change(self, subscription: Subscription, plan_id: str) -> Proration:
+        """Price of switching plans now, for the unused part of the current period.
+
+        Upgrades are charged the difference in whole rupees straight away;
+        anything cheaper waits for the next renewal and is not refunded.
+        """
+        old, new = subscription.plan, BILLING_PLANS[plan_id]
+        period = subscription.current_period_end - subscription.current_period_start
+        remaining = min(max(subscription.current_period_end - self.clock.now(), 0.0), period)
+        fraction = remaining / period if period > 0 else 0.0
+        credit = round(old.amount * fraction) * 100
+        charge = round(new.amount * fraction) * 100
+        return Proration(credit, charge, immediate=new.amount > old.amount)
+
+    def change_plan(self, subscription_id: str, plan_id: str,
+                    quoted_minor: Optional[int] = None) -> Subscription:
+        """Switch plans: upgrades are charged now, downgrades wait for the renewal.
+
+        ``quoted_minor`` is the upgrade price the customer was shown; if the
+        quote has moved on since (it is rounded to whole rupees), nothing is
+        charged and the caller should show the new one.
+        """
+        plan = BILLING_PLANS.get(plan_id)
+        if plan is None or plan.interval is None:
+            raise BillingError(f"{plan_id!r} is not a recurring plan")
+        failure = None
+        with self._locked(subscription_id) as (subscription, db):
+            if subscription is None or subscription.status not in _ENTITLED:
+                raise BillingError("No active subscription to change")
+            if plan_id == subscription.plan_id:
+                subscription.pending_plan_id = None
+                self._write(subscription, db=db)
+                return subscription
+
+            proration = self.quote_change(subscription, plan_id)
+            if not proration.immediate:
+                subscription.pending_plan_id = plan_id
+                self._write(subscription, db=db)
+                return subscription
+            if quoted_minor is not None and proration.net_minor != quoted_minor:
+                raise BillingError(f"The upgrade price is now ₹{proration.net_minor // 100}; please confirm again")
+
+            invoice_id = f"{subscription.id}:{subscription.cycle}:{plan_id}"
+            attempt = self._attempts(invoice_id, db) + 1
+            result = self.gateway.change_plan(subscription, plan, proration.net_minor, f"{invoice_id}:{attempt}")
+            # Recorded either way, so a retry gets a fresh idempotency key.
+            self._record(subscription, invoice_id, "proration", plan, proration.net_minor, result, db)
+            if result.succeeded:
+                subscription.plan_id = plan_id
+                subscription.pending_plan_id = None
+                self._write(subscription, db=db)
+            else:
+                failure = result.failure or "payment is still processing"
+        if failure is not None:
+            raise BillingError(f"Upgrade payment failed: {failure}")
+        return subscription
+
+    def cancel(self, subscription_id: str, at_period_end: bool = True) -> Subscription:
+        with self._locked(subscription_id) as (subscription, db):
+            if subscription is None:
+                raise BillingError(f"Unknown subscription {subscription_id}")
+            self.gateway.cancel(subscription, at_period_end)
+            if at_period_end:
+                subscription.cancel_at_period_end = True
+                self._write(subscription, db=db)
+            else:
+                self._write(subscription, "canceled", db)
+        return subscription
+
+    def _renew(self, subscription: Subscription, db: sqlite3.Connection) -> str:
+        if subscription.cancel_at_period_end:
+            self._write(subscription, "canceled", db)
+            return "canceled"
+
+        plan = BILLING_PLANS[subscription.pending_plan_id or subscription.plan_id]
+        invoice_id = f"{subscription.id}:{subscription.cycle + 1}"
+        attempt = subscription.failed_attempts + 1
+        result = self.gateway.renew(subscription, plan, f"{invoice_id}:{attempt}")
+        now = self.clock.now()
+
+        if result.pending:
+            subscription.next_attempt_at = now + 3600
+            self._write(subscription, db=db)
+            return "pending"
+        self._record(subscription, invoice_id, "renewal", plan, plan.amount_minor, result, db)
+        if result.succeeded:
+            subscription.plan_id = plan.id
+            subscription.pending_plan_id = None
+            subscription.cycle += 1
+            subscription.current_period_start = subscription.current_period_end
+            subscription.current_period_end = add_months(subscription.anchor, subscription.cycle)
+            subscription.next_attempt_at = subscription.current_period_end
+            subscription.failed_attempts = 0
+            self._write(subscription, "active", db)
+            return "renewed"
+        if subscription.failed_attempts >= len(RETRY_DELAYS):
+            self._write(subscription, "canceled", db)
+            return "canceled"
+        subscription.next_attempt_at = now + RETRY_DELAYS[subscription.failed_attempts]
+        subscription.failed_attempts += 1
+        self._write(subscription, "past_due", db)
+        return "failed"
+
+    def renew_due(self, batch_size: int = 100, max_batches: int = 100) -> Dict[str, int]:
+        """Renew every subscription whose period has ended, ``batch_size`` at a time.
+
+        Each one is renewed under ``_locked`` and re-checked there, so a
+        subscription changed since the batch was selected (an upgrade, a
+        cancellation) is renewed from its current state or skipped.
+        """
+        outcomes = {"renewed": 0, "failed": 0, "canceled": 0, "pending": 0, "skipped": 0, "error": 0}
+        for _ in range(max_batches):
+            with self._connect() as db:
+                ids = [row[0] for row in db.execute(
+                    f"SELECT id FROM subscriptions WHERE status IN {_ENTITLED} AND next_attempt_at <= ? "
+                    "ORDER BY next_attempt_at LIMIT ?",
+                    (self.clock.now(), batch_size),
+                )]
+                if not ids:
+                    break
+                for subscription_id in ids:
+                    try:
+                        with self._locked(subscription_id, db) as (subscription, _):
+                            if (subscription is None or subscription.status not in _ENTITLED
+                                    or subscription.next_attempt_at > self.clock.now()):
+                                outcome = "skipped"
+                            else:
+                                outcome = self._renew(subscription, db)
+                        outcomes[outcome] += 1
+                    except Exception as e:
+                        # Rolled back and left due; the next run retries with the same idempotency key.
+                        print(f"Renewal failed for {subscription_id}: {e}")
+                        outcomes["error"] += 1
+            if len(ids) < batch_size or outcomes["error"]:
+                break
+        return outcomes
+
+    def entitlements(self, user_id: Optional[str]) -> BillingPlan:
+        """Plan whose features the user currently has (Basic without a subscription).
+
+        The plan id is cached per user and dropped on every write to that
+        user's subscription, so page renders don't query SQLite.
+        """
+        if not user_id:
+            return BILLING_PLANS["basic"]
+
+        def load() -> str:
+            subscription = self.active_subscription(user_id)
+            return subscription.plan_id if subscription else "basic"
+
+        return BILLING_PLANS[self._entitlements.get_or_set(user_id, load, ttl=300)]
+
+    def has_feature(self, user_id: Optional[str], feature: str) -> bool:
+        return feature in self.entitlements(user_id).features
+
+
+_engine: Optional[BillingEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_billing() -> BillingEngine:
+    """Process-wide engine; ``JOBGENIE_BILLING_GATEWAY=local`` forces the Stripe stand-in"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            api_key = os.getenv("STRIPE_SECRET_KEY")
+            kind = os.getenv("JOBGENIE_BILLING_GATEWAY", "stripe" if api_key else "local")
+            clock = SystemClock()
+            gateway = StripeGateway(api_key) if kind == "stripe" else LocalStripe(clock)
+            _engine = BillingEngine(BILLING_DB_PATH, gateway, clock)
+        return _engine
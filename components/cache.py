@@ -0,0 +1,389 @@
+import hashlib
+import os
+import pickle
+import stat
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_MISSING = object()
+
+
+class CacheBackend:
+    """Minimal key/value interface shared by every cache tier"""
+
+    def get(self, key: str, default: Any = None) -> Any:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class LRUCache(CacheBackend):
+    """Thread-safe in-process LRU with optional per-entry TTL"""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def _private_directory(directory: str) -> Path:
+    """Create ``directory`` readable and writable by this user only, or refuse it.
+
+    Entries are unpickled, so a directory another local user can write to
+    (say one they created first in ``/dev/shm``) would let them run code
+    in every worker.
+    """
+    path = Path(directory)
+    path.mkdir(mode=0o700, parents=True, exist_ok=True)
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid():
+        raise PermissionError(f"Cache directory {path} is not a directory owned by this user")
+    if info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise PermissionError(f"Cache directory {path} is writable by other users")
+    os.chmod(path, 0o700)
+    return path
+
+
+class FileCache(CacheBackend):
+    """Cache shared by every process on the host through a directory.
+
+    Point it at a tmpfs such as ``/dev/shm`` to keep entries in shared
+    memory. Writes go to a temp file and are renamed into place, so readers
+    never observe a partially written entry. The directory must belong to
+    this user and not be writable by anyone else (see ``_private_directory``).
+    """
+
+    def __init__(self, directory: str):
+        self.directory = _private_directory(directory)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / hashlib.sha1(key.encode()).hexdigest()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            with open(self._path(key), "rb") as f:
+                expires_at, value = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return default
+        if expires_at is not None and expires_at <= time.time():
+            self.delete(key)
+            return default
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.time() + ttl if ttl else None
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump((expires_at, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def delete(self, key: str) -> None:
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def clear(self) -> None:
+        for path in self.directory.iterdir():
+            if path.is_file() and path.name != FileInvalidationBus.LOG_NAME:
+                path.unlink(missing_ok=True)
+
+
+class RedisCache(CacheBackend):
+    """Shared tier backed by Redis; a local ``redis-server`` works as a stand-in"""
+
+    def __init__(self, url: str, prefix: str = "jobgenie:"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key: str, default: Any = None) -> Any:
+        raw = self.client.get(self.prefix + key)
+        return default if raw is None else pickle.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self.client.set(self.prefix + key, payload, px=int(ttl * 1000) if ttl else None)
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self.prefix + key)
+
+    def clear(self) -> None:
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+
+class FileInvalidationBus:
+    """Cross-process invalidation messages over an append-only log file.
+
+    Each process remembers how far it has read; ``poll()`` returns the keys
+    other processes invalidated since the last call. ``"*"`` means "drop
+    everything", which is also what readers get when the log is rotated.
+    """
+
+    LOG_NAME = "invalidations.log"
+
+    def __init__(self, directory: str, max_bytes: int = 1 << 20):
+        self.path = Path(directory) / self.LOG_NAME
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.touch(exist_ok=True)
+        self.max_bytes = max_bytes
+        self.pid = os.getpid()
+        stat = self.path.stat()
+        self._inode, self._offset = stat.st_ino, stat.st_size
+
+    def publish(self, key: str) -> None:
+        line = f"{self.pid}\t{key}\n".encode()
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT)
+        try:
+            os.write(fd, line)
+            size = os.fstat(fd).st_size
+        finally:
+            os.close(fd)
+        if size > self.max_bytes:
+            os.replace(self.path, self.path.with_suffix(".old"))
+            self.path.touch(exist_ok=True)
+
+    def poll(self) -> List[str]:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return []
+        if stat.st_ino != self._inode or stat.st_size < self._offset:
+            # Rotated under us: anything may have been missed.
+            self._inode, self._offset = stat.st_ino, stat.st_size
+            return ["*"]
+        if stat.st_size == self._offset:
+            return []
+
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            chunk = f.read(stat.st_size - self._offset)
+        # Only consume whole lines; a concurrent append may be mid-write.
+        chunk = chunk[:chunk.rfind(b"\n") + 1]
+        self._offset += len(chunk)
+
+        keys = []
+        for line in chunk.decode().splitlines():
+            pid, _, key = line.partition("\t")
+            if pid != str(self.pid):
+                keys.append(key)
+        return keys
+
+
+class RedisInvalidationBus:
+    """Cross-process invalidation messages over Redis pub/sub"""
+
+    def __init__(self, url: str, channel: str = "jobgenie:invalidate"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.channel = channel
+        self.pid = str(os.getpid())
+        self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(channel)
+
+    def publish(self, key: str) -> None:
+        self.client.publish(self.channel, f"{self.pid}\t{key}")
+
+    def poll(self) -> List[str]:
+        keys = []
+        while True:
+            message = self._pubsub.get_message()
+            if message is None:
+                return keys
+            pid, _, key = message["data"].decode().partition("\t")
+            if pid != self.pid:
+                keys.append(key)
+
+
+class TieredCache(CacheBackend):
+    """In-process LRU in front of an optional shared tier.
+
+    Writes and deletes are published on the invalidation bus so that the
+    LRU tier of every other process drops its copy instead of serving a
+    stale value. The bus is polled at most every ``poll_interval`` seconds.
+    Entries promoted from the shared tier are kept locally for at most
+    ``promoted_ttl`` seconds, since their shared expiry is not known here.
+    """
+
+    def __init__(self, local: LRUCache, shared: Optional[CacheBackend] = None,
+                 bus=None, poll_interval: float = 0.5, promoted_ttl: float = 60.0):
+        self.local = local
+        self.shared = shared
+        self.bus = bus
+        self.poll_interval = poll_interval
+        self.promoted_ttl = promoted_ttl
+        self._next_poll = 0.0
+        self._lock = threading.Lock()
+
+    def _sync(self) -> None:
+        if self.bus is None:
+            return
+        now = time.monotonic()
+        if now < self._next_poll:
+            return
+        with self._lock:
+            if now < self._next_poll:
+                return
+            self._next_poll = now + self.poll_interval
+            for key in self.bus.poll():
+                if key == "*":
+                    self.local.clear()
+                else:
+                    self.local.delete(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        self._sync()
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if self.shared is None:
+            return default
+        value = self.shared.get(key, _MISSING)
+        if value is _MISSING:
+            return default
+        self.local.set(key, value, self.promoted_ttl)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.local.set(key, value, ttl)
+        if self.shared is not None:
+            self.shared.set(key, value, ttl)
+        if self.bus is not None:
+            self.bus.publish(key)
+
+    def delete(self, key: str) -> None:
+        self.local.delete(key)
+        if self.shared is not None:
+            self.shared.delete(key)
+        if self.bus is not None:
+            self.bus.publish(key)
+
+    def clear(self) -> None:
+        self.local.clear()
+        if self.shared is not None:
+            self.shared.clear()
+        if self.bus is not None:
+            self.bus.publish("*")
+
+    def get_or_set(self, key: str, factory: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.set(key, value, ttl)
+        return value
+
+
+class NamespacedCache(CacheBackend):
+    """View of a TieredCache that prefixes every key with a namespace"""
+
+    def __init__(self, cache: TieredCache, namespace: str):
+        self.cache = cache
+        self.prefix = f"{namespace}:"
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.cache.get(self.prefix + key, default)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.cache.set(self.prefix + key, value, ttl)
+
+    def delete(self, key: str) -> None:
+        self.cache.delete(self.prefix + key)
+
+    def clear(self) -> None:
+        # Namespaces share one store; clearing one clears them all.
+        self.cache.clear()
+
+    def get_or_set(self, key: str, factory: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        return self.cache.get_or_set(self.prefix + key, factory, ttl)
+
+
+_default_cache: Optional[TieredCache] = None
+_default_lock = threading.Lock()
+_namespaces: Dict[str, NamespacedCache] = {}
+
+
+def _build_default_cache() -> TieredCache:
+    backend = os.getenv("JOBGENIE_CACHE_BACKEND", "memory")
+    local = LRUCache(int(os.getenv("JOBGENIE_CACHE_LOCAL_SIZE", "2048")))
+    if backend == "file":
+        # Per user, so deployments under different accounts never share (or squat) a directory.
+        name = f"jobgenie-cache-{os.getuid()}"
+        default_dir = f"/dev/shm/{name}" if Path("/dev/shm").is_dir() else \
+            os.path.join(tempfile.gettempdir(), name)
+        directory = os.getenv("JOBGENIE_CACHE_DIR", default_dir)
+        try:
+            shared = FileCache(directory)
+        except PermissionError as e:
+            print(f"Shared cache disabled: {e}")
+            return TieredCache(local)
+        return TieredCache(local, shared, FileInvalidationBus(directory))
+    if backend == "redis":
+        url = os.getenv("JOBGENIE_REDIS_URL", "redis://localhost:6379/0")
+        return TieredCache(local, RedisCache(url), RedisInvalidationBus(url))
+    return TieredCache(local)
+
+
+def get_cache(namespace: str) -> NamespacedCache:
+    """Return the process-wide cache for ``namespace``.
+
+    ``JOBGENIE_CACHE_BACKEND`` selects the shared tier: ``memory`` (default,
+    single process), ``file`` (``JOBGENIE_CACHE_DIR``, defaulting to
+    ``/dev/shm``) or ``redis`` (``JOBGENIE_REDIS_URL``). Run every worker
+    with the same settings to share entries and invalidations.
+    """
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = _build_default_cache()
+        if namespace not in _namespaces:
+            _namespaces[namespace] = NamespacedCache(_default_cache, namespace)
+        return _namespaces[namespace]
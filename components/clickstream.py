@@ -0,0 +1,232 @@
+import argparse
+import atexit
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from components.application_log import DATA_DIR
+from components.experiments import is_unit_id
+
+CLICKSTREAM_DIR = DATA_DIR / "clickstream"
+
+# Business events are kept until the queue is completely full; the rest are
+# shed once it passes the high-water mark.
+PRIORITY_EVENTS = {"checkout", "plan_click"}
+
+# What browsers may send to the beacon endpoint, and the fields kept.
+BEACON_EVENTS = {"navigate": ("path",), "button_click": ("action",)}
+MAX_BEACON_BYTES = 2048
+
+
+class ClickstreamCollector:
+    """Buffers events in memory and writes them as gzipped JSON-lines batches.
+
+    ``emit`` never blocks: it puts the event on a bounded queue and, if the
+    queue is past ``high_water`` (or full, for priority events), drops it
+    and counts the drop instead. A writer thread drains the queue into
+    ``date=YYYY-MM-DD/*.jsonl.gz`` files, one per batch, written to a
+    temporary name and renamed so readers never see a partial batch. Drop
+    counts since the previous batch are written into each batch as a
+    ``collector.dropped`` event, so losses show up in the data itself.
+    """
+
+    def __init__(self, directory: Path = CLICKSTREAM_DIR, max_queue: int = 20_000,
+                 high_water: float = 0.8, batch_size: int = 2_000, flush_interval: float = 5.0):
+        self.directory = Path(directory)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(max_queue)
+        self._high_water = int(max_queue * high_water)
+        self._dropped: Counter = Counter()
+        self._unreported: Counter = Counter()
+        self._stats = Counter()
+        self._lock = threading.Lock()
+        self._writer = threading.Thread(target=self._run, daemon=True, name="clickstream-writer")
+        self._writer.start()
+
+    def emit(self, event_type: str, unit_id: Optional[str] = None, **properties) -> bool:
+        """Queue one event; returns False if it was shed under load"""
+        event = {"type": event_type, "ts": time.time(), "unit_id": unit_id, **properties}
+        if event_type not in PRIORITY_EVENTS and self._queue.qsize() >= self._high_water:
+            self._drop(event_type)
+            return False
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self._drop(event_type)
+            return False
+        return True
+
+    def _drop(self, event_type: str):
+        with self._lock:
+            self._dropped[event_type] += 1
+            self._unreported[event_type] += 1
+
+    def _run(self):
+        while True:
+            batch: List[Dict[str, Any]] = []
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    event = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if event is None:
+                    stop = True
+                    break
+                batch.append(event)
+            try:
+                self._write(batch)
+            except OSError as e:
+                print(f"Clickstream batch of {len(batch)} events lost: {e}")
+                with self._lock:
+                    self._dropped["write_error"] += len(batch)
+            if stop:
+                return
+
+    def _write(self, batch: List[Dict[str, Any]]):
+        with self._lock:
+            dropped, self._unreported = self._unreported, Counter()
+        if dropped:
+            batch.append({"type": "collector.dropped", "ts": time.time(), "counts": dict(dropped)})
+        if not batch:
+            return
+        day = datetime.fromtimestamp(batch[0]["ts"], tz=timezone.utc).date().isoformat()
+        directory = self.directory / f"date={day}"
+        directory.mkdir(parents=True, exist_ok=True)
+        name = f"events-{int(time.time() * 1000)}-{os.getpid()}-{uuid.uuid4().hex[:8]}.jsonl.gz"
+        tmp = directory / f".{name}.tmp"
+        payload = "".join(json.dumps(event, separators=(",", ":"), default=str) + "\n" for event in batch)
+        try:
+            with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=6) as f:
+                f.write(payload)
+            os.replace(tmp, directory / name)
+        finally:
+            tmp.unlink(missing_ok=True)
+        with self._lock:
+            self._stats["events_written"] += len(batch)
+            self._stats["batches_written"] += 1
+
+    def close(self, timeout: float = 5.0):
+        """Write out everything queued so far and stop the writer"""
+        if not self._writer.is_alive():
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._writer.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "queued": self._queue.qsize(), "dropped": dict(self._dropped)}
+
+
+def read_events(directory: Path = CLICKSTREAM_DIR, day: Optional[str] = None):
+    """Iterate stored events, optionally for one ``YYYY-MM-DD`` partition"""
+    pattern = f"date={day}/*.jsonl.gz" if day else "date=*/*.jsonl.gz"
+    for path in sorted(Path(directory).glob(pattern)):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+
+class _BeaconHandler(BaseHTTPRequestHandler):
+    """Accepts ``navigator.sendBeacon`` posts from the navbar iframe"""
+
+    collector: ClickstreamCollector = None
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if self.path != "/collect" or not 0 < length <= MAX_BEACON_BYTES:
+            self.send_response(400)
+            self.end_headers()
+            return
+        try:
+            body = json.loads(self.rfile.read(length))
+            fields = BEACON_EVENTS[body["type"]]
+        except (ValueError, KeyError, TypeError):
+            self.send_response(400)
+            self.end_headers()
+            return
+        properties = {name: str(body.get(name, ""))[:200] for name in fields}
+        # Anyone can post here; an id we didn't mint is recorded as anonymous.
+        unit_id = body.get("unit_id") if is_unit_id(body.get("unit_id")) else None
+        accepted = self.collector.emit(body["type"], unit_id, source="navbar", **properties)
+        # 503 tells clients that support it to back off while we shed load.
+        self.send_response(204 if accepted else 503)
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_beacons(collector: ClickstreamCollector, host: str, port: int) -> Optional[ThreadingHTTPServer]:
+    """Start the beacon endpoint on a daemon thread; None if another process holds the port"""
+    handler = type("BeaconHandler", (_BeaconHandler,), {"collector": collector})
+    try:
+        server = ThreadingHTTPServer((host, port), handler)
+    except OSError:
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="clickstream-beacons").start()
+    return server
+
+
+def beacon_url() -> Optional[str]:
+    """Where browsers should send navbar events, or None when ingest is off"""
+    address = os.getenv("JOBGENIE_CLICKSTREAM_INGEST")
+    if not address:
+        return None
+    return os.getenv("JOBGENIE_CLICKSTREAM_URL", f"http://{address}/collect")
+
+
+_collector: Optional[ClickstreamCollector] = None
+_collector_lock = threading.Lock()
+
+
+def get_collector() -> ClickstreamCollector:
+    """Process-wide collector.
+
+    ``JOBGENIE_CLICKSTREAM_INGEST=host:port`` also serves the navbar beacon
+    endpoint; the first worker to bind the port serves it for all of them.
+    """
+    global _collector
+    with _collector_lock:
+        if _collector is None:
+            _collector = ClickstreamCollector()
+            atexit.register(_collector.close)
+            address = os.getenv("JOBGENIE_CLICKSTREAM_INGEST")
+            if address:
+                host, port = address.rsplit(":", 1)
+                serve_beacons(_collector, host, int(port))
+        return _collector
+
+
+def track(event_type: str, unit_id: Optional[str] = None, **properties) -> bool:
+    return get_collector().emit(event_type, unit_id, **properties)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a standalone clickstream beacon endpoint")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8599)
+    args = parser.parse_args()
+    collector = ClickstreamCollector()
+    atexit.register(collector.close)
+    if serve_beacons(collector, args.host, args.port) is None:
+        raise SystemExit(f"Port {args.port} is already in use")
+    while True:
+        time.sleep(60)
+        print(collector.stats())
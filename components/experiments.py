@@ -0,0 +1,349 @@
+import atexit
+import bisect
+import fcntl
+import json
+import math
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from hashlib import blake2b
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from components.application_log import DATA_DIR
+
+COUNTERS_PATH = DATA_DIR / "experiments" / "counters.jsonl"
+
+_SCALE = 1 << 32
+
+# What new_unit_id() produces; anything else in a URL is not ours.
+_UNIT_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+@dataclass(frozen=True)
+class Variant:
+    name: str
+    weight: float = 1.0
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+class Experiment:
+    """Deterministic, stateless assignment of units (users) to variants.
+
+    A unit's bucket is a keyed BLAKE2b hash of its id, so the same user
+    always sees the same variant in every process without storing
+    anything. The high 32 bits decide enrollment (``traffic``), the low
+    32 bits pick the variant against precomputed weight thresholds.
+    Changing ``salt`` reshuffles everyone.
+    """
+
+    def __init__(self, key: str, variants: List[Variant], traffic: float = 1.0,
+                 salt: str = "", control: str = "control"):
+        if not any(v.name == control for v in variants):
+            raise ValueError(f"Experiment {key!r} has no {control!r} variant")
+        self.key = key
+        self.variants = variants
+        self.traffic = traffic
+        self.control = control
+        self._hash_key = f"{key}:{salt}".encode()[:64]
+        self._by_name = {v.name: v for v in variants}
+        total = sum(v.weight for v in variants)
+        cumulative, self._thresholds = 0.0, []
+        for variant in variants:
+            cumulative += variant.weight
+            self._thresholds.append(int(cumulative / total * _SCALE))
+        self._thresholds[-1] = _SCALE
+        self._enrolled_below = int(traffic * _SCALE)
+
+    def _hash(self, unit_id: str) -> int:
+        digest = blake2b(unit_id.encode(), digest_size=8, key=self._hash_key).digest()
+        return int.from_bytes(digest, "big")
+
+    def assign(self, unit_id: str) -> Optional[Variant]:
+        """Variant for this unit, or None when it falls outside the traffic share"""
+        value = self._hash(unit_id)
+        if (value >> 32) >= self._enrolled_below:
+            return None
+        return self.variants[bisect.bisect_right(self._thresholds, value & 0xFFFFFFFF)]
+
+    def variant(self, unit_id: str) -> Variant:
+        """What to render: the assigned variant, or control for unenrolled units"""
+        return self.assign(unit_id) or self._by_name[self.control]
+
+
+# Control reproduces what the pages rendered before the experiments.
+EXPERIMENTS: Dict[str, Experiment] = {
+    "plan_badges": Experiment("plan_badges", [
+        Variant("control"),
+        Variant("pro_popular", params={"popular": "pro_monthly", "highlight": "premium_monthly"}),
+        Variant("no_highlight", params={"highlight": None}),
+    ]),
+    "home_premium_cta": Experiment("home_premium_cta", [
+        Variant("control"),
+        Variant("visibility", params={
+            "headline": "Get Noticed 3x More",
+            "body": "Premium applications go to the top of recruiters' inboxes, with exclusive "
+                    "listings and a resume review included.",
+            "button": "See Premium Plans",
+        }),
+    ]),
+}
+
+
+def get_experiment(key: str) -> Experiment:
+    return EXPERIMENTS[key]
+
+
+def new_unit_id() -> str:
+    return uuid.uuid4().hex
+
+
+def is_unit_id(value: Any) -> bool:
+    """Whether ``value`` has the shape ``new_unit_id`` mints"""
+    return isinstance(value, str) and bool(_UNIT_ID_RE.fullmatch(value))
+
+
+def session_unit_id(session_state, query_params) -> str:
+    """Signed-in user id, else an anonymous id kept for the session.
+
+    A full page load (links between pages) starts a new session, so the
+    anonymous id can be carried over in the ``aid`` query parameter. It is
+    only accepted in the shape ``new_unit_id`` mints, since it ends up in
+    HTML, URLs and every tracked event.
+    """
+    if session_state.get("user_id"):
+        return str(session_state["user_id"])
+    if "anon_id" not in session_state:
+        aid = query_params.get("aid") or ""
+        session_state["anon_id"] = aid if is_unit_id(aid) else new_unit_id()
+    return session_state["anon_id"]
+
+
+@dataclass
+class VariantStats:
+    exposures: int = 0
+    conversions: int = 0
+    revenue: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        return self.conversions / self.exposures if self.exposures else 0.0
+
+
+class ExperimentTracker:
+    """Per-variant exposure and conversion counters, flushed in batches.
+
+    Recording is a dict update under a lock. Deltas are appended to a
+    shared JSON-lines file once ``flush_every`` events have accumulated or
+    ``flush_interval`` seconds have passed (and at exit), so the file is a
+    time series of small batches from every worker. A unit counts once
+    per experiment for exposures and once for conversions, remembered in
+    a bounded per-process table.
+    """
+
+    def __init__(self, path: Path = COUNTERS_PATH, flush_every: int = 500,
+                 flush_interval: float = 10.0, max_seen: int = 200_000):
+        self.path = Path(path)
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.max_seen = max_seen
+        self._pending: Dict[Tuple[str, str], VariantStats] = {}
+        self._events = 0
+        self._seen: "OrderedDict[Tuple[str, str, str], None]" = OrderedDict()
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def _first(self, key: Tuple[str, str, str]) -> bool:
+        if key in self._seen:
+            return False
+        self._seen[key] = None
+        if len(self._seen) > self.max_seen:
+            self._seen.popitem(last=False)
+        return True
+
+    def _record(self, experiment: str, unit_id: str, event: str, value: float = 0.0) -> bool:
+        variant = EXPERIMENTS[experiment].assign(unit_id)
+        if variant is None:
+            return False
+        with self._lock:
+            if not self._first((experiment, unit_id, event)):
+                return False
+            stats = self._pending.setdefault((experiment, variant.name), VariantStats())
+            if event == "exposure":
+                stats.exposures += 1
+            else:
+                stats.conversions += 1
+                stats.revenue += value
+            self._events += 1
+            due = (self._events >= self.flush_every
+                   or time.monotonic() - self._last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+        return True
+
+    def expose(self, experiment: str, unit_id: str) -> bool:
+        return self._record(experiment, unit_id, "exposure")
+
+    def convert(self, experiment: str, unit_id: str, value: float = 0.0) -> bool:
+        """Count a conversion for the unit's variant; ``value`` is revenue, if any"""
+        return self._record(experiment, unit_id, "conversion", value)
+
+    def flush(self) -> int:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._events = 0
+            self._last_flush = time.monotonic()
+        if not pending:
+            return 0
+        now = time.time()
+        lines = "".join(
+            json.dumps({"ts": now, "experiment": experiment, "variant": variant,
+                        "exposures": s.exposures, "conversions": s.conversions,
+                        "revenue": s.revenue}, separators=(",", ":")) + "\n"
+            for (experiment, variant), s in pending.items()
+        )
+        with self._write_lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                f.write(lines)
+        return len(pending)
+
+
+def iter_counter_batches(path: Path = COUNTERS_PATH) -> Iterator[Dict]:
+    if not Path(path).exists():
+        return
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+@dataclass
+class Comparison:
+    variant: str
+    lift: float  # absolute difference in conversion rate vs control
+    interval: Tuple[float, float]
+    p_value: float  # always valid: may be checked after every batch
+    decision: str
+
+
+def _msprt(control: VariantStats, treatment: VariantStats, tau: float, alpha: float,
+           min_exposures: int = 100) -> Optional[Tuple[float, float, float]]:
+    """Mixture SPRT on the difference of two proportions.
+
+    Normal approximation with a N(0, tau^2) mixing prior on the effect
+    (Johari et al., "Always Valid Inference"). The test statistic uses the
+    pooled variance under the null, so an arm with no conversions yet
+    can't fake certainty; the confidence sequence uses the unpooled one.
+    Returns the effect, the half-width of its (1 - alpha) confidence
+    sequence, and 1/Lambda.
+    """
+    if control.exposures < min_exposures or treatment.exposures < min_exposures:
+        return None
+    p_c, p_t = control.rate, treatment.rate
+    pooled = (control.conversions + treatment.conversions) / (control.exposures + treatment.exposures)
+    null_variance = pooled * (1 - pooled) * (1 / control.exposures + 1 / treatment.exposures)
+    variance = p_c * (1 - p_c) / control.exposures + p_t * (1 - p_t) / treatment.exposures
+    if null_variance <= 0:
+        return None
+    variance = variance or null_variance
+    effect = p_t - p_c
+    t2 = tau * tau
+    log_lambda = (0.5 * math.log(null_variance / (null_variance + t2))
+                  + effect * effect * t2 / (2 * null_variance * (null_variance + t2)))
+    half_width = math.sqrt(variance * (variance + t2) / t2
+                           * (math.log((variance + t2) / variance) - 2 * math.log(alpha)))
+    return effect, half_width, math.exp(-min(log_lambda, 700.0))
+
+
+def sequential_report(path: Path = COUNTERS_PATH, tau: float = 0.02,
+                      alpha: float = 0.05) -> Dict[str, Dict[str, Any]]:
+    """Totals per variant and always-valid comparisons against control.
+
+    The counter file is replayed batch by batch and the p-value of each
+    treatment is the running minimum of 1/Lambda over those looks, so the
+    report can be read at any time without inflating false positives.
+    """
+    totals: Dict[str, Dict[str, VariantStats]] = {}
+    p_values: Dict[Tuple[str, str], float] = {}
+    for batch in iter_counter_batches(path):
+        experiment = EXPERIMENTS.get(batch["experiment"])
+        if experiment is None:
+            continue
+        variants = totals.setdefault(experiment.key, {})
+        stats = variants.setdefault(batch["variant"], VariantStats())
+        stats.exposures += batch["exposures"]
+        stats.conversions += batch["conversions"]
+        stats.revenue += batch["revenue"]
+
+        control = variants.get(experiment.control)
+        names = variants if batch["variant"] == experiment.control else [batch["variant"]]
+        for name in names:
+            if name == experiment.control or control is None:
+                continue
+            result = _msprt(control, variants[name], tau, alpha)
+            if result is not None:
+                key = (experiment.key, name)
+                p_values[key] = min(p_values.get(key, 1.0), result[2])
+
+    report: Dict[str, Dict[str, Any]] = {}
+    for key, variants in totals.items():
+        experiment = EXPERIMENTS[key]
+        control = variants.get(experiment.control, VariantStats())
+        comparisons = []
+        for name, stats in variants.items():
+            if name == experiment.control:
+                continue
+            result = _msprt(control, stats, tau, alpha)
+            if result is None:
+                continue
+            effect, half_width, _ = result
+            p_value = p_values.get((key, name), 1.0)
+            decision = ("keep running" if p_value >= alpha else
+                        f"{name} wins" if effect > 0 else f"{experiment.control} wins")
+            comparisons.append(Comparison(name, effect, (effect - half_width, effect + half_width),
+                                          p_value, decision))
+        report[key] = {"variants": variants, "comparisons": comparisons}
+    return report
+
+
+_tracker: Optional[ExperimentTracker] = None
+_tracker_lock = threading.Lock()
+
+
+def _flush_periodically(tracker: ExperimentTracker):
+    while True:
+        time.sleep(tracker.flush_interval)
+        try:
+            tracker.flush()
+        except OSError as e:
+            print(f"Experiment counter flush failed: {e}")
+
+
+def get_tracker() -> ExperimentTracker:
+    """Process-wide tracker; also flushed by a daemon thread when traffic is idle"""
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            _tracker = ExperimentTracker()
+            atexit.register(_tracker.flush)
+            threading.Thread(target=_flush_periodically, args=(_tracker,), daemon=True,
+                             name="experiment-flush").start()
+        return _tracker
+
+
+if __name__ == "__main__":
+    for key, result in sequential_report().items():
+        print(f"\n{key}")
+        for name, stats in result["variants"].items():
+            revenue = stats.revenue / stats.exposures if stats.exposures else 0.0
+            print(f"  {name:>14}: {stats.exposures:>8} exposed  {stats.conversions:>6} converted  "
+                  f"{stats.rate:7.2%}  ₹{revenue:.2f}/exposure")
+        for c in result["comparisons"]:
+            print(f"  {c.variant:>14}: lift {c.lift:+.2%} [{c.interval[0]:+.2%}, {c.interval[1]:+.2%}]  "
+                  f"p={c.p_value:.4f}  -> {c.decision}")
@@ -0,0 +1,305 @@
+import bisect
+import csv
+import heapq
+import math
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+from components.cache import get_cache
+
+GAZETTEER_PATH = Path(__file__).resolve().parent.parent / "data" / "gazetteer.csv"
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_EARTH_RADIUS_KM = 6371.0088
+
+
+def geohash_encode(lat: float, lon: float, precision: int = 7) -> str:
+    lat_lo, lat_hi, lon_lo, lon_hi = -90.0, 90.0, -180.0, 180.0
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            bits = (bits << 1) | (lon >= mid)
+            lon_lo, lon_hi = (mid, lon_hi) if lon >= mid else (lon_lo, mid)
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            bits = (bits << 1) | (lat >= mid)
+            lat_lo, lat_hi = (mid, lat_hi) if lat >= mid else (lat_lo, mid)
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+
+def cell_size_deg(precision: int) -> Tuple[float, float]:
+    """(lat, lon) height and width in degrees of a geohash cell"""
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlam = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlam / 2) ** 2
+    return 2 * _EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+@dataclass
+class GeoMatch:
+    job_id: Hashable
+    distance_km: float
+    score: float
+
+
+class GeoJobIndex:
+    """Geohash index over job coordinates.
+
+    Postings are kept as parallel arrays sorted by geohash, so every cell at
+    every precision is a contiguous range found by bisection. Radius and
+    bounding-box queries scan only the covering cells and then check exact
+    distances, which keeps them proportional to the local job density
+    rather than to the total number of postings.
+
+    Each row carries the version of the job it was written for. Moving or
+    removing a job only bumps its version in ``_current``, which turns the
+    old row into a tombstone that queries skip; tombstones are dropped
+    when the next flush merges in new rows, once they are a quarter of
+    the index.
+    """
+
+    def __init__(self, precision: int = 8):
+        self.precision = precision
+        self._hashes: List[str] = []
+        self._ids: List[Hashable] = []
+        self._lats = array("d")
+        self._lons = array("d")
+        self._versions = array("q")
+        self._pending: List[Tuple[str, Hashable, float, float, int]] = []
+        self._positions: Dict[Hashable, Tuple[float, float]] = {}
+        self._current: Dict[Hashable, int] = {}
+        self._next_version = 0
+        self._stale = 0
+
+    def add(self, job_id: Hashable, lat: float, lon: float):
+        """Index a job, replacing its previous position if it was already indexed"""
+        if self._positions.get(job_id) == (lat, lon):
+            return
+        if job_id in self._current:
+            self._stale += 1
+        self._next_version += 1
+        self._current[job_id] = self._next_version
+        self._positions[job_id] = (lat, lon)
+        self._pending.append((geohash_encode(lat, lon, self.precision), job_id, lat, lon, self._next_version))
+
+    def add_many(self, jobs: Iterable[Tuple[Hashable, float, float]]):
+        for job_id, lat, lon in jobs:
+            self.add(job_id, lat, lon)
+
+    def remove(self, job_id: Hashable) -> bool:
+        if self._current.pop(job_id, None) is None:
+            return False
+        del self._positions[job_id]
+        self._stale += 1
+        return True
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def _live(self, i: int) -> bool:
+        return self._current.get(self._ids[i]) == self._versions[i]
+
+    def _flush(self):
+        if not self._pending:
+            return
+        current = self._current
+        pending = sorted((row for row in self._pending if current.get(row[1]) == row[4]),
+                         key=lambda row: row[0])
+        self._pending = []
+        compact = self._stale * 4 > len(self._hashes) + len(pending)
+        existing = zip(self._hashes, self._ids, self._lats, self._lons, self._versions)
+        if compact:
+            existing = (row for row in existing if current.get(row[1]) == row[4])
+            self._stale = 0
+        # Both sides are sorted by geohash: one linear merge, no re-sort.
+        hashes, ids, lats, lons, versions = [], [], array("d"), array("d"), array("q")
+        for row in heapq.merge(existing, pending, key=lambda row: row[0]):
+            hashes.append(row[0])
+            ids.append(row[1])
+            lats.append(row[2])
+            lons.append(row[3])
+            versions.append(row[4])
+        self._hashes, self._ids, self._lats, self._lons, self._versions = hashes, ids, lats, lons, versions
+
+    def _cell_range(self, prefix: str) -> range:
+        lo = bisect.bisect_left(self._hashes, prefix)
+        hi = bisect.bisect_left(self._hashes, prefix + "~")
+        return range(lo, hi)
+
+    def _covering_cells(self, south: float, west: float, north: float, east: float,
+                        max_cells: int = 64) -> List[str]:
+        south, north = max(south, -90.0), min(north, 90.0)
+        precision = self.precision
+        while precision > 1:
+            lat_step, lon_step = cell_size_deg(precision)
+            rows = int((north - south) / lat_step) + 2
+            cols = int((east - west) / lon_step) + 2
+            if rows * cols <= max_cells:
+                break
+            precision -= 1
+        lat_step, lon_step = cell_size_deg(precision)
+
+        cells = set()
+        lat = south
+        while lat <= north + lat_step:
+            lon = west
+            while lon <= east + lon_step:
+                cells.add(geohash_encode(min(lat, 90.0), min(max(lon, -180.0), 179.999999), precision))
+                lon += lon_step
+            lat += lat_step
+        return sorted(cells)
+
+    @staticmethod
+    def _longitude_spans(west: float, east: float) -> List[Tuple[float, float]]:
+        """Split a longitude span that crosses the antimeridian into two"""
+        if east - west >= 360.0:
+            return [(-180.0, 180.0)]
+        # Shift only what lies outside [-180, 180], so in-range edges stay exact.
+        west, east = (lon + 360.0 if lon < -180.0 else lon - 360.0 if lon > 180.0 else lon
+                      for lon in (west, east))
+        if west <= east:
+            return [(west, east)]
+        return [(west, 180.0), (-180.0, east)]
+
+    def _rows_in(self, south: float, west: float, north: float, east: float) -> Iterator[int]:
+        spans = self._longitude_spans(west, east)
+        # Each span picks its own cell precision, so two spans' cells can overlap.
+        seen = set() if len(spans) > 1 else None
+        for span_west, span_east in spans:
+            for cell in self._covering_cells(south, span_west, north, span_east):
+                for i in self._cell_range(cell):
+                    if seen is not None:
+                        if i in seen:
+                            continue
+                        seen.add(i)
+                    if self._live(i):
+                        yield i
+
+    def bbox(self, south: float, west: float, north: float, east: float) -> List[Hashable]:
+        """Job ids inside a bounding box; ``west > east`` wraps across the antimeridian"""
+        self._flush()
+        spans = self._longitude_spans(west, east)
+        return [
+            self._ids[i] for i in self._rows_in(south, west, north, east)
+            if south <= self._lats[i] <= north and any(w <= self._lons[i] <= e for w, e in spans)
+        ]
+
+    def within_radius(self, lat: float, lon: float, radius_km: float) -> Dict[Hashable, float]:
+        """Map of job id to distance for every job within ``radius_km``"""
+        self._flush()
+        dlat = math.degrees(radius_km / _EARTH_RADIUS_KM)
+        if abs(lat) + dlat >= 90.0:
+            west, east = -180.0, 180.0  # the circle covers a pole
+        else:
+            dlon = min(dlat / math.cos(math.radians(abs(lat) + dlat)), 180.0)
+            west, east = lon - dlon, lon + dlon
+        found = {}
+        for i in self._rows_in(lat - dlat, west, lat + dlat, east):
+            distance = haversine_km(lat, lon, self._lats[i], self._lons[i])
+            if distance <= radius_km:
+                found[self._ids[i]] = distance
+        return found
+
+    def search(self, lat: float, lon: float, radius_km: float,
+               text_scores: Optional[Dict[Hashable, float]] = None,
+               facet_filter: Optional[Callable[[Hashable], bool]] = None,
+               limit: int = 50, distance_weight: float = 0.3) -> List[GeoMatch]:
+        """Rank jobs near a point, blending text relevance with proximity.
+
+        ``text_scores`` are the candidates from the text index (job id to a
+        relevance in [0, 1]); when given, only those jobs are considered.
+        Whichever side is smaller drives the scan: a narrow text match is
+        checked against stored coordinates, a selective radius against the
+        text scores.
+        """
+        if text_scores is not None and len(text_scores) < 1024:
+            candidates = {}
+            for job_id in text_scores:
+                position = self._positions.get(job_id)
+                if position is None:
+                    continue
+                distance = haversine_km(lat, lon, *position)
+                if distance <= radius_km:
+                    candidates[job_id] = distance
+        else:
+            candidates = self.within_radius(lat, lon, radius_km)
+
+        def ranked():
+            for job_id, distance in candidates.items():
+                if text_scores is not None and job_id not in text_scores:
+                    continue
+                if facet_filter is not None and not facet_filter(job_id):
+                    continue
+                relevance = text_scores[job_id] if text_scores is not None else 1.0
+                proximity = 1.0 - distance / radius_km if radius_km else 1.0
+                score = (1 - distance_weight) * relevance + distance_weight * proximity
+                yield GeoMatch(job_id, distance, score)
+
+        return heapq.nlargest(limit, ranked(), key=lambda match: match.score)
+
+
+@dataclass
+class Place:
+    name: str
+    region: str
+    country: str
+    lat: float
+    lon: float
+    population: int
+
+
+class Gazetteer:
+    """Offline place-name lookup, so geocoding never leaves the box"""
+
+    def __init__(self, places: Iterable[Place], aliases: Optional[Dict[str, str]] = None):
+        self._by_name: Dict[str, Place] = {}
+        for place in places:
+            key = place.name.casefold()
+            current = self._by_name.get(key)
+            if current is None or place.population > current.population:
+                self._by_name[key] = place
+        for alias, name in (aliases or {}).items():
+            if name.casefold() in self._by_name:
+                self._by_name.setdefault(alias.casefold(), self._by_name[name.casefold()])
+
+    @classmethod
+    def from_csv(cls, path: Path = GAZETTEER_PATH) -> "Gazetteer":
+        """Read ``name,region,country,lat,lon,population,aliases`` rows"""
+        places, aliases = [], {}
+        if path.exists():
+            with open(path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    places.append(Place(
+                        row["name"], row["region"], row["country"],
+                        float(row["lat"]), float(row["lon"]), int(row["population"] or 0),
+                    ))
+                    for alias in filter(None, (row.get("aliases") or "").split(";")):
+                        aliases[alias] = row["name"]
+        return cls(places, aliases)
+
+    def geocode(self, text: str) -> Optional[Place]:
+        """Resolve "Pune", "Bangalore, Karnataka" or "Gurgaon, India" to a place"""
+        for part in (text or "").split(","):
+            place = self._by_name.get(" ".join(part.split()).casefold())
+            if place is not None:
+                return place
+        return None
+
+
+def get_gazetteer() -> Gazetteer:
+    return get_cache("geo").get_or_set("gazetteer", Gazetteer.from_csv)
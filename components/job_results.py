@@ -0,0 +1,44 @@
+from html import escape
+from typing import Optional, Tuple
+
+import streamlit as st
+
+from components.geo import Place
+from components.job_search import DEFAULT_RADIUS_KM, get_job_search
+from components.jobs import JobListing
+from components.paginated_list import KeysetPaginator, PaginatedList
+
+
+def _render_job(item: Tuple[int, JobListing]) -> str:
+    _, job = item
+    badge = ('<span style="color: #4F46E5; font-size: 0.8rem; font-weight: 600; margin-left: 0.5rem;">'
+             'PREMIUM</span>') if job.premium else ""
+    salary = f'<div style="color: #059669; margin-top: 0.25rem;">{escape(job.salary)}</div>' if job.salary else ""
+    return f"""
+    <div class="feature-card" style="margin-bottom: 0.75rem;">
+        <div style="font-weight: 600; font-size: 1.1rem;">{escape(job.title)}{badge}</div>
+        <div style="color: #4B5563;">{escape(job.company)} · {escape(job.location)}</div>
+        {salary}
+    </div>
+    """
+
+
+def render_job_results(key: str, query: str, place: Optional[Place] = None,
+                       radius_km: float = DEFAULT_RADIUS_KM):
+    """Paged search results; an empty query lists every open posting"""
+    search = get_job_search()
+    center = (place.lat, place.lon) if place else None
+    filters = (query, center, radius_km)
+    if st.session_state.get(f"{key}_filters") != filters:
+        st.session_state[f"{key}_filters"] = filters
+        st.session_state.pop(f"{key}_list_state", None)
+
+    ranked = search.search(query, center, radius_km)
+    # Ranked rows are keyed by their position, which is unique and ascending.
+    rows = [(rank, search.jobs[job_id]) for rank, (job_id, _) in enumerate(ranked) if job_id in search.jobs]
+    where = f" within {radius_km:.0f} km of {place.name}" if place else ""
+    st.markdown(f"**{len(rows)} jobs{where}**")
+    PaginatedList(
+        key, KeysetPaginator(rows, key=lambda row: row[0]), _render_job,
+        empty_message="No jobs match your search yet.",
+    ).render()
@@ -0,0 +1,137 @@
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from components.geo import GeoJobIndex
+from components.jobs import JobListing, JobStore, get_job_store
+from components.search_cache import SearchResultCache, normalize_query
+
+# A query word found in the title counts double one found elsewhere.
+_FIELD_WEIGHTS = (("title", 2.0), ("company", 1.0), ("location", 1.0), ("description", 1.0))
+_MAX_WEIGHT = max(weight for _, weight in _FIELD_WEIGHTS)
+
+DEFAULT_RADIUS_KM = 25.0
+
+
+def _terms(text: str) -> List[str]:
+    return normalize_query(text).split()
+
+
+class JobSearch:
+    """Text and location search over the open postings of a ``JobStore``.
+
+    Words map to the jobs containing them (weighted by field) and
+    coordinates go into a ``GeoJobIndex``. ``sync()`` applies only the
+    postings written since the previous sync, at most every
+    ``sync_interval`` seconds, so every worker stays current with one
+    indexed query per interval. Results go through a
+    ``SearchResultCache`` whose index version is bumped by every sync
+    that changed something, so a repeated search is a cache hit until a
+    posting is published, edited or closed.
+    """
+
+    def __init__(self, store: JobStore, cache: Optional[SearchResultCache] = None,
+                 sync_interval: float = 0.0):
+        self.store = store
+        self.cache = cache if cache is not None else SearchResultCache()
+        self.sync_interval = sync_interval
+        self._synced_at = float("-inf")
+        self.revision = 0
+        self.jobs: Dict[str, JobListing] = {}
+        self.geo = GeoJobIndex()
+        self._words: Dict[str, Set[str]] = {}
+        self._weights: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def sync(self) -> bool:
+        """Catch up with the store; True if any posting changed"""
+        with self._lock:
+            revision, changed = self.store.changes_since(self.revision)
+            if not changed:
+                return False
+            for listing in changed:
+                self._remove(listing.job_id)
+                if listing.status == "open":
+                    self._add(listing)
+            self.revision = revision
+        self.cache.bump_index_version()
+        return True
+
+    def _add(self, listing: JobListing):
+        weights: Dict[str, float] = {}
+        for name, weight in _FIELD_WEIGHTS:
+            for term in _terms(getattr(listing, name)):
+                weights[term] = max(weights.get(term, 0.0), weight)
+        for term in weights:
+            self._words.setdefault(term, set()).add(listing.job_id)
+        self._weights[listing.job_id] = weights
+        self.jobs[listing.job_id] = listing
+        if listing.lat is not None and listing.lon is not None:
+            self.geo.add(listing.job_id, listing.lat, listing.lon)
+
+    def _remove(self, job_id: str):
+        if self.jobs.pop(job_id, None) is None:
+            return
+        for term in self._weights.pop(job_id):
+            jobs = self._words[term]
+            jobs.discard(job_id)
+            if not jobs:
+                del self._words[term]
+        self.geo.remove(job_id)
+
+    def text_scores(self, query: str) -> Optional[Dict[str, float]]:
+        """Relevance in [0, 1] of every job matching a query word; None for an empty query"""
+        terms = _terms(query)
+        if not terms:
+            return None
+        scores: Dict[str, float] = {}
+        for term in terms:
+            for job_id in self._words.get(term, ()):
+                scores[job_id] = scores.get(job_id, 0.0) + self._weights[job_id][term]
+        top = _MAX_WEIGHT * len(terms)
+        return {job_id: score / top for job_id, score in scores.items()}
+
+    def search(self, query: str, place: Optional[Tuple[float, float]] = None,
+               radius_km: float = DEFAULT_RADIUS_KM, limit: int = 500) -> List[Tuple[str, float]]:
+        """Best matches as (job id, score), best first; ``place`` is a (lat, lon) to search around"""
+        now = time.monotonic()
+        if now - self._synced_at >= self.sync_interval:
+            self._synced_at = now
+            self.sync()
+        filters = {"limit": limit}
+        if place is not None:
+            filters.update(near=f"{place[0]:.4f},{place[1]:.4f}", radius_km=radius_km)
+        return self.cache.get_or_search(
+            query, lambda query, _: self._search(query, place, radius_km, limit), filters
+        )
+
+    def _search(self, query: str, place: Optional[Tuple[float, float]], radius_km: float,
+                limit: int) -> List[Tuple[str, float]]:
+        with self._lock:
+            text_scores = self.text_scores(query)
+            if place is not None:
+                matches = self.geo.search(place[0], place[1], radius_km, text_scores, limit=limit)
+                scored = [(match.job_id, match.score) for match in matches]
+            elif text_scores is not None:
+                scored = list(text_scores.items())
+            else:
+                scored = [(job_id, 1.0) for job_id in self.jobs]
+            jobs = self.jobs
+            # Ties go to premium listings, then to the newest.
+            scored.sort(key=lambda item: (-item[1], not jobs[item[0]].premium,
+                                          -jobs[item[0]].posted_at, item[0]))
+            return scored[:limit]
+
+
+_search: Optional[JobSearch] = None
+_search_lock = threading.Lock()
+
+
+def get_job_search() -> JobSearch:
+    global _search
+    with _search_lock:
+        if _search is None:
+            # A cache hit shouldn't cost a database round trip; new
+            # postings show up within a second.
+            _search = JobSearch(get_job_store(), sync_interval=1.0)
+        return _search
@@ -0,0 +1,144 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import astuple, dataclass, fields
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from components.application_log import DATA_DIR
+
+JOBS_PATH = DATA_DIR / "jobs" / "jobs.sqlite3"
+
+
+@dataclass
+class JobListing:
+    job_id: str
+    title: str
+    company: str
+    location: str
+    description: str = ""
+    salary: str = ""
+    premium: bool = False
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+    posted_at: float = 0.0
+    status: str = "open"  # "open" or "closed"
+
+
+_COLUMNS = [f.name for f in fields(JobListing)]
+
+
+class JobStore:
+    """Published job postings, shared by every worker process.
+
+    Every write stamps its row with the next store revision, so an
+    in-memory index catches up with ``changes_since(revision)`` instead
+    of reloading every posting.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as db:
+            db.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    title TEXT NOT NULL,
+                    company TEXT NOT NULL,
+                    location TEXT NOT NULL,
+                    description TEXT NOT NULL,
+                    salary TEXT NOT NULL,
+                    premium INTEGER NOT NULL,
+                    lat REAL,
+                    lon REAL,
+                    posted_at REAL NOT NULL,
+                    status TEXT NOT NULL,
+                    revision INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS jobs_revision ON jobs (revision);
+                CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+                INSERT OR IGNORE INTO meta (key, value) VALUES ('revision', 0);
+            """)
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            yield db
+        finally:
+            db.close()
+
+    @staticmethod
+    def _row(row) -> JobListing:
+        listing = JobListing(*row)
+        listing.premium = bool(listing.premium)
+        return listing
+
+    @staticmethod
+    def _next_revision(db: sqlite3.Connection) -> int:
+        return db.execute(
+            "UPDATE meta SET value = value + 1 WHERE key = 'revision' RETURNING value"
+        ).fetchone()[0]
+
+    def publish(self, listing: JobListing) -> int:
+        """Insert or replace a posting; returns the revision that wrote it"""
+        if not listing.posted_at:
+            listing.posted_at = time.time()
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            revision = self._next_revision(db)
+            db.execute(
+                f"INSERT OR REPLACE INTO jobs ({', '.join(_COLUMNS)}, revision) "
+                f"VALUES ({', '.join('?' * len(_COLUMNS))}, ?)",
+                (*astuple(listing), revision),
+            )
+            db.execute("COMMIT")
+        return revision
+
+    def close(self, job_id: str) -> bool:
+        """Take a posting out of search; False if it wasn't open"""
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            revision = self._next_revision(db)
+            closed = db.execute(
+                "UPDATE jobs SET status = 'closed', revision = ? WHERE job_id = ? AND status = 'open'",
+                (revision, job_id),
+            ).rowcount
+            db.execute("COMMIT" if closed else "ROLLBACK")
+        return bool(closed)
+
+    def get(self, job_id: str) -> Optional[JobListing]:
+        with self._connect() as db:
+            row = db.execute(f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE job_id = ?",
+                             (job_id,)).fetchone()
+        return self._row(row) if row else None
+
+    def revision(self) -> int:
+        with self._connect() as db:
+            return db.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()[0]
+
+    def changes_since(self, revision: int) -> Tuple[int, List[JobListing]]:
+        """The store's revision and every posting written after ``revision``, open or closed"""
+        with self._connect() as db:
+            current = db.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()[0]
+            if current == revision:
+                return current, []
+            rows = db.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE revision > ? AND revision <= ? "
+                "ORDER BY revision", (revision, current),
+            ).fetchall()
+        return current, [self._row(row) for row in rows]
+
+
+_store: Optional[JobStore] = None
+_store_lock = threading.Lock()
+
+
+def get_job_store() -> JobStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = JobStore(JOBS_PATH)
+        return _store
@@ -0,0 +1,426 @@
+import asyncio
+import json
+import os
+import queue
+import smtplib
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from email.message import EmailMessage
+from functools import lru_cache
+from pathlib import Path
+from string import Template
+from typing import Dict, List, Optional, Tuple
+
+from components.application_log import DATA_DIR
+
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "templates" / "email"
+
+
+@dataclass
+class Notification:
+    id: int
+    recipient: str
+    template: str
+    context: Dict[str, str]
+    attempts: int
+
+    @property
+    def domain(self) -> str:
+        return self.recipient.rsplit("@", 1)[-1].lower()
+
+
+@lru_cache(maxsize=64)
+def _load_template(name: str) -> Tuple[Template, Template]:
+    """Parse a template once per process: first line is the subject"""
+    subject, _, body = (TEMPLATE_DIR / f"{name}.txt").read_text(encoding="utf-8").partition("\n")
+    return Template(subject.strip()), Template(body.lstrip("\n"))
+
+
+def render_template(name: str, context: Dict[str, str]) -> Tuple[str, str]:
+    subject, body = _load_template(name)
+    return subject.safe_substitute(context), body.safe_substitute(context)
+
+
+class NotificationQueue:
+    """Durable outbox in SQLite; survives restarts and is shared by workers.
+
+    Rows move pending -> sending -> sent, or to ``dead`` once retries are
+    exhausted. A claimed batch that is never acknowledged (the sender
+    crashed) becomes claimable again after ``lease_seconds``.
+    """
+
+    def __init__(self, path: Path, lease_seconds: float = 300.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = lease_seconds
+        with self._connect() as db:
+            db.executescript("""
+                CREATE TABLE IF NOT EXISTS outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    recipient TEXT NOT NULL,
+                    template TEXT NOT NULL,
+                    context TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    available_at REAL NOT NULL,
+                    last_error TEXT,
+                    created_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, available_at);
+            """)
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            yield db
+        finally:
+            db.close()
+
+    def enqueue(self, recipient: str, template: str, context: Dict[str, str]) -> int:
+        return self.enqueue_many([(recipient, template, context)])[0]
+
+    def enqueue_many(self, items: List[Tuple[str, str, Dict[str, str]]]) -> List[int]:
+        now = time.time()
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            ids = [
+                db.execute(
+                    "INSERT INTO outbox (recipient, template, context, available_at, created_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (recipient, template, json.dumps(context), now, now),
+                ).lastrowid
+                for recipient, template, context in items
+            ]
+            db.execute("COMMIT")
+        return ids
+
+    def claim(self, limit: int) -> List[Notification]:
+        now = time.time()
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            rows = db.execute(
+                "UPDATE outbox SET status = 'sending', available_at = ? "
+                "WHERE id IN (SELECT id FROM outbox WHERE status IN ('pending', 'sending') "
+                "AND available_at <= ? ORDER BY available_at LIMIT ?) "
+                "RETURNING id, recipient, template, context, attempts",
+                (now + self.lease_seconds, now, limit),
+            ).fetchall()
+            db.execute("COMMIT")
+        return [Notification(id, recipient, template, json.loads(context), attempts)
+                for id, recipient, template, context, attempts in rows]
+
+    def mark_sent(self, ids: List[int]):
+        if ids:
+            with self._connect() as db:
+                db.executemany("UPDATE outbox SET status = 'sent' WHERE id = ?", [(i,) for i in ids])
+
+    def defer(self, ids: List[int], delay: float):
+        """Put rows back without counting an attempt, e.g. when rate limited"""
+        if ids:
+            with self._connect() as db:
+                db.executemany(
+                    "UPDATE outbox SET status = 'pending', available_at = ? WHERE id = ?",
+                    [(time.time() + delay, i) for i in ids],
+                )
+
+    def fail(self, notification: Notification, error: str, retry_in: Optional[float]):
+        """Record a failed attempt; ``retry_in=None`` dead-letters the row"""
+        with self._connect() as db:
+            db.execute(
+                "UPDATE outbox SET status = ?, attempts = attempts + 1, available_at = ?, "
+                "last_error = ? WHERE id = ?",
+                ("dead" if retry_in is None else "pending",
+                 time.time() + (retry_in or 0), error, notification.id),
+            )
+
+    def dead_letters(self, limit: int = 100) -> List[Tuple[int, str, str, str]]:
+        with self._connect() as db:
+            return db.execute(
+                "SELECT id, recipient, template, last_error FROM outbox "
+                "WHERE status = 'dead' ORDER BY id DESC LIMIT ?", (limit,)
+            ).fetchall()
+
+    def requeue_dead(self, ids: List[int]):
+        with self._connect() as db:
+            db.executemany(
+                "UPDATE outbox SET status = 'pending', attempts = 0, available_at = ? WHERE id = ?",
+                [(time.time(), i) for i in ids],
+            )
+
+    def counts(self) -> Dict[str, int]:
+        with self._connect() as db:
+            return dict(db.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+
+
+class SMTPPool:
+    """Reuses authenticated SMTP connections across sends and batches.
+
+    Servers drop sessions that sit idle (the dispatcher only runs once a
+    minute), so a connection idle for more than ``check_after`` seconds is
+    probed with NOOP before reuse and replaced if it has gone away.
+    """
+
+    def __init__(self, host: str, port: int, size: int = 4, username: Optional[str] = None,
+                 password: Optional[str] = None, use_tls: bool = False, timeout: float = 30.0,
+                 check_after: float = 10.0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.size = size
+        self.check_after = check_after
+        self._idle: "queue.LifoQueue[Tuple[smtplib.SMTP, float]]" = queue.LifoQueue()
+
+    def _open(self) -> smtplib.SMTP:
+        connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            connection.starttls()
+        if self.username:
+            connection.login(self.username, self.password or "")
+        return connection
+
+    def _alive(self, connection: smtplib.SMTP) -> bool:
+        try:
+            return connection.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def _acquire(self) -> smtplib.SMTP:
+        while True:
+            try:
+                connection, idle_since = self._idle.get_nowait()
+            except queue.Empty:
+                return self._open()
+            if time.monotonic() - idle_since <= self.check_after or self._alive(connection):
+                return connection
+            connection.close()
+
+    @contextmanager
+    def connection(self):
+        connection = self._acquire()
+        try:
+            yield connection
+        except smtplib.SMTPServerDisconnected:
+            connection.close()
+            raise
+        except smtplib.SMTPException:
+            # The session is still usable after e.g. a refused recipient.
+            self._release(connection)
+            raise
+        except OSError:
+            connection.close()
+            raise
+        else:
+            self._release(connection)
+
+    def _release(self, connection: smtplib.SMTP):
+        if self._idle.qsize() < self.size:
+            self._idle.put((connection, time.monotonic()))
+        else:
+            connection.quit()
+
+    def close(self):
+        while not self._idle.empty():
+            try:
+                self._idle.get_nowait()[0].quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+
+
+class DomainRateLimiter:
+    """Token bucket per recipient domain, so one provider never throttles us"""
+
+    def __init__(self, per_minute: int = 120, overrides: Optional[Dict[str, int]] = None):
+        self.per_minute = per_minute
+        self.overrides = overrides or {}
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, domain: str) -> bool:
+        rate = self.overrides.get(domain, self.per_minute) / 60.0
+        capacity = max(1.0, rate * 60.0)
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(domain, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            if tokens < 1.0:
+                self._buckets[domain] = (tokens, now)
+                return False
+            self._buckets[domain] = (tokens - 1.0, now)
+            return True
+
+
+class NotificationDispatcher:
+    """Drains the outbox in batches over pooled SMTP connections.
+
+    Each batch is split by recipient domain and the domains are sent in
+    parallel, one pooled connection each. Transient failures retry with
+    exponential backoff; permanent rejections and rows that exhaust
+    ``max_attempts`` are dead-lettered.
+    """
+
+    def __init__(self, outbox: NotificationQueue, pool: SMTPPool, sender: str,
+                 limiter: Optional[DomainRateLimiter] = None, max_attempts: int = 5,
+                 base_backoff: float = 30.0):
+        self.outbox = outbox
+        self.pool = pool
+        self.sender = sender
+        self.limiter = limiter or DomainRateLimiter()
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self._executor = ThreadPoolExecutor(max_workers=pool.size, thread_name_prefix="smtp-send")
+
+    def _build(self, notification: Notification) -> EmailMessage:
+        subject, body = render_template(notification.template, notification.context)
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = notification.recipient
+        message["Subject"] = subject
+        message.set_content(body)
+        return message
+
+    def _send_domain(self, notifications: List[Notification]) -> List[int]:
+        """Send one domain's share and mark what went out, whatever happens to the rest"""
+        sent, deferred = [], []
+        try:
+            for index, notification in enumerate(notifications):
+                if not self.limiter.acquire(notification.domain):
+                    deferred = notifications[index:]
+                    break
+                try:
+                    message = self._build(notification)
+                    with self.pool.connection() as connection:
+                        connection.send_message(message)
+                    sent.append(notification.id)
+                except (smtplib.SMTPRecipientsRefused, FileNotFoundError) as e:
+                    self.outbox.fail(notification, f"{type(e).__name__}: {e}", retry_in=None)
+                except (smtplib.SMTPException, OSError) as e:
+                    attempts = notification.attempts + 1
+                    retry_in = None if attempts >= self.max_attempts else self.base_backoff * 2 ** (attempts - 1)
+                    self.outbox.fail(notification, f"{type(e).__name__}: {e}", retry_in)
+                except Exception as e:
+                    # A message that can't be built or encoded (a bad header) never will be.
+                    self.outbox.fail(notification, f"{type(e).__name__}: {e}", retry_in=None)
+        finally:
+            self.outbox.mark_sent(sent)
+        self.outbox.defer([n.id for n in deferred], delay=60.0)
+        return sent
+
+    def dispatch_batch(self, batch_size: int = 200) -> int:
+        """Send one batch; returns the number of messages delivered"""
+        by_domain: Dict[str, List[Notification]] = {}
+        for notification in self.outbox.claim(batch_size):
+            by_domain.setdefault(notification.domain, []).append(notification)
+        return sum(len(ids) for ids in self._executor.map(self._send_domain, by_domain.values()))
+
+    def drain(self, batch_size: int = 200, max_batches: int = 50) -> int:
+        total = 0
+        for _ in range(max_batches):
+            sent = self.dispatch_batch(batch_size)
+            total += sent
+            if sent == 0:
+                break
+        return total
+
+
+class DebugSMTPServer:
+    """Tiny SMTP sink for local development and tests.
+
+    Accepts every message and keeps it in ``messages`` (and prints a
+    summary), so the pipeline can run end to end without a real relay:
+
+        python -m components.notifications --debug-server
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 1025, verbose: bool = True):
+        self.host = host
+        self.port = port
+        self.verbose = verbose
+        self.messages: List[Tuple[str, List[str], bytes]] = []
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        def reply(line: str):
+            writer.write(f"{line}\r\n".encode())
+
+        reply("220 jobgenie-debug ESMTP")
+        sender, recipients = "", []
+        while line := await reader.readline():
+            command = line.decode(errors="replace").strip()
+            verb = command[:4].upper()
+            if verb in ("HELO", "EHLO"):
+                reply("250 jobgenie-debug")
+            elif verb == "MAIL":
+                sender, recipients = command[10:].strip("<> "), []
+                reply("250 OK")
+            elif verb == "RCPT":
+                recipients.append(command[8:].strip("<> "))
+                reply("250 OK")
+            elif verb == "DATA":
+                reply("354 End data with <CR><LF>.<CR><LF>")
+                await writer.drain()
+                data = await reader.readuntil(b"\r\n.\r\n")
+                self.messages.append((sender, recipients, data[:-5]))
+                if self.verbose:
+                    print(f"[debug smtp] {sender} -> {', '.join(recipients)} ({len(data)} bytes)")
+                reply("250 OK")
+            elif verb == "QUIT":
+                reply("221 Bye")
+                await writer.drain()
+                break
+            else:
+                reply("250 OK")
+            await writer.drain()
+        writer.close()
+
+    async def serve_forever(self):
+        server = await asyncio.start_server(self._handle, self.host, self.port)
+        async with server:
+            await server.serve_forever()
+
+
+_outbox: Optional[NotificationQueue] = None
+_dispatcher: Optional[NotificationDispatcher] = None
+
+
+def get_outbox() -> NotificationQueue:
+    global _outbox
+    if _outbox is None:
+        _outbox = NotificationQueue(DATA_DIR / "notifications" / "outbox.sqlite3")
+    return _outbox
+
+
+def get_dispatcher() -> NotificationDispatcher:
+    """SMTP settings come from ``JOBGENIE_SMTP_*``; defaults target the debug server"""
+    global _dispatcher
+    if _dispatcher is None:
+        pool = SMTPPool(
+            os.getenv("JOBGENIE_SMTP_HOST", "127.0.0.1"),
+            int(os.getenv("JOBGENIE_SMTP_PORT", "1025")),
+            username=os.getenv("JOBGENIE_SMTP_USER"),
+            password=os.getenv("JOBGENIE_SMTP_PASSWORD"),
+            use_tls=os.getenv("JOBGENIE_SMTP_TLS") == "1",
+        )
+        sender = os.getenv("JOBGENIE_MAIL_FROM", "JobGenie Pro <no-reply@jobgenie.local>")
+        _dispatcher = NotificationDispatcher(get_outbox(), pool, sender)
+    return _dispatcher
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Outbound notification tools")
+    parser.add_argument("--debug-server", action="store_true", help="run the local SMTP sink")
+    parser.add_argument("--port", type=int, default=1025)
+    args = parser.parse_args()
+    if args.debug_server:
+        asyncio.run(DebugSMTPServer(port=args.port).serve_forever())
+    else:
+        print(f"Delivered {get_dispatcher().drain()} notifications")
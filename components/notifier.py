@@ -0,0 +1,160 @@
+import argparse
+import asyncio
+import json
+import os
+import threading
+import weakref
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class Subscription:
+    """Pending changes for one session, coalesced by row key.
+
+    Publishers only ever touch this object; the session collects the rows
+    on its own schedule with ``drain()``. Several updates to the same
+    application before a drain collapse into the latest one.
+    """
+
+    def __init__(self, topic: str):
+        self.topic = topic
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _push(self, row: Dict[str, Any]):
+        with self._lock:
+            self._pending[row["key"]] = row
+
+    def has_pending(self) -> bool:
+        return bool(self._pending)
+
+    def drain(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows, self._pending = list(self._pending.values()), {}
+        return rows
+
+
+class StatusNotifier:
+    """Pub/sub broker for per-user status changes.
+
+    Dispatch runs on a private asyncio loop in a daemon thread, so
+    ``publish()`` returns immediately from any thread. Subscriptions are
+    held weakly: when a Streamlit session goes away, so does its
+    subscription. With ``broker_address`` set, publishes are also relayed
+    through a ``BrokerServer`` so every worker process sees them.
+    """
+
+    def __init__(self, broker_address: Optional[Tuple[str, int]] = None):
+        self.broker_address = broker_address
+        self._topics: Dict[str, "weakref.WeakSet[Subscription]"] = {}
+        self._loop = asyncio.new_event_loop()
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._origin = f"{os.getpid()}-{id(self)}"
+        threading.Thread(target=self._run, name="status-notifier", daemon=True).start()
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        if self.broker_address is not None:
+            self._loop.create_task(self._bridge())
+        self._loop.run_forever()
+
+    def subscribe(self, topic: str) -> Subscription:
+        """Subscribe and return once it is live, so nothing published afterwards is missed"""
+        subscription = Subscription(topic)
+        added = threading.Event()
+        self._loop.call_soon_threadsafe(self._add, subscription, added)
+        added.wait(5.0)
+        return subscription
+
+    def _add(self, subscription: Subscription, added: threading.Event):
+        self._topics.setdefault(subscription.topic, weakref.WeakSet()).add(subscription)
+        added.set()
+
+    def publish(self, topic: str, key: str, **fields):
+        row = dict(fields, key=key)
+        self._loop.call_soon_threadsafe(self._dispatch, topic, row, True)
+
+    def _dispatch(self, topic: str, row: Dict[str, Any], relay: bool):
+        for subscription in list(self._topics.get(topic, ())):
+            subscription._push(row)
+        if relay and self._writer is not None:
+            message = {"origin": self._origin, "topic": topic, "row": row}
+            self._writer.write(json.dumps(message).encode() + b"\n")
+
+    async def _bridge(self):
+        host, port = self.broker_address
+        while True:
+            try:
+                reader, self._writer = await asyncio.open_connection(host, port)
+                while line := await reader.readline():
+                    try:
+                        message = json.loads(line)
+                        origin, topic, row = message["origin"], message["topic"], message["row"]
+                        if not isinstance(row, dict) or "key" not in row:
+                            raise ValueError("row has no key")
+                    except (ValueError, KeyError, TypeError) as e:
+                        # One bad publisher mustn't stop every later push.
+                        print(f"Skipping malformed broker message {line[:200]!r}: {e}")
+                        continue
+                    if origin != self._origin:
+                        self._dispatch(topic, row, relay=False)
+            except (ConnectionError, OSError):
+                pass
+            self._writer = None
+            await asyncio.sleep(1.0)
+
+
+class BrokerServer:
+    """Local stand-in for a message broker: relays every line to every client"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765):
+        self.host = host
+        self.port = port
+        self._clients: "set[asyncio.StreamWriter]" = set()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._clients.add(writer)
+        try:
+            while line := await reader.readline():
+                for client in list(self._clients):
+                    if client is not writer:
+                        client.write(line)
+        finally:
+            self._clients.discard(writer)
+            writer.close()
+
+    async def serve_forever(self):
+        server = await asyncio.start_server(self._handle, self.host, self.port)
+        async with server:
+            await server.serve_forever()
+
+
+_notifier: Optional[StatusNotifier] = None
+_notifier_lock = threading.Lock()
+
+
+def get_notifier() -> StatusNotifier:
+    """Process-wide notifier; ``JOBGENIE_BROKER=host:port`` enables cross-process relay"""
+    global _notifier
+    with _notifier_lock:
+        if _notifier is None:
+            address = os.getenv("JOBGENIE_BROKER")
+            if address:
+                host, port = address.rsplit(":", 1)
+                _notifier = StatusNotifier((host, int(port)))
+            else:
+                _notifier = StatusNotifier()
+        return _notifier
+
+
+def publish_application_status(user_id: str, application_id: str, status: str, timestamp: float):
+    """Push one changed application row to the sessions watching ``user_id``"""
+    get_notifier().publish(f"applications:{user_id}", application_id,
+                           status=status, timestamp=timestamp)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the local notification broker")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    asyncio.run(BrokerServer(args.host, args.port).serve_forever())
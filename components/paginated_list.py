@@ -0,0 +1,102 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import streamlit as st
+
+from components.pagination import FetchPage, KeysetPaginator, Page  # noqa: F401
+
+# Prefetches run off the script thread so the current page renders first.
+_prefetch_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="list-prefetch")
+
+
+@dataclass
+class _ListState:
+    cursors: List[Optional[Any]] = field(default_factory=lambda: [None])
+    page_index: int = 0
+    pages: Dict[int, Page] = field(default_factory=dict)
+    prefetch: Optional[Future] = None
+
+
+class PaginatedList:
+    """Paged list that only ever sends the visible page to the browser.
+
+    All cards on a page are joined into one ``st.markdown`` call, so a page
+    costs a single delta however many items it holds. While the user reads
+    it, the next page is fetched in the background.
+    """
+
+    def __init__(self, key: str, fetch_page: FetchPage,
+                 render_item: Callable[[Any], str], page_size: int = 20,
+                 empty_message: str = "Nothing to show yet."):
+        self.key = key
+        self.fetch_page = fetch_page
+        self.render_item = render_item
+        self.page_size = page_size
+        self.empty_message = empty_message
+
+    @property
+    def state(self) -> _ListState:
+        state_key = f"{self.key}_list_state"
+        if state_key not in st.session_state:
+            st.session_state[state_key] = _ListState()
+        return st.session_state[state_key]
+
+    def reset(self):
+        """Go back to the first page, e.g. after the filters changed"""
+        st.session_state.pop(f"{self.key}_list_state", None)
+
+    def _load(self, state: _ListState, index: int) -> Page:
+        if index in state.pages:
+            return state.pages[index]
+        prefetched = state.prefetch
+        if prefetched is not None and getattr(prefetched, "page_index", None) == index:
+            page = prefetched.result()
+        else:
+            page = self.fetch_page(state.cursors[index], self.page_size)
+        # Only the visible page and its neighbours are kept in the session.
+        state.pages = {i: p for i, p in state.pages.items() if abs(i - index) <= 1}
+        state.pages[index] = page
+        return page
+
+    def _prefetch_next(self, state: _ListState, page: Page):
+        next_index = state.page_index + 1
+        if page.next_cursor is None or next_index in state.pages:
+            return
+        if state.prefetch is not None and getattr(state.prefetch, "page_index", None) == next_index:
+            return
+        future = _prefetch_pool.submit(self.fetch_page, page.next_cursor, self.page_size)
+        future.page_index = next_index
+        state.prefetch = future
+
+    def render(self):
+        state = self.state
+        page = self._load(state, state.page_index)
+
+        if not page.items and state.page_index == 0:
+            st.info(self.empty_message)
+            return
+
+        st.markdown(
+            "\n".join(self.render_item(item) for item in page.items),
+            unsafe_allow_html=True
+        )
+
+        if page.next_cursor is not None and len(state.cursors) == state.page_index + 1:
+            state.cursors.append(page.next_cursor)
+        self._prefetch_next(state, page)
+
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            if st.button("← Previous", key=f"{self.key}_prev", disabled=state.page_index == 0):
+                state.page_index -= 1
+                st.rerun()
+        with col2:
+            st.markdown(
+                f'<div style="text-align: center; color: #666;">Page {state.page_index + 1}</div>',
+                unsafe_allow_html=True
+            )
+        with col3:
+            if st.button("Next →", key=f"{self.key}_next", disabled=page.next_cursor is None):
+                state.page_index += 1
+                st.rerun()
@@ -0,0 +1,44 @@
+import bisect
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Sequence
+
+
+@dataclass
+class Page:
+    items: List[Any]
+    next_cursor: Optional[Any] = None
+
+
+# fetch_page(cursor, limit) -> Page. ``cursor`` is None for the first page
+# and otherwise the keyset (e.g. ``(posted_at, job_id)``) of the last item
+# already shown, so the backing query is ``WHERE key > cursor ORDER BY key
+# LIMIT n`` and never pays for an OFFSET scan.
+FetchPage = Callable[[Optional[Any], int], Page]
+
+
+class KeysetPaginator:
+    """Keyset pagination over an in-memory sequence sorted by ``key``.
+
+    A cursor only identifies a row if keys are unique, so rows sharing a
+    ``key`` (two postings from the same second) need a ``tiebreaker``,
+    e.g. the job id; the cursor is then the ``(key, tiebreaker)`` pair.
+    Rows out of order or with a repeated keyset raise ``ValueError``
+    rather than silently skipping or repeating rows between pages.
+    """
+
+    def __init__(self, rows: Sequence[Any], key: Callable[[Any], Any],
+                 tiebreaker: Optional[Callable[[Any], Any]] = None):
+        self.rows = rows
+        self.key = key if tiebreaker is None else (lambda row: (key(row), tiebreaker(row)))
+        self._keys = [self.key(row) for row in rows]
+        for i in range(1, len(self._keys)):
+            if not self._keys[i - 1] < self._keys[i]:
+                problem = "repeats" if self._keys[i - 1] == self._keys[i] else "is out of order"
+                raise ValueError(f"row {i}'s keyset {self._keys[i]!r} {problem}; rows must be "
+                                 "sorted by a unique key (add a tiebreaker)")
+
+    def __call__(self, cursor: Optional[Any], limit: int) -> Page:
+        start = 0 if cursor is None else bisect.bisect_right(self._keys, cursor)
+        items = list(self.rows[start:start + limit])
+        has_more = start + limit < len(self.rows)
+        return Page(items, self.key(items[-1]) if items and has_more else None)
@@ -0,0 +1,36 @@
+from typing import Optional
+
+from components.geo import get_gazetteer
+from components.jobs import JobListing, get_job_store
+from components.moderation import JobPosting, ModerationResult, get_moderator
+from components.salary import get_salary_index
+
+
+def publish_posting(posting: JobPosting, premium: bool = False) -> JobListing:
+    """Make an accepted posting searchable (on the map if its location is known) and count its pay"""
+    place = get_gazetteer().geocode(posting.location) if posting.location else None
+    listing = JobListing(
+        posting.posting_id, posting.title, posting.company, posting.location,
+        description=posting.description, salary=posting.salary, premium=premium,
+        lat=place.lat if place else None, lon=place.lon if place else None,
+    )
+    get_job_store().publish(listing)
+    # Live in this worker now; the scheduled rebuild shares it with the rest.
+    get_salary_index().add(listing.title, listing.location, listing.salary)
+    return listing
+
+
+def submit_posting(posting: JobPosting) -> ModerationResult:
+    """Screen an employer's posting; approved ones go live, borderline ones wait for review"""
+    result = get_moderator().moderate(posting)
+    if result.decision == "approve":
+        publish_posting(posting)
+    return result
+
+
+def review_posting(posting_id: str, approved: bool, reviewer: str) -> Optional[JobPosting]:
+    """Record a reviewer's decision, publishing the posting if it was approved"""
+    posting = get_moderator().queue.decide(posting_id, approved, reviewer)
+    if posting is not None and approved:
+        publish_posting(posting)
+    return posting
@@ -0,0 +1,169 @@
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# numpy is an optional dependency: only recruiter-side ranking needs it,
+# and no page imports this module, so job seekers never load it.
+import numpy as np
+
+# "Priority Applications": paid plans float up the recruiter's list.
+PLAN_BOOSTS = {"basic": 0.0, "premium_monthly": 0.10, "pro_monthly": 0.15}
+_PLAN_CODES = {plan: code for code, plan in enumerate(PLAN_BOOSTS)}
+_BOOST_BY_CODE = np.array(list(PLAN_BOOSTS.values()), dtype=np.float32)
+
+
+def _popcount_rows(words: np.ndarray) -> np.ndarray:
+    """Number of set bits per row of a 2-D uint64 array"""
+    if hasattr(np, "bitwise_count"):  # NumPy >= 2.0
+        return np.bitwise_count(words).sum(axis=1, dtype=np.int32)
+    return np.unpackbits(np.ascontiguousarray(words).view(np.uint8), axis=1).sum(axis=1, dtype=np.int32)
+
+
+class ApplicantStore:
+    """Column-oriented applicant attributes for vectorized scoring.
+
+    Skills are bitsets (one bit per skill in a shared vocabulary), so skill
+    overlap with a posting is an AND plus a popcount per row. Columns grow
+    by doubling, so appends are amortised O(1).
+    """
+
+    def __init__(self, capacity: int = 1024, skill_words: int = 4):
+        self.size = 0
+        self.ids: List[str] = []
+        self.row_of: Dict[str, int] = {}
+        self.skill_index: Dict[str, int] = {}
+        self.skills = np.zeros((capacity, skill_words), dtype=np.uint64)
+        self.experience = np.zeros(capacity, dtype=np.float32)
+        self.plan_codes = np.zeros(capacity, dtype=np.int8)
+
+    def _skill_bit(self, skill: str) -> int:
+        key = skill.strip().casefold()
+        if key not in self.skill_index:
+            self.skill_index[key] = len(self.skill_index)
+            needed_words = (len(self.skill_index) + 63) // 64
+            if needed_words > self.skills.shape[1]:
+                widened = np.zeros((self.skills.shape[0], needed_words * 2), dtype=np.uint64)
+                widened[:, :self.skills.shape[1]] = self.skills
+                self.skills = widened
+        return self.skill_index[key]
+
+    def skill_mask(self, skills: Iterable[str], learn: bool = False) -> np.ndarray:
+        """Bitset of ``skills``; unknown skills are skipped unless ``learn`` adds them to the vocabulary"""
+        if learn:
+            bits = [self._skill_bit(skill) for skill in skills]
+        else:
+            known = (self.skill_index.get(skill.strip().casefold()) for skill in skills)
+            bits = [bit for bit in known if bit is not None]
+        mask = np.zeros(self.skills.shape[1], dtype=np.uint64)
+        for bit in bits:
+            mask[bit // 64] |= np.uint64(1) << np.uint64(bit % 64)
+        return mask
+
+    def _grow(self):
+        capacity = self.skills.shape[0] * 2
+        self.skills = np.resize(self.skills, (capacity, self.skills.shape[1]))
+        self.skills[self.size:] = 0
+        self.experience = np.resize(self.experience, capacity)
+        self.plan_codes = np.resize(self.plan_codes, capacity)
+
+    def upsert(self, applicant_id: str, skills: Iterable[str], years_experience: float,
+               plan_id: str = "basic") -> int:
+        """Insert or update an applicant; returns its row"""
+        mask = self.skill_mask(skills, learn=True)
+        row = self.row_of.get(applicant_id)
+        if row is None:
+            if self.size == self.skills.shape[0]:
+                self._grow()
+            row = self.size
+            self.size += 1
+            self.ids.append(applicant_id)
+            self.row_of[applicant_id] = row
+        self.skills[row, :] = 0
+        self.skills[row, :mask.shape[0]] = mask
+        self.experience[row] = years_experience
+        self.plan_codes[row] = _PLAN_CODES.get(plan_id, 0)
+        return row
+
+
+@dataclass
+class JobRequirements:
+    skills: List[str]
+    min_years: float = 0.0
+    max_years: Optional[float] = None
+
+
+@dataclass
+class RankingWeights:
+    skill: float = 0.6
+    experience: float = 0.4
+    plan_boost: float = 1.0
+
+
+@dataclass
+class PostingRanking:
+    """All applicants to one posting, kept sorted by score.
+
+    ``rank_all()`` scores every applicant in one vectorized pass. After
+    that, ``add()`` scores only the newcomer and splices it into place
+    with a binary search instead of re-ranking the whole list; adding an
+    applicant who is already ranked moves their row instead.
+    """
+
+    store: ApplicantStore
+    job: JobRequirements
+    weights: RankingWeights = field(default_factory=RankingWeights)
+    rows: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+    scores: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.float32))
+    ranked: Dict[str, int] = field(default_factory=dict)  # applicant id -> store row
+
+    def score_rows(self, rows: np.ndarray) -> np.ndarray:
+        store = self.store
+        # A skill no applicant has can't overlap; it still counts as required.
+        job_mask = store.skill_mask(self.job.skills)
+        required = max(1, len({s.strip().casefold() for s in self.job.skills}))
+        skill_words = store.skills[rows, :job_mask.shape[0]]
+        overlap = _popcount_rows(skill_words & job_mask) / np.float32(required)
+
+        years = store.experience[rows]
+        shortfall = np.maximum(self.job.min_years - years, 0)
+        experience = np.exp(-shortfall / 2.0)
+        if self.job.max_years is not None:
+            surplus = np.maximum(years - self.job.max_years, 0)
+            experience *= np.clip(1.0 - 0.05 * surplus, 0.5, 1.0)
+
+        boost = _BOOST_BY_CODE[store.plan_codes[rows]]
+        return (self.weights.skill * overlap
+                + self.weights.experience * experience
+                + self.weights.plan_boost * boost).astype(np.float32)
+
+    def rank_all(self, applicant_ids: Iterable[str]):
+        self.ranked = {a: self.store.row_of[a] for a in applicant_ids}
+        rows = np.fromiter(self.ranked.values(), dtype=np.int64, count=len(self.ranked))
+        scores = self.score_rows(rows)
+        order = np.argsort(-scores, kind="stable")
+        self.rows, self.scores = rows[order], scores[order]
+
+    def add(self, applicant_id: str) -> int:
+        """Score one new applicant and insert it; returns its 0-based rank"""
+        if applicant_id in self.ranked:
+            return self.rescore(applicant_id)
+        row = self.store.row_of[applicant_id]
+        self.ranked[applicant_id] = row
+        score = self.score_rows(np.array([row], dtype=np.int64))[0]
+        # scores are descending, so search the negated (ascending) view;
+        # "right" keeps earlier applicants ahead on ties.
+        position = int(np.searchsorted(-self.scores, -score, side="right"))
+        self.rows = np.insert(self.rows, position, row)
+        self.scores = np.insert(self.scores, position, score)
+        return position
+
+    def rescore(self, applicant_id: str) -> int:
+        """Re-rank one applicant whose profile or plan changed"""
+        row = self.ranked.pop(applicant_id, None)
+        if row is not None:
+            keep = self.rows != row
+            self.rows, self.scores = self.rows[keep], self.scores[keep]
+        return self.add(applicant_id)
+
+    def top(self, k: int = 50) -> List[Tuple[str, float]]:
+        ids = self.store.ids
+        return [(ids[row], float(score)) for row, score in zip(self.rows[:k], self.scores[:k])]
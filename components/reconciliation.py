@@ -0,0 +1,375 @@
+import argparse
+import csv
+import glob
+import json
+import math
+import os
+import tempfile
+import zlib
+from collections import Counter
+from dataclasses import dataclass, asdict
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from components.activations import ACTIVATIONS_PATH
+
+# Currencies whose Stripe amounts have no minor unit.
+_ZERO_DECIMAL = {"bif", "clp", "djf", "gnf", "jpy", "kmf", "krw", "mga", "pyg",
+                 "rwf", "ugx", "vnd", "vuv", "xaf", "xof", "xpf"}
+
+# Column names used by Stripe's dashboard CSV exports for the same field.
+_CSV_COLUMNS = {
+    "id": ("id", "Charge ID", "charge_id"),
+    "reference": ("reference (metadata)", "Metadata: reference", "metadata.reference", "reference"),
+    "amount": ("Amount", "amount", "Gross"),
+    "currency": ("Currency", "currency"),
+    "status": ("Status", "status"),
+    "refunded": ("Amount Refunded", "amount_refunded", "Refunded Amount"),
+    "created": ("Created (UTC)", "created", "Created date (UTC)"),
+}
+
+_SUCCEEDED = {"succeeded", "paid", "available", "pending"}
+
+
+@dataclass
+class StripeCharge:
+    id: str
+    reference: str
+    amount_minor: int
+    currency: str
+    status: str
+    refunded_minor: int = 0
+    created: str = ""
+
+
+@dataclass
+class Mismatch:
+    kind: str
+    reference: str
+    charge_id: str = ""
+    plan_id: str = ""
+    expected_minor: Optional[int] = None
+    charged_minor: Optional[int] = None
+    detail: str = ""
+
+
+def _minor_units(value: str, currency: str) -> int:
+    """Dashboard CSVs show major units ("999.00"); convert to Stripe's minor units"""
+    try:
+        amount = Decimal(str(value).replace(",", "").strip() or "0")
+    except InvalidOperation:
+        return 0
+    factor = 1 if currency.lower() in _ZERO_DECIMAL else 100
+    return int((amount * factor).to_integral_value())
+
+
+def _pick(row: Dict[str, str], field: str) -> str:
+    for column in _CSV_COLUMNS[field]:
+        if column in row and row[column] not in (None, ""):
+            return row[column]
+    return ""
+
+
+def read_stripe_csv(path: Path) -> Iterator[StripeCharge]:
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            currency = _pick(row, "currency").lower()
+            yield StripeCharge(
+                id=_pick(row, "id"),
+                reference=_pick(row, "reference"),
+                amount_minor=_minor_units(_pick(row, "amount"), currency),
+                currency=currency,
+                status=_pick(row, "status").lower(),
+                refunded_minor=_minor_units(_pick(row, "refunded"), currency),
+                created=_pick(row, "created"),
+            )
+
+
+class _JSONValues:
+    """Top-level JSON values of a file, decoded a chunk at a time.
+
+    Handles JSON Lines and list responses alike: the elements of a
+    top-level array, or of the ``data`` array of a top-level object, are
+    yielded one by one as they are decoded, so memory holds one object
+    and one chunk however large the export is.
+    """
+
+    _WHITESPACE = " \t\r\n"
+
+    def __init__(self, f, name: str, chunk_chars: int = 1 << 20):
+        self.f = f
+        self.name = name
+        self.chunk_chars = chunk_chars
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.consumed = 0  # characters dropped from the front of the buffer
+        self.eof = False
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        if self.pos > self.chunk_chars:
+            self.consumed += self.pos
+            self.buffer, self.pos = self.buffer[self.pos:], 0
+        chunk = self.f.read(self.chunk_chars)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer += chunk
+        return True
+
+    def _error(self, message: str) -> ValueError:
+        return ValueError(f"{self.name}: {message} at character {self.consumed + self.pos}; "
+                          "expected JSON Lines or a JSON list of charges")
+
+    def _peek(self) -> str:
+        """Next non-whitespace character without consuming it, '' at the end"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in self._WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, chars: str) -> str:
+        char = self._peek()
+        if not char or char not in chars:
+            raise self._error(f"expected one of {chars!r}")
+        self.pos += 1
+        return char
+
+    def _value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise self._error("malformed or truncated JSON") from None
+            # A number at the end of the buffer may continue in the next chunk.
+            if end == len(self.buffer) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def _array(self) -> Iterator:
+        self._expect("[")
+        if self._peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self._value()
+            if self._expect(",]") == "]":
+                return
+
+    def _object(self) -> Iterator:
+        self._expect("{")
+        fields: Dict = {}
+        listed = False
+        if self._peek() == "}":
+            self.pos += 1
+            yield fields
+            return
+        while True:
+            if self._peek() != '"':
+                raise self._error("expected an object key")
+            key = self._value()
+            self._expect(":")
+            if key == "data" and self._peek() == "[":
+                listed = True
+                yield from self._array()
+            else:
+                fields[key] = self._value()
+            if self._expect(",}") == "}":
+                break
+        if not listed:
+            yield fields
+
+    def __iter__(self) -> Iterator[Dict]:
+        while True:
+            char = self._peek()
+            if not char:
+                return
+            if char == "[":
+                yield from self._array()
+            elif char == "{":
+                yield from self._object()
+            else:
+                raise self._error("expected an object or a list")
+
+
+def read_stripe_json(path: Path) -> Iterator[StripeCharge]:
+    """API objects (already in minor units), one per line or as a list response"""
+    with open(path, encoding="utf-8") as f:
+        for obj in _JSONValues(f, str(path)):
+            if not isinstance(obj, dict):
+                raise ValueError(f"{path}: expected charge objects, got {type(obj).__name__}")
+            yield StripeCharge(
+                id=obj.get("id", ""),
+                reference=(obj.get("metadata") or {}).get("reference", ""),
+                amount_minor=int(obj.get("amount", 0)),
+                currency=(obj.get("currency") or "").lower(),
+                status=(obj.get("status") or "").lower(),
+                refunded_minor=int(obj.get("amount_refunded", 0) or 0),
+                created=str(obj.get("created", "")),
+            )
+
+
+def read_stripe_exports(paths: Iterable[Path]) -> Iterator[StripeCharge]:
+    for path in paths:
+        path = Path(path)
+        reader = read_stripe_json if path.suffix in (".json", ".jsonl", ".ndjson") else read_stripe_csv
+        yield from reader(path)
+
+
+class _Partitions:
+    """Spill rows to ``count`` JSONL files by hash of their join key"""
+
+    def __init__(self, directory: Path, name: str, count: int):
+        self.paths = [directory / f"{name}-{i:04d}.jsonl" for i in range(count)]
+        self._files = [open(path, "w", encoding="utf-8", buffering=1 << 16) for path in self.paths]
+
+    def add(self, key: str, row: Dict):
+        index = zlib.crc32(key.encode()) % len(self._files)
+        self._files[index].write(json.dumps(row, separators=(",", ":")) + "\n")
+
+    def close(self):
+        for f in self._files:
+            f.close()
+
+    def read(self, index: int) -> Iterator[Dict]:
+        with open(self.paths[index], encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+
+class Reconciler:
+    """Grace hash join of Stripe charges against local plan activations.
+
+    Both inputs are streamed once into ``partitions`` spill files keyed by
+    checkout reference, then each partition pair is joined with an
+    in-memory hash table built on the activation side. Peak memory is one
+    activation partition, not the whole export, so millions of rows fit in
+    a fixed budget; pick ``partitions`` so that (activations / partitions)
+    comfortably fits in memory.
+    """
+
+    def __init__(self, partitions: int = 64, workdir: Optional[Path] = None):
+        self.partitions = max(1, partitions)
+        self.workdir = workdir
+
+    @staticmethod
+    def partitions_for(activation_bytes: int, memory_budget_bytes: int = 256 << 20) -> int:
+        # Parsed JSON rows take several times their on-disk size.
+        return max(1, math.ceil(activation_bytes * 8 / memory_budget_bytes))
+
+    def run(self, charges: Iterable[StripeCharge], activations: Iterable, report) -> Counter:
+        summary = Counter()
+        with tempfile.TemporaryDirectory(dir=self.workdir, prefix="reconcile-") as tmp:
+            build = _Partitions(Path(tmp), "activations", self.partitions)
+            probe = _Partitions(Path(tmp), "charges", self.partitions)
+            try:
+                for activation in activations:
+                    build.add(activation.reference, asdict(activation))
+                    summary["activations"] += 1
+                for charge in charges:
+                    if not charge.reference:
+                        summary["charges_without_reference"] += 1
+                        continue
+                    probe.add(charge.reference, asdict(charge))
+                    summary["charges"] += 1
+            finally:
+                build.close()
+                probe.close()
+
+            for index in range(self.partitions):
+                for mismatch in self._join_partition(build, probe, index, summary):
+                    summary[mismatch.kind] += 1
+                    report(mismatch)
+        return summary
+
+    def _join_partition(self, build: _Partitions, probe: _Partitions, index: int,
+                        summary: Counter) -> Iterator[Mismatch]:
+        activations: Dict[str, Dict] = {}
+        for row in build.read(index):
+            # A confirmation page reload can record the same reference twice.
+            activations.setdefault(row["reference"], row)
+
+        paid: Dict[str, List[Dict]] = {}
+        for charge in probe.read(index):
+            reference = charge["reference"]
+            activation = activations.get(reference)
+            succeeded = charge["status"] in _SUCCEEDED
+            if activation is None:
+                if succeeded:
+                    yield Mismatch("paid_not_activated", reference, charge["id"],
+                                   charged_minor=charge["amount_minor"])
+                continue
+            if not succeeded:
+                continue
+            paid.setdefault(reference, []).append(charge)
+
+        for reference, activation in activations.items():
+            charges = paid.get(reference, [])
+            expected = _minor_units(str(activation["amount"]), activation["currency"])
+            if not charges:
+                yield Mismatch("activated_not_paid", reference, plan_id=activation["plan_id"],
+                               expected_minor=expected)
+                continue
+            if len(charges) > 1:
+                yield Mismatch("duplicate_charge", reference, ",".join(c["id"] for c in charges),
+                               activation["plan_id"], expected,
+                               sum(c["amount_minor"] for c in charges))
+            charge = charges[0]
+            if charge["currency"] != activation["currency"].lower():
+                yield Mismatch("currency_mismatch", reference, charge["id"], activation["plan_id"],
+                               expected, charge["amount_minor"],
+                               f"{charge['currency']} != {activation['currency']}")
+            elif charge["amount_minor"] != expected:
+                yield Mismatch("amount_mismatch", reference, charge["id"], activation["plan_id"],
+                               expected, charge["amount_minor"])
+            if charge["refunded_minor"]:
+                yield Mismatch("refunded_still_active", reference, charge["id"], activation["plan_id"],
+                               expected, charge["amount_minor"],
+                               f"refunded {charge['refunded_minor']}")
+            summary["matched"] += 1
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from components.activations import iter_activations
+
+    parser = argparse.ArgumentParser(description="Reconcile Stripe exports against plan activations")
+    parser.add_argument("exports", nargs="+", help="Stripe CSV/JSON export files or globs")
+    parser.add_argument("--activations", default=str(ACTIVATIONS_PATH))
+    parser.add_argument("--out", default="reconciliation.csv", help="mismatch report (CSV)")
+    parser.add_argument("--partitions", type=int, default=0,
+                        help="spill partitions (default: sized from the activations file)")
+    args = parser.parse_args(argv)
+
+    paths = sorted({p for pattern in args.exports for p in glob.glob(pattern)})
+    activations_path = Path(args.activations)
+    partitions = args.partitions or Reconciler.partitions_for(
+        os.path.getsize(activations_path) if activations_path.exists() else 0
+    )
+
+    with open(args.out, "w", newline="", encoding="utf-8") as out:
+        writer = csv.DictWriter(out, fieldnames=list(Mismatch.__dataclass_fields__))
+        writer.writeheader()
+        summary = Reconciler(partitions).run(
+            read_stripe_exports(paths), iter_activations(activations_path),
+            lambda mismatch: writer.writerow(asdict(mismatch)),
+        )
+
+    for kind, count in sorted(summary.items()):
+        print(f"{kind:>28}: {count}")
+    problems = sum(count for kind, count in summary.items()
+                   if kind not in ("activations", "charges", "matched"))
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,323 @@
+import bisect
+import math
+import pickle
+import random
+import re
+import threading
+from dataclasses import dataclass
+from itertools import accumulate
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from components.application_log import DATA_DIR
+from components.jobs import get_job_store
+
+SALARY_INDEX_PATH = DATA_DIR / "salary" / "index.pickle"
+
+# Rough conversion rates to INR; refresh from a rates feed in production.
+FX_TO_INR = {"INR": 1.0, "USD": 83.0, "EUR": 90.0, "GBP": 105.0, "AED": 22.6, "SGD": 61.5}
+
+_CURRENCY_SYMBOLS = {"₹": "INR", "rs": "INR", "inr": "INR", "$": "USD", "usd": "USD",
+                     "€": "EUR", "eur": "EUR", "£": "GBP", "gbp": "GBP", "aed": "AED", "sgd": "SGD"}
+
+_PERIODS_PER_YEAR = [
+    (re.compile(r"/\s*h(ou)?r|per\s+hour|hourly|\bph\b"), 2080),
+    (re.compile(r"/\s*day|per\s+day|daily"), 260),
+    (re.compile(r"/\s*w(ee)?k|per\s+week|weekly"), 52),
+    (re.compile(r"/\s*mo(nth)?|per\s+month|monthly|\bpm\b|p\.m\."), 12),
+]
+
+_MULTIPLIERS = {"k": 1e3, "thousand": 1e3, "l": 1e5, "lakh": 1e5, "lakhs": 1e5, "lac": 1e5,
+                "lpa": 1e5, "cr": 1e7, "crore": 1e7, "crores": 1e7, "m": 1e6, "mn": 1e6, "million": 1e6}
+
+_CURRENCY_RE = "|".join(
+    re.escape(symbol) + (r"\.?" if symbol == "rs" else "") for symbol in _CURRENCY_SYMBOLS
+)
+_UNIT_RE = r"lpa|lakhs?|lac|crores?|cr|thousand|million|mn|k|l|m"
+# Figures for experience or duration ("2 years", "3+ yrs exp"), never pay.
+_NOT_PAY_RE = r"(?!\s*\+?\s*(?:years?|yrs?|yoe|months?|exp(?:erience)?)\b)"
+
+
+def _amount_re(n: int) -> str:
+    return (
+        rf"(?:(?<![a-z])(?P<currency{n}>{_CURRENCY_RE})\s*)?"
+        rf"(?P<number{n}>\d+(?:,\d+)*(?:\.\d+)?)\s*(?P<unit{n}>{_UNIT_RE})?\b{_NOT_PAY_RE}"
+        rf"(?:\s*(?P<suffix{n}>{_CURRENCY_RE})(?![a-z]))?"
+    )
+
+
+# An amount, or a range of two: "₹12-15 LPA", "$120k to $150k", "45,000".
+_AMOUNT_RE = re.compile(rf"{_amount_re(1)}(?:\s*(?:-|–|—|to)\s*{_amount_re(2)})?", re.IGNORECASE)
+
+
+def _salary_amounts(lowered: str) -> Optional[Tuple[Optional[str], List[Tuple[float, str]]]]:
+    """Currency and (number, unit) ends of the first figure that reads as pay.
+
+    A bare number only counts as pay when it is one end of a range;
+    otherwise it needs a currency or a unit next to it, so "2 years exp,
+    10 LPA" is 10 LPA and the "2L bonus" in "12 LPA + 2L bonus" is ignored.
+    """
+    for match in _AMOUNT_RE.finditer(lowered):
+        ends = [
+            (float(match.group(f"number{n}").replace(",", "")), (match.group(f"unit{n}") or "").lower())
+            for n in (1, 2) if match.group(f"number{n}")
+        ]
+        currency = next((match.group(f"{side}{n}") for side in ("currency", "suffix") for n in (1, 2)
+                         if match.group(f"{side}{n}")), None)
+        if len(ends) == 2 or currency or ends[0][1]:
+            return currency, ends
+    return None
+
+
+@dataclass(frozen=True)
+class SalaryRange:
+    """Annual salary in INR, as parsed from a posting"""
+    low: float
+    high: float
+
+    @property
+    def midpoint(self) -> float:
+        return (self.low + self.high) / 2
+
+
+def parse_salary(text: str, default_currency: str = "INR") -> Optional[SalaryRange]:
+    """Normalise "₹12-15 LPA", "$120k - 150k/yr", "Rs. 45,000 per month" and the like"""
+    if not text:
+        return None
+    lowered = text.casefold()
+
+    found = _salary_amounts(lowered)
+    if found is None:
+        return None
+    symbol, amounts = found
+
+    currency = default_currency
+    if symbol:
+        currency = _CURRENCY_SYMBOLS[symbol.rstrip(".")]
+    else:
+        for symbol, code in _CURRENCY_SYMBOLS.items():
+            if (symbol in lowered) if not symbol.isalpha() else re.search(rf"\b{symbol}\b", lowered):
+                currency = code
+                break
+
+    per_year = 1
+    if "lpa" not in lowered:
+        for pattern, periods in _PERIODS_PER_YEAR:
+            if pattern.search(lowered):
+                per_year = periods
+                break
+
+    # "12-15 LPA": a unit written once applies to both ends of the range.
+    shared_unit = next((unit for _, unit in reversed(amounts) if unit), "")
+    values = [amount * _MULTIPLIERS.get(unit or shared_unit, 1) for amount, unit in amounts]
+
+    rate = FX_TO_INR.get(currency)
+    if rate is None:
+        return None
+    low, high = min(values), max(values)
+    return SalaryRange(low * per_year * rate, high * per_year * rate)
+
+
+class KLLSketch:
+    """Mergeable quantile sketch (Karnin, Lang & Liberty).
+
+    Items live in a stack of compactors; when level ``h`` is full it is
+    sorted and every other item is promoted to ``h + 1`` with twice the
+    weight. Space is O(k log(n/k)) and rank error about 1/k, whatever the
+    number of salaries ingested. Quantiles are answered from a cached,
+    weighted CDF that is rebuilt only after the sketch changes, so repeat
+    lookups are a table lookup (integer percentiles) or a bisection.
+    """
+
+    def __init__(self, k: int = 200, c: float = 2 / 3, seed: Optional[int] = None):
+        self.k = k
+        self.c = c
+        self.compactors: List[List[float]] = []
+        self.n = 0
+        self.size = 0
+        self.max_size = 0
+        self._rng = random.Random(seed)
+        self._cdf: Optional[Tuple[List[float], List[float]]] = None
+        self._percentiles: Optional[List[float]] = None
+        self._grow()
+
+    def _capacity(self, height: int) -> int:
+        depth = len(self.compactors) - height - 1
+        return int(math.ceil(self.c ** depth * self.k)) + 1
+
+    def _grow(self):
+        self.compactors.append([])
+        self.max_size = sum(self._capacity(h) for h in range(len(self.compactors)))
+
+    def _compress(self):
+        for height, compactor in enumerate(self.compactors):
+            if len(compactor) >= self._capacity(height):
+                if height + 1 >= len(self.compactors):
+                    self._grow()
+                compactor.sort()
+                offset = self._rng.random() < 0.5
+                promoted = compactor[offset::2] if len(compactor) % 2 == 0 else compactor[offset:-1:2]
+                leftover = [compactor[-1]] if len(compactor) % 2 else []
+                self.compactors[height + 1].extend(promoted)
+                self.compactors[height] = leftover
+                self.size = sum(len(c) for c in self.compactors)
+                return
+
+    def update(self, value: float):
+        self.compactors[0].append(value)
+        self.n += 1
+        self.size += 1
+        self._cdf = self._percentiles = None
+        if self.size >= self.max_size:
+            self._compress()
+
+    def merge(self, other: "KLLSketch"):
+        while len(self.compactors) < len(other.compactors):
+            self._grow()
+        for height, compactor in enumerate(other.compactors):
+            self.compactors[height].extend(compactor)
+        self.n += other.n
+        self.size = sum(len(c) for c in self.compactors)
+        self._cdf = self._percentiles = None
+        while self.size >= self.max_size:
+            self._compress()
+
+    def _weighted_cdf(self) -> Tuple[List[float], List[float]]:
+        if self._cdf is None:
+            items = sorted(
+                (value, 1 << height)
+                for height, compactor in enumerate(self.compactors) for value in compactor
+            )
+            values = [value for value, _ in items]
+            total = sum(weight for _, weight in items) or 1
+            cumulative = [w / total for w in accumulate(weight for _, weight in items)]
+            self._cdf = (values, cumulative)
+        return self._cdf
+
+    def quantile(self, q: float) -> Optional[float]:
+        values, cumulative = self._weighted_cdf()
+        if not values:
+            return None
+        return values[min(bisect.bisect_left(cumulative, q), len(values) - 1)]
+
+    def percentile(self, p: int) -> Optional[float]:
+        """Integer percentile from a precomputed 0-100 table"""
+        if self._percentiles is None:
+            self._percentiles = [self.quantile(i / 100) for i in range(101)]
+        return self._percentiles[p]
+
+
+def normalize_role(title: str) -> str:
+    return " ".join(re.sub(r"[^\w+#]+", " ", title.casefold()).split())
+
+
+def normalize_location(location: str) -> str:
+    return " ".join(location.split(",")[0].casefold().split()) or "*"
+
+
+class SalaryIndex:
+    """KLL sketches of annual INR salary midpoints per (role, location).
+
+    Postings update exactly one sketch on ingest. Role-wide figures
+    ("software engineer", any city) are merged from the per-city sketches
+    on first request and cached until one of them changes.
+    """
+
+    def __init__(self, k: int = 200):
+        self.k = k
+        self.sketches: Dict[Tuple[str, str], KLLSketch] = {}
+        self._rollups: Dict[str, KLLSketch] = {}
+        self._lock = threading.Lock()
+
+    def add(self, title: str, location: str, salary_text: str) -> Optional[SalaryRange]:
+        salary = parse_salary(salary_text)
+        if salary is None:
+            return None
+        key = (normalize_role(title), normalize_location(location))
+        with self._lock:
+            sketch = self.sketches.get(key)
+            if sketch is None:
+                sketch = self.sketches[key] = KLLSketch(self.k)
+            sketch.update(salary.midpoint)
+            self._rollups.pop(key[0], None)
+        return salary
+
+    def add_many(self, postings: Iterable[Tuple[str, str, str]]) -> int:
+        return sum(self.add(*posting) is not None for posting in postings)
+
+    def _sketch(self, role: str, location: Optional[str]) -> Optional[KLLSketch]:
+        role = normalize_role(role)
+        if location:
+            return self.sketches.get((role, normalize_location(location)))
+        with self._lock:
+            rollup = self._rollups.get(role)
+            if rollup is None:
+                parts = [s for (r, _), s in self.sketches.items() if r == role]
+                if not parts:
+                    return None
+                rollup = KLLSketch(self.k)
+                for part in parts:
+                    rollup.merge(part)
+                self._rollups[role] = rollup
+            return rollup
+
+    def percentiles(self, role: str, location: Optional[str] = None,
+                    points: Sequence[int] = (25, 50, 75)) -> Dict[int, float]:
+        sketch = self._sketch(role, location)
+        if sketch is None or sketch.n == 0:
+            return {}
+        return {p: sketch.percentile(p) for p in points}
+
+    def sample_size(self, role: str, location: Optional[str] = None) -> int:
+        sketch = self._sketch(role, location)
+        return sketch.n if sketch else 0
+
+    def save(self, path: Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(self.sketches, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path, k: int = 200) -> "SalaryIndex":
+        index = cls(k)
+        if Path(path).exists():
+            with open(path, "rb") as f:
+                index.sketches = pickle.load(f)
+        return index
+
+
+def rebuild_salary_index(path: Path = SALARY_INDEX_PATH) -> int:
+    """Recompute the saved sketches from every posting in the job store.
+
+    Each worker adds the postings it accepts to its own index straight
+    away; this scheduled rebuild is what makes them durable and shared,
+    without workers overwriting each other's saves. Closed postings still
+    count: they are what the role paid. Returns the postings counted.
+    """
+    _, listings = get_job_store().changes_since(0)
+    index = SalaryIndex()
+    counted = index.add_many((listing.title, listing.location, listing.salary) for listing in listings)
+    index.save(path)
+    return counted
+
+
+_index: Optional[SalaryIndex] = None
+_index_mtime: Optional[float] = None
+_index_lock = threading.Lock()
+
+
+def get_salary_index() -> SalaryIndex:
+    """Process-wide index, reloaded when a rebuild saves new sketches"""
+    global _index, _index_mtime
+    with _index_lock:
+        try:
+            mtime = SALARY_INDEX_PATH.stat().st_mtime
+        except OSError:
+            mtime = None
+        if _index is None or mtime != _index_mtime:
+            _index = SalaryIndex.load(SALARY_INDEX_PATH)
+            _index_mtime = mtime
+        return _index
@@ -0,0 +1,332 @@
+import fcntl
+import importlib.util
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Optional, Set
+
+from components.application_log import DATA_DIR
+
+_ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+}
+
+
+class CronSchedule:
+    """Standard five-field cron expression (minute hour day month weekday)"""
+
+    _RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        fields = _ALIASES.get(expression, expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"Expected 5 cron fields, got {expression!r}")
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            self._parse(value, lo, hi) for value, (lo, hi) in zip(fields, self._RANGES)
+        )
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    @staticmethod
+    def _parse(value: str, lo: int, hi: int) -> Set[int]:
+        result = set()
+        for part in value.split(","):
+            base, _, step = part.partition("/")
+            if base == "*":
+                start, end = lo, hi
+            elif "-" in base:
+                start, end = map(int, base.split("-"))
+            else:
+                start = end = int(base)
+                if step:
+                    end = hi
+            if not (lo <= start <= end <= hi + (hi == 6)):
+                raise ValueError(f"Cron value {part!r} out of range {lo}-{hi}")
+            result.update(v % 7 if hi == 6 else v for v in range(start, end + 1, int(step or 1)))
+        return result
+
+    def _day_matches(self, moment: datetime) -> bool:
+        in_days = moment.day in self.days
+        in_weekdays = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return in_days and in_weekdays
+        return in_days or in_weekdays  # cron semantics when both are restricted
+
+    def next_after(self, moment: datetime) -> datetime:
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 5)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                year, month = divmod(candidate.month, 12)
+                candidate = candidate.replace(year=candidate.year + year, month=month + 1,
+                                              day=1, hour=0, minute=0)
+            elif not self._day_matches(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+            elif candidate.hour not in self.hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Cron expression {self.expression!r} never fires")
+
+
+@dataclass
+class JobMetrics:
+    runs: int = 0
+    failures: int = 0
+    skipped: int = 0
+    running: int = 0
+    last_started: Optional[float] = None
+    last_duration: Optional[float] = None
+    max_duration: float = 0.0
+    total_duration: float = 0.0
+    last_error: Optional[str] = None
+
+
+@dataclass
+class Job:
+    name: str
+    schedule: CronSchedule
+    func: Callable[[], None]
+    max_concurrency: int = 1
+    jitter_seconds: float = 0.0
+    next_run: float = 0.0
+    metrics: JobMetrics = field(default_factory=JobMetrics)
+
+
+class Scheduler:
+    """Runs periodic maintenance work on its own threads, never in a rerun.
+
+    Jobs fire on cron schedules, optionally delayed by random jitter so
+    that workers don't stampede shared resources. A run is skipped (and
+    counted) when the job is already at its concurrency limit. Last-run
+    times are persisted, so a restart resumes the schedule instead of
+    re-running everything. When several processes start a scheduler, a
+    lock file elects one of them to actually run jobs.
+    """
+
+    def __init__(self, state_path: Path, max_workers: int = 4):
+        self.state_path = Path(state_path)
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        self.jobs: Dict[str, Job] = {}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scheduler-job")
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._leader_file = None
+
+    def add_job(self, name: str, schedule: str, func: Callable[[], None],
+                max_concurrency: int = 1, jitter_seconds: float = 0.0) -> Job:
+        job = Job(name, CronSchedule(schedule), func, max_concurrency, jitter_seconds)
+        saved = self._load_state().get(name, {})
+        if saved.get("metrics"):
+            # Nothing survives a restart still running.
+            job.metrics = JobMetrics(**dict(saved["metrics"], running=0))
+        last_run = saved.get("last_run")
+        start = datetime.fromtimestamp(last_run) if last_run else datetime.now()
+        job.next_run = self._next_run(job, start)
+        with self._lock:
+            self.jobs[name] = job
+        self._wakeup.set()
+        return job
+
+    def _next_run(self, job: Job, after: datetime) -> float:
+        return job.schedule.next_after(after).timestamp() + random.uniform(0, job.jitter_seconds)
+
+    def _load_state(self) -> Dict[str, Dict]:
+        try:
+            return json.loads(self.state_path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_state(self):
+        # Merged into what is on disk, so jobs that haven't run since a
+        # restart (or aren't registered in this process) keep their entry.
+        with self._save_lock:
+            state = self._load_state()
+            with self._lock:
+                for name, job in self.jobs.items():
+                    last_run = job.metrics.last_started or state.get(name, {}).get("last_run")
+                    state[name] = {"last_run": last_run, "metrics": asdict(job.metrics)}
+            tmp = self.state_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(state, indent=2))
+            os.replace(tmp, self.state_path)
+
+    def _become_leader(self) -> bool:
+        lock_file = open(self.state_path.with_suffix(".lock"), "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+        self._leader_file = lock_file
+        return True
+
+    def start(self):
+        """Start the scheduler thread; it only runs jobs while it holds the leader lock"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._loop, name="scheduler", daemon=True)
+            self._thread.start()
+
+    @property
+    def is_leader(self) -> bool:
+        return self._leader_file is not None
+
+    def _loop(self):
+        while True:
+            if not self.is_leader and not self._become_leader():
+                # Another process runs the jobs; take over if it goes away.
+                time.sleep(30)
+                continue
+            now = time.time()
+            with self._lock:
+                due = [job for job in self.jobs.values() if job.next_run <= now]
+                for job in due:
+                    job.next_run = self._next_run(job, datetime.fromtimestamp(now))
+                wait = min((job.next_run for job in self.jobs.values()), default=now + 60) - now
+            for job in due:
+                self._submit(job)
+            self._wakeup.wait(timeout=max(0.0, min(wait, 60.0)))
+            self._wakeup.clear()
+
+    def _submit(self, job: Job):
+        with self._lock:
+            if job.metrics.running >= job.max_concurrency:
+                job.metrics.skipped += 1
+                return
+            job.metrics.running += 1
+        self._pool.submit(self._run, job)
+
+    def _run(self, job: Job):
+        started = time.time()
+        error = None
+        try:
+            job.func()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            print(f"Scheduled job {job.name} failed:", error)
+        duration = time.time() - started
+        with self._lock:
+            metrics = job.metrics
+            metrics.running -= 1
+            metrics.runs += 1
+            metrics.last_started = started
+            metrics.last_duration = duration
+            metrics.max_duration = max(metrics.max_duration, duration)
+            metrics.total_duration += duration
+            if error:
+                metrics.failures += 1
+                metrics.last_error = error
+        self._save_state()
+
+    def run_now(self, name: str):
+        """Queue a job immediately, e.g. from an admin action"""
+        self._submit(self.jobs[name])
+
+    def metrics(self) -> Dict[str, JobMetrics]:
+        with self._lock:
+            return {name: JobMetrics(**asdict(job.metrics)) for name, job in self.jobs.items()}
+
+
+def _refresh_snapshots():
+    from components.application_log import get_snapshot_store
+
+    get_snapshot_store().refresh()
+
+
+def _compact_application_log():
+    from components.application_log import get_application_log, get_snapshot_store
+
+    position = tuple(get_snapshot_store().manifest()["position"])
+    if importlib.util.find_spec("pyarrow") is not None:
+        from components.analytics_export import export_position
+
+        # The hourly export resumes from a (segment, offset) it saved; keep
+        # that segment and everything after it intact until it has caught up.
+        position = min(position, export_position())
+    get_application_log().compact(position)
+
+
+def _dispatch_notifications():
+    from components.notifications import get_dispatcher
+
+    get_dispatcher().drain()
+
+
+def _renew_subscriptions():
+    from components.billing import get_billing
+
+    get_billing().renew_due()
+
+
+def _retrain_moderation():
+    from components.moderation import retrain
+
+    retrain()
+
+
+def _rebuild_salary_index():
+    from components.salary import rebuild_salary_index
+
+    rebuild_salary_index()
+
+
+def _export_analytics():
+    from components.analytics_export import export_applications, export_payments, write_arrow_snapshot
+
+    if export_applications():
+        write_arrow_snapshot("applications")
+    if export_payments():
+        write_arrow_snapshot("payments")
+
+
+_scheduler: Optional[Scheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def register_default_jobs(scheduler: Scheduler):
+    scheduler.add_job("refresh_application_snapshots", "* * * * *", _refresh_snapshots,
+                      jitter_seconds=5)
+    scheduler.add_job("compact_application_log", "30 3 * * *", _compact_application_log,
+                      jitter_seconds=300)
+    scheduler.add_job("dispatch_notifications", "* * * * *", _dispatch_notifications)
+    scheduler.add_job("renew_subscriptions", "*/10 * * * *", _renew_subscriptions,
+                      jitter_seconds=30)
+    scheduler.add_job("retrain_moderation", "15 4 * * *", _retrain_moderation,
+                      jitter_seconds=300)
+    scheduler.add_job("rebuild_salary_index", "45 * * * *", _rebuild_salary_index,
+                      jitter_seconds=120)
+    if importlib.util.find_spec("pyarrow") is not None:
+        scheduler.add_job("export_analytics", "@hourly", _export_analytics, jitter_seconds=120)
+
+
+def get_scheduler() -> Scheduler:
+    """Process-wide scheduler with the default jobs registered and started"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = Scheduler(DATA_DIR / "scheduler" / "state.json")
+            register_default_jobs(_scheduler)
+            _scheduler.start()
+        return _scheduler
+
+
+if __name__ == "__main__":
+    # Dedicated scheduler process: holds the leader lock so web workers don't.
+    get_scheduler()
+    while True:
+        time.sleep(3600)
@@ -0,0 +1,191 @@
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_TOKEN_RE = re.compile(r"[^\w+#.]+")
+
+
+def normalize_query(query: str, filters: Optional[Dict[str, Any]] = None) -> str:
+    """Canonical cache key for a search: case, spacing and filter order don't matter"""
+    text = unicodedata.normalize("NFKC", query or "").casefold()
+    tokens = [token.strip(".") for token in _TOKEN_RE.split(text)]
+    key = " ".join(token for token in tokens if token)
+    facets = ";".join(
+        f"{name}={_facet_value(value)}"
+        for name, value in sorted((filters or {}).items()) if value not in (None, "", [], ())
+    )
+    return f"{key}|{facets}" if facets else key
+
+
+def _facet_value(value: Any) -> str:
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return ",".join(sorted(str(v).casefold() for v in value))
+    return str(value).casefold()
+
+
+class CountMinSketch:
+    """4-bit-style frequency sketch with periodic halving (TinyLFU ageing)"""
+
+    def __init__(self, width: int = 4096, depth: int = 4, sample_size: Optional[int] = None):
+        self.width = 1 << max(4, (width - 1).bit_length())
+        self.mask = self.width - 1
+        self.depth = depth
+        self.table = [bytearray(self.width) for _ in range(depth)]
+        self.sample_size = sample_size or 10 * self.width
+        self.additions = 0
+        self._seeds = [0x9E3779B1 * (i + 1) for i in range(depth)]
+
+    def _indexes(self, key: str):
+        h = hash(key)
+        for seed in self._seeds:
+            yield ((h ^ seed) * 0x85EBCA6B >> 7) & self.mask
+
+    def increment(self, key: str):
+        for row, index in zip(self.table, self._indexes(key)):
+            if row[index] < 15:
+                row[index] += 1
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self._reset()
+
+    def estimate(self, key: str) -> int:
+        return min(row[index] for row, index in zip(self.table, self._indexes(key)))
+
+    def _reset(self):
+        for row in self.table:
+            for i, count in enumerate(row):
+                if count:
+                    row[i] = count >> 1
+        self.additions //= 2
+
+
+@dataclass
+class _Entry:
+    results: Any
+    index_version: int
+    expires_at: float
+    negative: bool
+
+
+class SearchResultCache:
+    """Normalized-query result cache with W-TinyLFU admission.
+
+    New entries land in a small LRU window. When the window overflows, its
+    victim only enters the main segmented LRU if the frequency sketch says
+    it is requested more often than the main segment's own victim, so a
+    burst of one-off queries cannot flush "software engineer" and friends.
+
+    Entries are only valid for the index version they were computed
+    against; ``bump_index_version()`` after a reindex invalidates them all
+    in O(1). Zero-result queries are cached too, with a shorter TTL.
+    """
+
+    def __init__(self, capacity: int = 10_000, ttl: float = 300.0,
+                 negative_ttl: float = 60.0, window_ratio: float = 0.01):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.window_capacity = max(1, int(capacity * window_ratio))
+        main_capacity = max(1, capacity - self.window_capacity)
+        self.protected_capacity = int(main_capacity * 0.8)
+        self.probation_capacity = max(1, main_capacity - self.protected_capacity)
+
+        self.sketch = CountMinSketch(width=capacity)
+        self.window: "OrderedDict[str, _Entry]" = OrderedDict()
+        self.probation: "OrderedDict[str, _Entry]" = OrderedDict()
+        self.protected: "OrderedDict[str, _Entry]" = OrderedDict()
+        self.index_version = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def bump_index_version(self) -> int:
+        with self._lock:
+            self.index_version += 1
+            return self.index_version
+
+    def get(self, query: str, filters: Optional[Dict[str, Any]] = None) -> Tuple[bool, Any]:
+        """Return (hit, results) for a query"""
+        key = normalize_query(query, filters)
+        with self._lock:
+            self.sketch.increment(key)
+            entry = self._lookup(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self.hits += 1
+            return True, entry.results
+
+    def put(self, query: str, results: Any, filters: Optional[Dict[str, Any]] = None,
+            index_version: Optional[int] = None):
+        key = normalize_query(query, filters)
+        negative = not results
+        ttl = self.negative_ttl if negative else self.ttl
+        with self._lock:
+            version = self.index_version if index_version is None else index_version
+            if version != self.index_version:
+                return  # computed against an index that has since been replaced
+            entry = _Entry(results, version, time.monotonic() + ttl, negative)
+            for segment in (self.window, self.probation, self.protected):
+                if key in segment:
+                    segment[key] = entry
+                    return
+            self.window[key] = entry
+            if len(self.window) > self.window_capacity:
+                candidate_key, candidate = self.window.popitem(last=False)
+                self._admit(candidate_key, candidate)
+
+    def get_or_search(self, query: str, search: Callable[[str, Dict[str, Any]], List[Any]],
+                      filters: Optional[Dict[str, Any]] = None) -> List[Any]:
+        hit, results = self.get(query, filters)
+        if hit:
+            return results
+        version = self.index_version
+        results = search(query, filters or {})
+        self.put(query, results, filters, index_version=version)
+        return results
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self.window) + len(self.probation) + len(self.protected),
+        }
+
+    def _lookup(self, key: str) -> Optional[_Entry]:
+        for segment in (self.window, self.probation, self.protected):
+            entry = segment.get(key)
+            if entry is None:
+                continue
+            if entry.index_version != self.index_version or entry.expires_at <= time.monotonic():
+                del segment[key]
+                return None
+            if segment is self.window:
+                segment.move_to_end(key)
+            elif segment is self.probation:
+                # Second hit: promote to protected, demoting its LRU if full.
+                del segment[key]
+                self.protected[key] = entry
+                if len(self.protected) > self.protected_capacity:
+                    demoted_key, demoted = self.protected.popitem(last=False)
+                    self.probation[demoted_key] = demoted
+            else:
+                segment.move_to_end(key)
+            return entry
+        return None
+
+    def _admit(self, key: str, entry: _Entry):
+        if len(self.probation) + len(self.protected) < self.probation_capacity + self.protected_capacity:
+            self.probation[key] = entry
+            return
+        victims = self.probation if self.probation else self.protected
+        victim_key = next(iter(victims))
+        if self.sketch.estimate(key) > self.sketch.estimate(victim_key):
+            del victims[victim_key]
+            self.probation[key] = entry
@@ -1,12 +1,17 @@
 import streamlit as st
+from html import escape
+from urllib.parse import quote
 from pages.navbar import Navbar
 from pages.footer import show_footer
 from dataclasses import dataclass
 from typing import List
-from PIL import Image
-import base64
-from io import BytesIO
-from pathlib import Path
+from components.assets import load_logo_base64
+from components.autocomplete import autocomplete_input
+from components.geo import get_gazetteer
+from components.job_results import render_job_results
+from components.scheduler import get_scheduler
+from components.experiments import get_experiment, get_tracker, session_unit_id
+from components.clickstream import track
 
 @dataclass
 class Feature:
@@ -20,16 +25,8 @@ class JobGenieHomePage:
         self.load_assets()
         
     def setup_page_config(self):
-        img_path = Path("jobgenie-logo.png")
-        if img_path.exists():
-            img = Image.open(img_path)
-            img = img.resize((32, 32))
-            buffered = BytesIO()
-            img.save(buffered, format="PNG")
-            img_str = base64.b64encode(buffered.getvalue()).decode()
-            page_icon = f"data:image/png;base64,{img_str}"
-        else:
-            page_icon = "💼"
+        img_str = load_logo_base64("jobgenie-logo.png")
+        page_icon = f"data:image/png;base64,{img_str}" if img_str else "💼"
 
         st.set_page_config(
             page_title="JobGenie - Find Your Dream Job",
@@ -184,18 +181,43 @@ class JobGenieHomePage:
         </div>
         """, unsafe_allow_html=True)
     
+    @st.fragment
     def render_search_bar(self):
-        st.markdown("""
-        <div class="search-bar-container">
-            <form action="/" method="get">
-                <div class="search-bar-wrapper">
-                    <input class="search-input" name="search" type="text" placeholder="Job title, company, or keywords" />
-                    <button class="search-button" type="submit">Search</button>
-                </div>
-            </form>
-        </div>
-        """, unsafe_allow_html=True)
+        # A fragment, so typeahead reruns only touch the search box.
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col2:
+            search = autocomplete_input(key="search-input")
+            location = st.text_input(
+                "Location", placeholder="City, e.g. Pune or Bengaluru",
+                key="search-location", label_visibility="collapsed"
+            )
+            place = get_gazetteer().geocode(location) if location else None
+            if location and place is None:
+                st.caption(f"Couldn't find \"{location}\", showing jobs everywhere.")
+        query = search["query"]
+        place_name = place.name if place else None
+        if search["submitted"] and query and (
+            st.query_params.get("search") != query or st.query_params.get("location") != place_name
+        ):
+            track("search", session_unit_id(st.session_state, st.query_params),
+                  query=query, location=place_name)
+            st.query_params["search"] = query
+            if place_name:
+                st.query_params["location"] = place_name
+            else:
+                st.query_params.pop("location", None)
+            st.rerun(scope="app")
     
+    def render_search_results(self):
+        query = st.query_params.get("search")
+        if not query:
+            return
+        location = st.query_params.get("location")
+        place = get_gazetteer().geocode(location) if location else None
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col2:
+            render_job_results("home_search", query, place)
+
     def render_features(self):
         st.markdown('<div class="features-section">', unsafe_allow_html=True)
         cols = st.columns(3)
@@ -211,16 +233,29 @@ class JobGenieHomePage:
         st.markdown('</div>', unsafe_allow_html=True)
     
     def render_premium_cta(self):
-        st.markdown("""
+        unit_id = session_unit_id(st.session_state, st.query_params)
+        copy = get_experiment("home_premium_cta").variant(unit_id).params
+        get_tracker().expose("home_premium_cta", unit_id)
+        headline = copy.get("headline", "Upgrade to Premium")
+        body = copy.get("body", "Unlock exclusive job listings, priority applications, and personalized career coaching.")
+        button = copy.get("button", "Explore Premium Features")
+
+        # The upgrade page counts the click-through, hence the id in the link.
+        st.markdown(f"""
         <div class="premium-cta">
-            <h2 style='font-size: 1.5rem; font-weight: 700; margin: 0 0 1rem 0;'>Upgrade to Premium</h2>
-            <p style='max-width: 40rem; margin: auto auto 1.5rem auto;'>Unlock exclusive job listings, priority applications, and personalized career coaching.</p>
-            <button class="premium-button">Explore Premium Features</button>
+            <h2 style='font-size: 1.5rem; font-weight: 700; margin: 0 0 1rem 0;'>{headline}</h2>
+            <p style='max-width: 40rem; margin: auto auto 1.5rem auto;'>{body}</p>
+            <a href="/upgrade?via=home_cta&aid={escape(quote(unit_id, safe=''))}" target="_self">
+                <button class="premium-button">{button}</button>
+            </a>
         </div>
         """, unsafe_allow_html=True)
 
     def run(self):
         self.inject_css()
+        if not st.session_state.get("home_viewed"):
+            track("page_view", session_unit_id(st.session_state, st.query_params), page="home")
+            st.session_state.home_viewed = True
         
         # Render Navbar
         navbar = Navbar(role="job_seeker", is_signed_in=False)
@@ -229,6 +264,7 @@ class JobGenieHomePage:
         # Render page content
         self.render_hero_section()
         self.render_search_bar()
+        self.render_search_results()
         self.render_features()
         self.render_premium_cta()
         
@@ -236,5 +272,7 @@ class JobGenieHomePage:
         show_footer()
 
 if __name__ == "__main__":
+    # Idempotent: starts the background scheduler once per worker process.
+    get_scheduler()
     app = JobGenieHomePage()
     app.run()
\ No newline at end of file
@@ -0,0 +1,58 @@
+import uuid
+
+import streamlit as st
+from pages.navbar import Navbar
+from pages.footer import show_footer
+from components.clickstream import track
+from components.experiments import session_unit_id
+from components.moderation import JobPosting
+from components.postings import submit_posting
+
+
+class BecomeEmployerApp:
+    def setup_page(self):
+        st.set_page_config(
+            page_title="JobGenie - Post a Job",
+            page_icon="🏢",
+            layout="wide"
+        )
+
+    def render_form(self):
+        st.title("Post a Job")
+        st.write("Reach thousands of candidates. Postings are screened before they go live.")
+        with st.form("post-job", clear_on_submit=True):
+            title = st.text_input("Job title", max_chars=120)
+            company = st.text_input("Company", max_chars=120)
+            location = st.text_input("Location", placeholder="City, e.g. Pune or Bengaluru", max_chars=120)
+            salary = st.text_input("Salary", placeholder="e.g. ₹12-18 LPA", max_chars=80)
+            contact_email = st.text_input("Contact email", max_chars=254)
+            description = st.text_area("Description", height=240, max_chars=20_000)
+            submitted = st.form_submit_button("Submit posting", type="primary")
+        if not submitted:
+            return
+        if not (title.strip() and company.strip() and description.strip()):
+            st.error("Please fill in the job title, company and description.")
+            return
+
+        posting = JobPosting(uuid.uuid4().hex, title.strip(), description.strip(), company.strip(),
+                             location.strip(), salary.strip(), contact_email.strip())
+        result = submit_posting(posting)
+        track("job_posted", session_unit_id(st.session_state, st.query_params),
+              posting_id=posting.posting_id, decision=result.decision)
+        if result.decision == "approve":
+            st.success("Your job is live and searchable now.")
+        elif result.decision == "review":
+            st.info("Thanks! Our team will review your posting, usually within a day.")
+        else:
+            st.error("We can't publish this posting. Please check it follows our posting guidelines.")
+
+    def run(self):
+        self.setup_page()
+        Navbar(role="job_seeker", is_signed_in=False).render()
+        self.render_form()
+        show_footer()
+
+
+if __name__ == "__main__":
+    app = BecomeEmployerApp()
+    app.run()
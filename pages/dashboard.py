@@ -0,0 +1,33 @@
+import streamlit as st
+from pages.navbar import Navbar
+from pages.footer import show_footer
+from components.application_feed import render_application_statuses
+from components.clickstream import track
+from components.experiments import session_unit_id
+
+
+class DashboardApp:
+    def setup_page(self):
+        st.set_page_config(
+            page_title="JobGenie - My Applications",
+            page_icon="📋",
+            layout="wide"
+        )
+
+    def run(self):
+        self.setup_page()
+        user_id = session_unit_id(st.session_state, st.query_params)
+        if not st.session_state.get("dashboard_viewed"):
+            track("page_view", user_id, page="dashboard")
+            st.session_state.dashboard_viewed = True
+        Navbar(role="job_seeker", is_signed_in=False).render()
+
+        st.title("My Applications")
+        # Only the status list reruns on its timer, not the page around it.
+        render_application_statuses(user_id)
+        show_footer()
+
+
+if __name__ == "__main__":
+    app = DashboardApp()
+    app.run()
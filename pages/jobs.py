@@ -0,0 +1,45 @@
+import streamlit as st
+from pages.navbar import Navbar
+from pages.footer import show_footer
+from components.clickstream import track
+from components.experiments import session_unit_id
+from components.geo import get_gazetteer
+from components.job_results import render_job_results
+
+
+class BrowseJobsApp:
+    def setup_page(self):
+        st.set_page_config(
+            page_title="JobGenie - Browse Jobs",
+            page_icon="💼",
+            layout="wide"
+        )
+
+    def render_filters(self):
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            query = st.text_input("Keywords", placeholder="Title, skill or company", key="browse-query")
+        with col2:
+            location = st.text_input("Location", placeholder="City, e.g. Pune", key="browse-location")
+        place = get_gazetteer().geocode(location) if location else None
+        if location and place is None:
+            st.caption(f"Couldn't find \"{location}\", showing jobs everywhere.")
+        return query, place
+
+    def run(self):
+        self.setup_page()
+        if not st.session_state.get("browse_viewed"):
+            track("page_view", session_unit_id(st.session_state, st.query_params), page="jobs")
+            st.session_state.browse_viewed = True
+        Navbar(role="job_seeker", is_signed_in=False).render()
+
+        st.title("Browse Jobs")
+        query, place = self.render_filters()
+        # With no keywords this lists every open posting, premium and newest first.
+        render_job_results("browse", query, place)
+        show_footer()
+
+
+if __name__ == "__main__":
+    app = BrowseJobsApp()
+    app.run()
@@ -1,9 +1,9 @@
+import json
 import streamlit as st
 from streamlit.components.v1 import html
-from PIL import Image
-import base64
-from io import BytesIO
-from pathlib import Path
+from components.assets import load_logo_base64
+from components.clickstream import beacon_url
+from components.experiments import session_unit_id
 
 class Navbar:
     def __init__(self, role="job_seeker", is_signed_in=False):
@@ -14,16 +14,7 @@ class Navbar:
     def _convert_image_to_base64(self, image_path: str) -> str:
         """Convert image to base64 for HTML embedding"""
         try:
-            img_path = Path(image_path)
-            if img_path.exists():
-                img = Image.open(img_path)
-                img = img.resize((32, 32))  # Resize logo
-                buffered = BytesIO()
-                img.save(buffered, format="PNG")
-                return base64.b64encode(buffered.getvalue()).decode()
-            else:
-                print(f"Image not found at path: {image_path}")
-            return ""
+            return load_logo_base64(image_path, 32)  # Resize logo
         except Exception as e:
             print("Error loading image:", e)
             return ""
@@ -44,7 +35,7 @@ class Navbar:
         """Generate authentication buttons based on login status"""
         if not self.is_signed_in:
             return """
-            <a href="/become-employer" onclick="handleNavClick(event)" style="font-size: 0.9rem; color: #6B7280;">Become an Employer</a>
+            <a href="/become_employer" onclick="handleNavClick(event)" style="font-size: 0.9rem; color: #6B7280;">Become an Employer</a>
             <button class="btn btn-signin" onclick="handleButtonClick('signin')">Sign In</button>
             <button class="btn btn-register" onclick="handleButtonClick('register')">Register</button>
             """
@@ -137,11 +128,32 @@ class Navbar:
 
     def _get_js(self) -> str:
         """Return JavaScript for navigation handling"""
-        return """
+        # postMessage from this iframe never reaches Python, so clicks are
+        # also beaconed to the clickstream collector when ingest is enabled.
+        config = json.dumps({
+            "url": beacon_url(),
+            "unitId": session_unit_id(st.session_state, st.query_params)
+        })
+        # json.dumps leaves "</script>" intact; escape what could end the tag.
+        config = config.replace("<", "\\u003c").replace(">", "\\u003e").replace("&", "\\u0026")
+        return f"""
+        <script>
+        const CLICKSTREAM = {config};
+        </script>
+        """ + """
         <script>
+        function trackClick(event) {
+            if (CLICKSTREAM.url && navigator.sendBeacon) {
+                navigator.sendBeacon(CLICKSTREAM.url, JSON.stringify(
+                    Object.assign({unit_id: CLICKSTREAM.unitId}, event)
+                ));
+            }
+        }
+        
         function handleNavClick(event) {
             event.preventDefault();
             const path = event.currentTarget.getAttribute('href');
+            trackClick({type: 'navigate', path: path});
             window.parent.postMessage({
                 type: 'streamlit:navigate',
                 path: path
@@ -149,6 +161,7 @@ class Navbar:
         }
         
         function handleButtonClick(action) {
+            trackClick({type: 'button_click', action: action});
             window.parent.postMessage({
                 type: 'streamlit:buttonClick',
                 action: action
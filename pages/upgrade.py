@@ -1,9 +1,14 @@
 import streamlit as st
 from pages.navbar import Navbar
-import stripe
+from components.notifications import get_outbox
+from components.activations import activate_plan, new_reference
+from components.billing import BILLING_PLANS, BillingError, get_billing
+from components.experiments import get_experiment, get_tracker, session_unit_id
+from components.clickstream import track
 import os
 from dataclasses import dataclass
 from typing import List, Optional, Dict, Tuple
+from urllib.parse import quote
 
 @dataclass
 class Plan:
@@ -29,7 +34,9 @@ class PremiumUpgradeApp:
         self.load_data()
         
     def init_stripe(self):
-        stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
+        # stripe is imported lazily in create_stripe_session(); only the
+        # payment page ever talks to it.
+        self.stripe_secret_key = os.getenv("STRIPE_SECRET_KEY")
         self.stripe_public_key = os.getenv("STRIPE_PUBLIC_KEY")
 
         
@@ -133,6 +140,7 @@ class PremiumUpgradeApp:
     
     def run(self):
         self.setup_page()
+        self.track_cta_click()
         Navbar(role="job_seeker", is_signed_in=True)
         self.inject_styles()
         self.handle_routing()
@@ -323,6 +331,7 @@ class PremiumUpgradeApp:
     def handle_routing(self):
         if "page" in st.query_params:
             st.session_state.current_page = st.query_params["page"]
+        self.track_page_view(st.session_state.current_page)
             
         if st.session_state.current_page == "premium":
             self.show_premium_page()
@@ -331,6 +340,24 @@ class PremiumUpgradeApp:
         elif st.session_state.current_page == "confirmation":
             self.show_confirmation_page()
     
+    def track_page_view(self, page: str):
+        """One page_view per page and session, not one per rerun"""
+        viewed = st.session_state.setdefault("viewed_pages", set())
+        unit_id = session_unit_id(st.session_state, st.query_params)
+        if page not in viewed:
+            viewed.add(page)
+            track("page_view", unit_id, page=f"upgrade/{page}")
+        if st.query_params.get("checkout") == "canceled" and "checkout_canceled" not in viewed:
+            viewed.add("checkout_canceled")
+            track("checkout", unit_id, status="canceled", plan_id=st.query_params.get("plan"))
+    
+    def track_cta_click(self):
+        """Count arrivals from the home page CTA as conversions of its experiment"""
+        if st.query_params.get("via") != "home_cta" or st.session_state.get("cta_click_tracked"):
+            return
+        get_tracker().convert("home_premium_cta", session_unit_id(st.session_state, st.query_params))
+        st.session_state.cta_click_tracked = True
+    
     def navigate_to(self, page: str):
         st.session_state.current_page = page
         st.rerun()
@@ -354,16 +381,23 @@ class PremiumUpgradeApp:
     def render_pricing_section(self):
         st.markdown("### Choose Your Plan")
         cols = st.columns(3)
+        unit_id = session_unit_id(st.session_state, st.query_params)
+        current_plan_id = get_billing().entitlements(unit_id).id
+        badges = get_experiment("plan_badges").variant(unit_id).params
+        get_tracker().expose("plan_badges", unit_id)
         
         for idx, plan in enumerate(self.plans):
             with cols[idx]:
-                self.render_plan_card(plan)
+                self.render_plan_card(plan, current_plan_id, badges)
     
-    def render_plan_card(self, plan: Plan):
+    def render_plan_card(self, plan: Plan, current_plan_id: str = "basic", badges: Optional[Dict] = None):
+        badges = badges or {}
+        popular = plan.id == badges["popular"] if "popular" in badges else plan.popular
+        highlight = plan.id == badges["highlight"] if "highlight" in badges else plan.highlight
         border_style = ""
-        if plan.popular:
+        if popular:
             border_style = "border: 2px solid #4F46E5;"
-        elif plan.highlight:
+        elif highlight:
             border_style = "border: 1px solid #F59E0B;"
         
         features_html = "\n".join(
@@ -387,11 +421,18 @@ class PremiumUpgradeApp:
         </div>
         """, unsafe_allow_html=True)
         
-        if plan.price == 0:
-            st.button("Current Plan", disabled=True)
+        if plan.id == current_plan_id:
+            st.button("Current Plan", disabled=True, key=f"{plan.id}_current")
+        elif plan.price == 0:
+            st.button("Included", disabled=True, key=f"{plan.id}_included")
         else:
             button_text = "Upgrade Now" if not plan.highlight else "Go Pro"
+            if current_plan_id != "basic":
+                current_price = BILLING_PLANS[current_plan_id].amount
+                button_text = f"Upgrade to {plan.name}" if plan.price > current_price else f"Switch to {plan.name}"
             if st.button(button_text, type="primary", key=f"{plan.id}_upgrade"):
+                track("plan_click", session_unit_id(st.session_state, st.query_params),
+                      plan_id=plan.id, current_plan_id=current_plan_id)
                 st.session_state.selected_plan = {
                     "id": plan.id,
                     "name": plan.name,
@@ -459,6 +500,11 @@ class PremiumUpgradeApp:
             f"(₹{st.session_state.selected_plan['amount']}/month)"
         )
         
+        subscription = get_billing().active_subscription(session_unit_id(st.session_state, st.query_params))
+        if subscription is not None:
+            self.render_plan_change(subscription)
+            return
+        
         st.markdown("### Secure Payment")
         
         with st.spinner("Preparing secure checkout..."):
@@ -486,7 +532,45 @@ class PremiumUpgradeApp:
                 if st.button("← Back to Plans", key="back_to_plans"):
                     self.navigate_to("premium")
     
+    def render_plan_change(self, subscription):
+        """Existing subscribers change plan in place instead of paying again at Checkout"""
+        billing = get_billing()
+        plan_id = st.session_state.selected_plan['id']
+        proration = billing.quote_change(subscription, plan_id)
+        
+        if proration.immediate:
+            st.markdown(
+                f"Upgrading from **{subscription.plan.name}** now. You'll be charged "
+                f"**₹{proration.net_minor // 100}** for the rest of this billing period "
+                f"(₹{proration.charge_minor // 100} less ₹{proration.credit_minor // 100} unused)."
+            )
+            button_text = "Confirm Upgrade"
+        else:
+            st.markdown(
+                f"You'll stay on **{subscription.plan.name}** until the end of this billing period, "
+                f"then move to **{st.session_state.selected_plan['name']}**."
+            )
+            button_text = "Confirm Change"
+        
+        if st.button(button_text, type="primary", key="confirm_plan_change"):
+            unit_id = session_unit_id(st.session_state, st.query_params)
+            try:
+                billing.change_plan(subscription.id, plan_id,
+                                    quoted_minor=proration.net_minor if proration.immediate else None)
+            except BillingError as e:
+                track("checkout", unit_id, status="plan_change_failed", plan_id=plan_id, error=str(e))
+                st.error(f"Payment Error: {str(e)}")
+                return
+            track("checkout", unit_id, status="plan_changed", plan_id=plan_id,
+                  from_plan_id=subscription.plan_id, amount_minor=proration.net_minor)
+            self.navigate_to("premium")
+        if st.button("← Back to Plans", key="back_to_plans"):
+            self.navigate_to("premium")
+    
     def create_stripe_session(self, plan_id: str, plan_name: str, amount: int) -> Optional[str]:
+        import stripe
+
+        stripe.api_key = self.stripe_secret_key
         try:
             current_url = st.query_params.get("_st", {}).get("base_url", "http://localhost:8501")
             
@@ -500,29 +584,54 @@ class PremiumUpgradeApp:
                 if current_url.startswith(('http://', 'https://')) 
                 else f"http://localhost:8501?page=premium"
             )
+            cancel_url += f"&checkout=canceled&plan={plan_id}"
+            # The reference ties the activation recorded on the confirmation
+            # page to the Stripe charge, for reconciliation.
+            reference = new_reference()
+            success_url += f"&plan={plan_id}&ref={reference}&session_id={{CHECKOUT_SESSION_ID}}"
+            # Carry the experiment id across the redirect to count the conversion.
+            success_url += f"&aid={quote(session_unit_id(st.session_state, st.query_params), safe='')}"
+
+            price_data = {
+                'currency': 'inr',
+                'product_data': {
+                    'name': f'JobGenie {plan_name} Plan',
+                },
+                'unit_amount': amount * 100,
+            }
+            billing_plan = BILLING_PLANS.get(plan_id)
+            recurring = billing_plan is not None and billing_plan.interval is not None
+            charge_metadata = {"plan_id": plan_id, "reference": reference}
+            if recurring:
+                # Monthly plans renew through Stripe Billing; the renewal job
+                # mirrors each new period into our subscription records.
+                price_data['recurring'] = {'interval': billing_plan.interval}
+                mode_options = {'mode': 'subscription', 'subscription_data': {"metadata": charge_metadata}}
+            else:
+                mode_options = {'mode': 'payment', 'payment_intent_data': {"metadata": charge_metadata}}
             
             session = stripe.checkout.Session.create(
                 payment_method_types=['card'],
                 line_items=[{
-                    'price_data': {
-                        'currency': 'inr',
-                        'product_data': {
-                            'name': f'JobGenie {plan_name} Plan',
-                        },
-                        'unit_amount': amount * 100,
-                    },
+                    'price_data': price_data,
                     'quantity': 1,
                 }],
-                mode='payment',
                 success_url=success_url,
                 cancel_url=cancel_url,
+                client_reference_id=reference,
                 metadata={
                     "plan_id": plan_id,
-                    "plan_name": plan_name
-                }
+                    "plan_name": plan_name,
+                    "reference": reference
+                },
+                **mode_options
             )
+            track("checkout", session_unit_id(st.session_state, st.query_params),
+                  status="started", plan_id=plan_id, amount=amount, reference=reference)
             return session.url
         except stripe.error.StripeError as e:
+            track("checkout", session_unit_id(st.session_state, st.query_params),
+                  status="error", plan_id=plan_id, error=str(e))
             st.error(f"Payment Error: {str(e)}")
             return None
         except Exception as e:
@@ -530,6 +639,16 @@ class PremiumUpgradeApp:
             return None
     
     def show_confirmation_page(self):
+        checkout = self.record_activation()
+        if checkout is None:
+            st.error(
+                "We couldn't confirm a payment for this order. If you were charged, "
+                "contact support with the reference from your Stripe receipt."
+            )
+            if st.button("← Back to Plans", key="back_to_plans"):
+                self.navigate_to("premium")
+            return
+        
         st.markdown("""
         <div style="text-align: center; padding: 3rem 1rem;">
             <h1 style="font-size: 2.5rem; margin-bottom: 1rem;">🎉 Upgrade Successful!</h1>
@@ -557,6 +676,72 @@ class PremiumUpgradeApp:
         if st.button("Go to Dashboard", type="primary"):
             self.navigate_to("home")
 
+    def record_activation(self):
+        """Grant the plan paid for at Checkout, once per checkout reference.
+
+        Nothing in the URL is trusted: the Checkout Session is fetched from
+        Stripe and must be paid for this reference and plan. Only the visit
+        that claims the checkout in the billing database grants anything;
+        later visits to the same success URL just show the confirmation.
+        Until there is sign-in, the anonymous id carried through Checkout
+        in ``aid`` is the account the plan belongs to. Returns the
+        PaidCheckout, or None if the payment can't be confirmed.
+        """
+        reference = st.query_params.get("ref")
+        plan_id = st.query_params.get("plan")
+        checkout_session_id = st.query_params.get("session_id")
+        checkout = st.session_state.get("paid_checkout")
+        if checkout is not None and checkout.reference == reference:
+            return checkout
+        if not reference or not plan_id or not checkout_session_id:
+            return None
+        unit_id = session_unit_id(st.session_state, st.query_params)
+        billing = get_billing()
+        try:
+            checkout = billing.verify_checkout(checkout_session_id, reference, plan_id)
+        except BillingError as e:
+            track("checkout", unit_id, status="unverified", plan_id=plan_id, reference=reference, error=str(e))
+            return None
+        except Exception as e:
+            print(f"Could not verify checkout {checkout_session_id}: {e}")
+            return None
+        st.session_state.paid_checkout = checkout
+        if not billing.claim_checkout(checkout, unit_id):
+            return checkout
+        
+        amount = checkout.amount_minor // 100
+        activate_plan(
+            reference, plan_id, amount, checkout.currency,
+            user_id=unit_id,
+            checkout_session_id=checkout_session_id
+        )
+        get_tracker().convert("plan_badges", unit_id, amount)
+        track("checkout", unit_id, status="completed", plan_id=plan_id, amount=amount,
+              reference=reference, session_id=checkout_session_id)
+        if BILLING_PLANS[plan_id].interval:
+            try:
+                billing.start_subscription(unit_id, plan_id, checkout=checkout)
+            except BillingError as e:
+                print(f"Could not start subscription for {unit_id}: {e}")
+        self.queue_receipt(checkout)
+        return checkout
+
+    def queue_receipt(self, checkout):
+        """Queue the receipt email; the scheduler's dispatcher sends it in a batch.
+
+        Stripe redirects back into a fresh session, so the plan and the
+        address come from the verified Checkout Session, not session state.
+        """
+        if not checkout.customer_email:
+            return
+        plan = BILLING_PLANS[checkout.plan_id]
+        get_outbox().enqueue(checkout.customer_email, "payment_receipt", {
+            "name": st.session_state.get("user_name", "there"),
+            "plan_name": plan.name,
+            "amount": str(checkout.amount_minor // 100),
+            "reference": checkout.reference,
+        })
+
 if __name__ == "__main__":
     app = PremiumUpgradeApp()
     app.run()
\ No newline at end of file
@@ -0,0 +1,40 @@
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from components.billing import BillingEngine, FrozenClock, LocalStripe  # noqa: E402
+
+JAN_31 = datetime(2027, 1, 31, 12, tzinfo=timezone.utc).timestamp()
+
+
+@pytest.fixture
+def clock():
+    return FrozenClock(JAN_31)
+
+
+@pytest.fixture
+def stripe(clock):
+    return LocalStripe(clock)
+
+
+@pytest.fixture
+def engine(tmp_path, stripe, clock):
+    return BillingEngine(tmp_path / "billing.sqlite3", stripe, clock,
+                         activations_path=tmp_path / "activations.jsonl")
+
+
+@pytest.fixture
+def subscribe(engine, stripe):
+    """Check out and start a subscription: subscribe(user_id="u1", plan_id=..., payment_method=...)"""
+
+    def subscribe(user_id="u1", plan_id="premium_monthly", payment_method="pm_card_visa"):
+        session_id = stripe.create_checkout_session(f"ref-{user_id}", plan_id, payment_method,
+                                                    f"{user_id}@example.com")
+        checkout = engine.verify_checkout(session_id, f"ref-{user_id}", plan_id)
+        return engine.start_subscription(user_id, plan_id, checkout=checkout)
+
+    return subscribe
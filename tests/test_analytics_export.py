@@ -0,0 +1,85 @@
+from datetime import datetime, timezone
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from components.analytics_export import (  # noqa: E402
+    export_payments, export_rows, load_arrow_snapshot, scan, write_arrow_snapshot,
+)
+from components.billing import RETRY_DELAYS  # noqa: E402
+
+
+def test_payments_export_paid_charges_and_each_failed_attempt_once(tmp_path, engine, stripe, clock, subscribe):
+    export_dir = tmp_path / "analytics"
+
+    def export():
+        return export_payments(export_dir, engine.activations_path, engine.path)
+
+    subscription = subscribe()
+    assert export() == 0
+
+    stripe.attach_payment_method(subscription.customer_id, "pm_card_chargeDeclined")
+    clock.set(subscription.current_period_end)
+    engine.renew_due()
+    assert export() == 1
+    assert export() == 0
+
+    stripe.attach_payment_method(subscription.customer_id, "pm_card_visa")
+    clock.advance(RETRY_DELAYS[0])
+    assert engine.renew_due()["renewed"] == 1
+    assert export() == 1
+
+    rows = scan("payments", ["user_id", "status", "amount"], export_dir=export_dir).to_pylist()
+    assert sorted(row["status"] for row in rows) == ["failed", "paid"]
+    assert {row["user_id"] for row in rows} == {"u1"}
+
+
+def application_rows(start, count, day):
+    return [{"user_id": f"u{i}", "application_id": f"a{i}", "status": "applied",
+             "timestamp": datetime(2027, 1, day, 12, tzinfo=timezone.utc), "date": None}
+            for i in range(start, start + count)]
+
+
+def test_arrow_snapshot_converts_only_new_exports(tmp_path):
+    export_rows("applications", application_rows(0, 3, 1), export_dir=tmp_path)
+    snapshot = write_arrow_snapshot("applications", tmp_path)
+    first = sorted(snapshot.glob("part-*.arrow"))
+    written = {path: path.stat().st_mtime_ns for path in first}
+
+    export_rows("applications", application_rows(3, 2, 2), export_dir=tmp_path)
+    write_arrow_snapshot("applications", tmp_path)
+    parts = sorted(snapshot.glob("part-*.arrow"))
+    assert len(parts) == 2 and parts[0] == first[0]
+    assert {path: path.stat().st_mtime_ns for path in first} == written
+    assert load_arrow_snapshot("applications", tmp_path).num_rows == 5
+
+    assert write_arrow_snapshot("applications", tmp_path) == snapshot  # nothing new
+    assert sorted(snapshot.glob("part-*.arrow")) == parts
+
+    table = load_arrow_snapshot("applications", tmp_path)
+    assert sorted(table["application_id"].to_pylist()) == [f"a{i}" for i in range(5)]
+    assert sorted(set(table["date"].to_pylist())) == ["2027-01-01", "2027-01-02"]
+
+
+def test_arrow_snapshot_parts_are_merged_past_the_limit(tmp_path):
+    for run in range(4):
+        export_rows("applications", application_rows(run * 2, 2, run + 1), export_dir=tmp_path)
+        snapshot = write_arrow_snapshot("applications", tmp_path, max_parts=3)
+    assert len(list(snapshot.glob("part-*.arrow"))) == 1
+    assert load_arrow_snapshot("applications", tmp_path).num_rows == 8
+
+    export_rows("applications", application_rows(8, 1, 5), export_dir=tmp_path)
+    write_arrow_snapshot("applications", tmp_path, max_parts=3)
+    assert len(list(snapshot.glob("part-*.arrow"))) == 2
+    assert load_arrow_snapshot("applications", tmp_path).num_rows == 9
+
+
+def test_arrow_snapshot_is_rebuilt_when_exports_disappear(tmp_path):
+    export_rows("applications", application_rows(0, 3, 1), export_dir=tmp_path)
+    export_rows("applications", application_rows(3, 2, 2), export_dir=tmp_path)
+    write_arrow_snapshot("applications", tmp_path)
+    for path in (tmp_path / "applications" / "date=2027-01-01").iterdir():
+        path.unlink()
+    write_arrow_snapshot("applications", tmp_path)
+    assert load_arrow_snapshot("applications", tmp_path).num_rows == 2
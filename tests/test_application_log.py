@@ -0,0 +1,67 @@
+import os
+import threading
+
+from components.application_log import ApplicationLog, SnapshotStore
+
+
+def test_refresh_rewrites_only_changed_shards(tmp_path):
+    log = ApplicationLog(str(tmp_path / "log"))
+    store = SnapshotStore(log, str(tmp_path / "snapshots"), shards=8)
+    for i in range(200):
+        log.append(f"user-{i}", f"app-{i}", "applied")
+    store.refresh()
+    log.append("user-7", "app-7", "interview")
+    log.append("user-7", "app-new", "applied")
+    store.refresh()
+
+    old, new = tmp_path / "snapshots" / "gen-00000001", tmp_path / "snapshots" / "gen-00000002"
+    changed = {path.name for path in new.iterdir()
+               if os.stat(path).st_ino != os.stat(old / path.name).st_ino}
+    assert changed == {f"shard-{store._shard_of('user-7'):03d}.json"}
+    assert {app: status for app, (status, _) in store.current("user-7").items()} == {
+        "app-7": "interview", "app-new": "applied"}
+    assert store.current("user-8")["app-8"][0] == "applied"
+    assert old.exists() and store.manifest()["generation"] == 2
+
+    log.append("user-8", "app-8", "offer")
+    store.refresh()
+    assert not old.exists()
+    assert store.current("user-7")["app-7"][0] == "interview"
+    assert store.current("user-8")["app-8"][0] == "offer"
+
+
+def test_latest_includes_changes_after_the_snapshot(tmp_path):
+    log = ApplicationLog(str(tmp_path / "log"))
+    store = SnapshotStore(log, str(tmp_path / "snapshots"), shards=4)
+    log.append("u1", "a1", "applied")
+    store.refresh()
+    log.append("u1", "a1", "viewed")
+    log.append("u1", "a2", "applied")
+    log.append("u2", "a3", "applied")
+    assert {app: status for app, (status, _) in store.current("u1").items()} == {"a1": "applied"}
+    assert {app: status for app, (status, _) in store.latest("u1").items()} == {"a1": "viewed", "a2": "applied"}
+
+
+def test_concurrent_refreshes_never_clobber_each_others_generation(tmp_path):
+    log = ApplicationLog(str(tmp_path / "log"))
+    stores = [SnapshotStore(log, str(tmp_path / "snapshots"), shards=4) for _ in range(4)]
+    errors = []
+
+    def refresh_after_appending(worker: int, store: SnapshotStore):
+        try:
+            for i in range(25):
+                log.append(f"user-{worker}", f"app-{i}", "applied")
+                store.refresh()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=refresh_after_appending, args=(worker, store))
+               for worker, store in enumerate(stores)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    for worker in range(4):
+        assert len(stores[0].current(f"user-{worker}")) == 25
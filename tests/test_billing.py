@@ -0,0 +1,192 @@
+import threading
+from datetime import datetime, timezone
+
+import pytest
+
+from components.activations import iter_activations
+from components.billing import (
+    DAY,
+    RETRY_DELAYS,
+    BillingEngine,
+    BillingError,
+)
+
+
+def day(timestamp):
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).date().isoformat()
+
+
+def test_checkout_must_be_paid_and_match_the_order(engine, stripe):
+    declined = stripe.create_checkout_session("ref-1", "pro_monthly", "pm_card_chargeDeclined")
+    with pytest.raises(BillingError):
+        engine.verify_checkout(declined, "ref-1", "pro_monthly")
+    with pytest.raises(BillingError):
+        engine.verify_checkout("cs_test_forged", "ref-1", "pro_monthly")
+
+    paid = stripe.create_checkout_session("ref-2", "premium_monthly", email="a@example.com")
+    with pytest.raises(BillingError):
+        engine.verify_checkout(paid, "ref-2", "pro_monthly")
+    with pytest.raises(BillingError):
+        engine.verify_checkout(paid, "ref-other", "premium_monthly")
+    with pytest.raises(BillingError):
+        engine.start_subscription("u1", "pro_monthly")
+
+    checkout = engine.verify_checkout(paid, "ref-2", "premium_monthly")
+    assert checkout.customer_email == "a@example.com"
+    assert stripe.charges[-1]["metadata"] == {"reference": "ref-2", "plan_id": "premium_monthly"}
+    with pytest.raises(BillingError):
+        engine.start_subscription("u1", "pro_monthly", checkout=checkout)
+
+
+def test_start_is_idempotent_and_grants_entitlements(engine, stripe, subscribe):
+    first = subscribe()
+    again = engine.start_subscription("u1", "premium_monthly",
+                                      checkout=engine.verify_checkout(first.checkout_session_id, "ref-u1",
+                                                                      "premium_monthly"))
+    assert again.id == first.id
+    assert engine.entitlements("u1").id == "premium_monthly"
+    assert engine.has_feature("u1", "resume_review")
+    assert not engine.has_feature("u1", "career_coaching")
+    assert engine.entitlements(None).id == "basic"
+
+
+def test_a_checkout_is_claimed_once_across_engines(engine, stripe, clock, tmp_path):
+    session_id = stripe.create_checkout_session("ref-9", "premium_monthly", email="a@example.com")
+    checkout = engine.verify_checkout(session_id, "ref-9", "premium_monthly")
+    # Another worker process, or the success URL opened again in a new session.
+    other = BillingEngine(tmp_path / "billing.sqlite3", stripe, clock)
+    assert engine.claim_checkout(checkout, "u1")
+    assert not other.claim_checkout(other.verify_checkout(session_id, "ref-9", "premium_monthly"), "u2")
+    assert not engine.claim_checkout(checkout, "u1")
+
+
+def test_renewals_follow_the_anchor_day(engine, stripe, clock, subscribe):
+    subscription = subscribe()
+    ends = []
+    for _ in range(3):
+        clock.set(engine.get(subscription.id).current_period_end)
+        assert engine.renew_due()["renewed"] == 1
+        assert engine.renew_due()["renewed"] == 0
+        ends.append(day(engine.get(subscription.id).current_period_end))
+    assert ends == ["2027-03-31", "2027-04-30", "2027-05-31"]
+    renewals = [c for c in stripe.charges if c["description"].endswith("renewal")]
+    assert [c["metadata"]["reference"] for c in renewals] == [f"{subscription.id}:{n}" for n in (2, 3, 4)]
+
+
+def test_upgrade_is_prorated_and_charged_once(engine, stripe, clock, subscribe):
+    subscription = subscribe()
+    clock.advance(days=14)
+    quote = engine.quote_change(subscription, "pro_monthly")
+    assert quote.immediate
+    assert quote.net_minor % 100 == 0
+    assert 0 < quote.net_minor < 1000_00
+
+    with pytest.raises(BillingError, match="price is now"):
+        engine.change_plan(subscription.id, "pro_monthly", quoted_minor=quote.net_minor + 100)
+    assert engine.get(subscription.id).plan_id == "premium_monthly"
+
+    upgraded = engine.change_plan(subscription.id, "pro_monthly", quoted_minor=quote.net_minor)
+    assert upgraded.plan_id == "pro_monthly"
+    assert engine.entitlements("u1").id == "pro_monthly"
+    charge = stripe.charges[-1]
+    assert charge["amount"] == quote.net_minor
+    reference = f"{subscription.id}:1:pro_monthly"
+    assert charge["metadata"]["reference"] == reference
+    activation = [a for a in iter_activations(engine.activations_path) if a.reference == reference]
+    assert [a.amount * 100 for a in activation] == [quote.net_minor]
+
+
+def test_downgrade_waits_for_renewal(engine, stripe, clock, subscribe):
+    subscription = subscribe(plan_id="pro_monthly")
+    charges = len(stripe.charges)
+    changed = engine.change_plan(subscription.id, "premium_monthly")
+    assert changed.plan_id == "pro_monthly" and changed.pending_plan_id == "premium_monthly"
+    assert len(stripe.charges) == charges
+
+    clock.set(changed.current_period_end)
+    engine.renew_due()
+    renewed = engine.get(subscription.id)
+    assert renewed.plan_id == "premium_monthly" and renewed.pending_plan_id is None
+    assert stripe.charges[-1]["amount"] == 999_00
+
+
+def test_failed_upgrade_retries_with_a_new_idempotency_key(engine, stripe, clock, subscribe):
+    subscription = subscribe()
+    stripe.attach_payment_method(subscription.customer_id, "pm_card_chargeDeclined")
+    with pytest.raises(BillingError, match="card_declined"):
+        engine.change_plan(subscription.id, "pro_monthly")
+    assert engine.get(subscription.id).plan_id == "premium_monthly"
+
+    stripe.attach_payment_method(subscription.customer_id, "pm_card_visa")
+    assert engine.change_plan(subscription.id, "pro_monthly").plan_id == "pro_monthly"
+    assert [c["status"] for c in stripe.charges[-2:]] == ["failed", "succeeded"]
+
+
+def test_declined_renewals_retry_then_lapse(engine, stripe, clock, subscribe):
+    subscription = subscribe()
+    stripe.attach_payment_method(subscription.customer_id, "pm_card_chargeDeclinedInsufficientFunds")
+    clock.set(subscription.current_period_end)
+    assert engine.renew_due()["failed"] == 1
+    for delay in RETRY_DELAYS[:-1]:
+        current = engine.get(subscription.id)
+        assert current.status == "past_due"
+        assert engine.entitlements("u1").id == "premium_monthly"
+        clock.advance(delay - 1)
+        assert engine.renew_due()["failed"] == 0
+        clock.advance(1)
+        assert engine.renew_due()["failed"] == 1
+    clock.advance(RETRY_DELAYS[-1])
+    assert engine.renew_due()["canceled"] == 1
+    assert engine.get(subscription.id).status == "canceled"
+    assert engine.entitlements("u1").id == "basic"
+    assert sum(c["status"] == "failed" for c in stripe.charges) == len(RETRY_DELAYS) + 1
+
+
+def test_recovered_payment_method_ends_past_due(engine, stripe, clock, subscribe):
+    subscription = subscribe()
+    stripe.attach_payment_method(subscription.customer_id, "pm_card_chargeDeclinedExpiredCard")
+    clock.set(subscription.current_period_end)
+    engine.renew_due()
+    stripe.attach_payment_method(subscription.customer_id, "pm_card_visa")
+    clock.advance(RETRY_DELAYS[0])
+    assert engine.renew_due()["renewed"] == 1
+    renewed = engine.get(subscription.id)
+    assert renewed.status == "active" and renewed.failed_attempts == 0
+    assert day(renewed.current_period_end) == "2027-03-31"
+
+
+def test_cancel_at_period_end(engine, stripe, clock, subscribe):
+    subscription = subscribe()
+    engine.cancel(subscription.id)
+    assert engine.entitlements("u1").id == "premium_monthly"
+    clock.set(subscription.current_period_end)
+    assert engine.renew_due()["canceled"] == 1
+    assert engine.entitlements("u1").id == "basic"
+
+
+def test_upgrade_and_renewal_do_not_race(engine, stripe, clock, subscribe):
+    subscription = subscribe()
+    clock.set(subscription.current_period_end - DAY)
+    entered, release = threading.Event(), threading.Event()
+    charge = stripe.charge
+
+    def slow_charge(*args, **kwargs):
+        entered.set()
+        release.wait(5)
+        return charge(*args, **kwargs)
+
+    stripe.charge = slow_charge
+    upgrade = threading.Thread(target=engine.change_plan, args=(subscription.id, "pro_monthly"))
+    upgrade.start()
+    assert entered.wait(5)
+    clock.advance(DAY)
+    stripe.charge = charge
+    renewal = threading.Thread(target=engine.renew_due)
+    renewal.start()
+    release.set()
+    upgrade.join(10)
+    renewal.join(40)
+
+    current = engine.get(subscription.id)
+    assert current.plan_id == "pro_monthly" and current.cycle == 2
+    assert stripe.charges[-1]["amount"] == 1999_00
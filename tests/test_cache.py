@@ -0,0 +1,27 @@
+import os
+
+import pytest
+
+from components.cache import FileCache
+
+
+def test_file_cache_directory_is_private(tmp_path):
+    cache = FileCache(str(tmp_path / "shared"))
+    cache.set("k", {"v": 1})
+    assert cache.get("k") == {"v": 1}
+    assert os.stat(tmp_path / "shared").st_mode & 0o777 == 0o700
+
+
+def test_file_cache_refuses_a_directory_others_can_write(tmp_path):
+    squatted = tmp_path / "squatted"
+    squatted.mkdir()
+    os.chmod(squatted, 0o777)
+    with pytest.raises(PermissionError):
+        FileCache(str(squatted))
+
+
+def test_file_cache_refuses_a_symlink(tmp_path):
+    (tmp_path / "real").mkdir()
+    os.symlink(tmp_path / "real", tmp_path / "link")
+    with pytest.raises(PermissionError):
+        FileCache(str(tmp_path / "link"))
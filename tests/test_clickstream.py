@@ -0,0 +1,154 @@
+import gzip
+import json
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from components.clickstream import ClickstreamCollector, read_events, serve_beacons
+from components.experiments import new_unit_id
+
+
+class GatedCollector(ClickstreamCollector):
+    """Holds the writer inside ``_write`` until ``gate`` is set, so the queue depth is exact"""
+
+    def __init__(self, *args, **kwargs):
+        self.gate = threading.Event()
+        self.writing = threading.Event()
+        super().__init__(*args, **kwargs)
+
+    def _write(self, batch):
+        self.writing.set()
+        self.gate.wait(5.0)
+        super()._write(batch)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def stalled(tmp_path):
+    collector = GatedCollector(tmp_path, max_queue=10, high_water=0.5, batch_size=100, flush_interval=0.01)
+    assert collector.writing.wait(5.0)  # stuck writing an empty batch
+    yield collector
+    collector.gate.set()
+    collector.close()
+
+
+def test_ordinary_events_are_shed_past_the_high_water_mark(stalled):
+    assert all(stalled.emit("page_view") for _ in range(5))
+    assert not stalled.emit("page_view")
+    assert stalled.stats()["queued"] == 5
+
+
+def test_priority_events_are_kept_until_the_queue_is_full(stalled):
+    assert all(stalled.emit("page_view") for _ in range(5))
+    assert all(stalled.emit("checkout", plan_id="pro_monthly") for _ in range(5))
+    assert not stalled.emit("checkout", plan_id="pro_monthly")
+    assert not stalled.emit("page_view")
+    assert stalled.stats()["dropped"] == {"checkout": 1, "page_view": 1}
+
+
+def test_drops_are_reported_in_the_written_data(stalled, tmp_path):
+    for _ in range(12):
+        stalled.emit("page_view", new_unit_id())
+    stalled.gate.set()
+    stalled.close()
+    events = list(read_events(tmp_path))
+    assert sum(event["type"] == "page_view" for event in events) == 5
+    assert [event["counts"] for event in events if event["type"] == "collector.dropped"] == [
+        {"page_view": 7}]
+
+
+def test_events_are_written_in_batches(tmp_path):
+    collector = ClickstreamCollector(tmp_path, batch_size=3, flush_interval=60)
+    for i in range(7):
+        collector.emit("search", query=f"q{i}")
+    collector.close()
+    assert collector.stats()["batches_written"] == 3
+    assert collector.stats()["events_written"] == 7
+    assert sorted(event["query"] for event in read_events(tmp_path)) == [f"q{i}" for i in range(7)]
+
+    files = list(tmp_path.glob("date=*/*"))
+    assert len(files) == 3 and all(path.name.endswith(".jsonl.gz") for path in files)
+    with gzip.open(files[0], "rt", encoding="utf-8") as f:
+        assert all(json.loads(line)["type"] == "search" for line in f)
+
+
+def test_a_partial_batch_is_flushed_after_the_interval(tmp_path):
+    collector = ClickstreamCollector(tmp_path, batch_size=100, flush_interval=0.05)
+    collector.emit("page_view")
+    wait_for(lambda: collector.stats().get("batches_written") == 1)
+    collector.close()
+
+
+def test_a_failed_write_is_counted_not_raised(tmp_path, capsys):
+    (tmp_path / "file").write_text("")
+    collector = ClickstreamCollector(tmp_path / "file", flush_interval=60)
+    collector.emit("page_view")
+    collector.emit("page_view")
+    collector.close()
+    assert collector.stats()["dropped"] == {"write_error": 2}
+    assert "Clickstream batch of 2 events lost" in capsys.readouterr().out
+
+
+@pytest.fixture
+def beacons(tmp_path):
+    collector = GatedCollector(tmp_path, max_queue=4, high_water=0.5, batch_size=100, flush_interval=0.01)
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = serve_beacons(collector, "127.0.0.1", port)
+
+    def post(body):
+        data = body if isinstance(body, bytes) else json.dumps(body).encode()
+        request = urllib.request.Request(f"http://127.0.0.1:{port}/collect", data=data, method="POST")
+        try:
+            with urllib.request.urlopen(request, timeout=5) as response:
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    yield collector, post
+    server.shutdown()
+    server.server_close()
+    collector.gate.set()
+    collector.close()
+
+
+def test_beacons_keep_only_unit_ids_we_minted(beacons, tmp_path):
+    collector, post = beacons
+    unit_id = new_unit_id()
+    assert post({"type": "navigate", "path": "/jobs", "unit_id": unit_id, "extra": "x"}) == 204
+    assert post({"type": "navigate", "path": "/jobs", "unit_id": "<script>"}) == 204
+    assert post({"type": "navigate", "path": "/", "unit_id": unit_id + "\n"}) == 204
+    collector.gate.set()
+    collector.close()
+    events = list(read_events(tmp_path))
+    assert [(event["unit_id"], event["path"], event["source"]) for event in events] == [
+        (unit_id, "/jobs", "navbar"), (None, "/jobs", "navbar"), (None, "/", "navbar")]
+    assert "extra" not in events[0]
+
+
+@pytest.mark.parametrize("body", [
+    b"not json",
+    {"type": "purchase", "unit_id": "0" * 32},
+    [1, 2],
+    b"{" + b" " * 4096 + b"}",
+])
+def test_beacons_reject_unknown_or_oversized_bodies(beacons, body):
+    _, post = beacons
+    assert post(body) == 400
+
+
+def test_beacons_ask_clients_to_back_off_while_shedding(beacons):
+    collector, post = beacons
+    collector.writing.wait(5.0)
+    assert [post({"type": "button_click", "action": "signin"}) for _ in range(3)] == [204, 204, 503]
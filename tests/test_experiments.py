@@ -0,0 +1,20 @@
+import pytest
+
+from components.experiments import new_unit_id, session_unit_id
+
+
+def test_carried_over_anonymous_id_is_kept():
+    aid = new_unit_id()
+    assert session_unit_id({}, {"aid": aid}) == aid
+
+
+@pytest.mark.parametrize("aid", ['"><img src=x onerror=alert(1)>', "</script>", "ABCDEF" * 6, "a" * 31, "a" * 32 + "\n", ""])
+def test_foreign_aid_is_replaced(aid):
+    state = {}
+    unit_id = session_unit_id(state, {"aid": aid})
+    assert unit_id != aid and len(unit_id) == 32
+    assert session_unit_id(state, {"aid": aid}) == unit_id
+
+
+def test_signed_in_user_wins():
+    assert session_unit_id({"user_id": 42}, {"aid": new_unit_id()}) == "42"
@@ -0,0 +1,115 @@
+import random
+
+import pytest
+
+from components.geo import GeoJobIndex, Gazetteer, Place, cell_size_deg, geohash_encode, haversine_km
+
+
+def brute_force_radius(points, lat, lon, radius_km):
+    return {job_id: haversine_km(lat, lon, *point) for job_id, point in points.items()
+            if haversine_km(lat, lon, *point) <= radius_km}
+
+
+def test_readding_a_job_moves_it_instead_of_duplicating_it():
+    index = GeoJobIndex()
+    index.add("job", 18.52, 73.85)  # Pune
+    assert index.bbox(18, 73, 19, 74) == ["job"]
+    index.add("job", 12.97, 77.59)  # Bengaluru
+    index.add("job", 12.97, 77.59)
+    assert index.bbox(18, 73, 19, 74) == []
+    assert index.bbox(12, 77, 13, 78) == ["job"]
+    assert list(index.within_radius(12.97, 77.59, 5)) == ["job"]
+    assert len(index) == 1
+
+
+def test_removed_jobs_stop_matching():
+    index = GeoJobIndex()
+    index.add_many([("a", 18.52, 73.85), ("b", 18.53, 73.86)])
+    assert sorted(index.bbox(18, 73, 19, 74)) == ["a", "b"]
+    assert index.remove("a")
+    assert not index.remove("a")
+    assert index.bbox(18, 73, 19, 74) == ["b"]
+    index.add("a", 18.52, 73.85)
+    assert sorted(index.within_radius(18.52, 73.85, 10)) == ["a", "b"]
+
+
+def test_flush_merges_batches_and_compacts_tombstones():
+    rng = random.Random(3)
+    index = GeoJobIndex()
+    points = {}
+    for batch in range(20):
+        for i in range(50):
+            job_id = rng.randrange(300)
+            points[job_id] = (rng.uniform(8, 30), rng.uniform(70, 90))
+            index.add(job_id, *points[job_id])
+        index._flush()
+        assert index._hashes == sorted(index._hashes)
+    assert len(index._hashes) < 2 * len(points)
+    assert sorted(index.bbox(-90, -180, 90, 180)) == sorted(points)
+
+
+@pytest.mark.parametrize("precision", [5, 6, 7])
+def test_points_on_cell_boundaries(precision):
+    lat_step, lon_step = cell_size_deg(precision)
+    index = GeoJobIndex(precision=precision)
+    # Points exactly on, and just either side of, a cell corner near Mumbai.
+    base_lat = -90.0 + round(108.0 / lat_step) * lat_step
+    base_lon = -180.0 + round(252.0 / lon_step) * lon_step
+    points = {}
+    for i, dlat in enumerate((-1e-9, 0.0, 1e-9)):
+        for j, dlon in enumerate((-1e-9, 0.0, 1e-9)):
+            points[(i, j)] = (base_lat + dlat, base_lon + dlon)
+            index.add((i, j), *points[(i, j)])
+    assert geohash_encode(base_lat - 1e-9, base_lon - 1e-9, precision) != geohash_encode(base_lat, base_lon, precision)
+    assert sorted(index.bbox(base_lat, base_lon, base_lat, base_lon)) == [(1, 1)]
+    assert sorted(index.bbox(base_lat - 1e-9, base_lon - 1e-9, base_lat + 1e-9, base_lon + 1e-9)) == sorted(points)
+    assert set(index.within_radius(base_lat, base_lon, 0.001)) == set(points)
+
+
+def test_radius_matches_brute_force():
+    rng = random.Random(11)
+    index = GeoJobIndex()
+    points = {i: (rng.uniform(-60, 60), rng.uniform(-180, 180)) for i in range(3000)}
+    index.add_many((job_id, *point) for job_id, point in points.items())
+    for _ in range(25):
+        lat, lon = rng.uniform(-60, 60), rng.uniform(-180, 180)
+        radius = rng.choice([50, 300, 1500])
+        assert index.within_radius(lat, lon, radius).keys() == brute_force_radius(points, lat, lon, radius).keys()
+
+
+def test_antimeridian():
+    index = GeoJobIndex()
+    index.add("fiji-east", -17.8, 179.9)
+    index.add("fiji-west", -17.8, -179.9)
+    index.add("auckland", -36.85, 174.76)
+    index.add("tonga", -21.1, -175.2)
+    # West of 170E to east of 178W, across 180.
+    assert sorted(index.bbox(-40, 170, -10, -178)) == ["auckland", "fiji-east", "fiji-west"]
+    assert sorted(index.bbox(-40, 170, -10, 182)) == ["auckland", "fiji-east", "fiji-west"]
+    assert sorted(index.within_radius(-17.8, 179.95, 50)) == ["fiji-east", "fiji-west"]
+    assert sorted(index.within_radius(-17.8, -179.95, 50)) == ["fiji-east", "fiji-west"]
+    assert "tonga" in index.within_radius(-17.8, 179.9, 700)
+
+
+def test_radius_around_a_pole():
+    index = GeoJobIndex()
+    index.add("a", 89.5, 0.0)
+    index.add("b", 89.5, 180.0 - 1e-6)
+    assert sorted(index.within_radius(89.9, 90.0, 150)) == ["a", "b"]
+
+
+def test_search_blends_text_and_distance():
+    index = GeoJobIndex()
+    index.add("near", 18.52, 73.85)
+    index.add("far", 18.70, 73.85)
+    index.add("elsewhere", 12.97, 77.59)
+    matches = index.search(18.52, 73.85, 50, text_scores={"near": 0.5, "far": 0.5, "elsewhere": 1.0})
+    assert [match.job_id for match in matches] == ["near", "far"]
+    assert [match.job_id for match in index.search(18.52, 73.85, 50, facet_filter=lambda j: j == "far")] == ["far"]
+
+
+def test_gazetteer_geocodes_aliases_and_regions():
+    gazetteer = Gazetteer([Place("Bengaluru", "Karnataka", "India", 12.97, 77.59, 8_400_000)],
+                          aliases={"Bangalore": "Bengaluru"})
+    assert gazetteer.geocode("bangalore, Karnataka").name == "Bengaluru"
+    assert gazetteer.geocode("Nowhere") is None
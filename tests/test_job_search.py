@@ -0,0 +1,62 @@
+import pytest
+
+from components.job_search import JobSearch
+from components.jobs import JobListing, JobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(tmp_path / "jobs.sqlite3")
+
+
+def listing(job_id, title, lat=None, lon=None, **fields):
+    return JobListing(job_id, title, fields.pop("company", "Acme"), fields.pop("location", "Pune"),
+                      lat=lat, lon=lon, posted_at=fields.pop("posted_at", 1.0), **fields)
+
+
+def test_text_search_ranks_title_matches_first(store):
+    store.publish(listing("1", "Data Scientist", description="python"))
+    store.publish(listing("2", "Python Developer"))
+    store.publish(listing("3", "Accountant"))
+    search = JobSearch(store)
+    assert [job_id for job_id, _ in search.search("python")] == ["2", "1"]
+    assert [job_id for job_id, _ in search.search("")] == ["1", "2", "3"]
+
+
+def test_location_search_uses_the_geo_index(store):
+    store.publish(listing("pune", "Engineer", 18.52, 73.85))
+    store.publish(listing("mumbai", "Engineer", 19.08, 72.88, location="Mumbai"))
+    store.publish(listing("remote", "Engineer"))
+    search = JobSearch(store)
+    assert [job_id for job_id, _ in search.search("engineer", (18.52, 73.85), 50)] == ["pune"]
+    assert {job_id for job_id, _ in search.search("engineer", (18.52, 73.85), 200)} == {"pune", "mumbai"}
+
+
+def test_sync_applies_edits_and_closures_from_other_processes(store, tmp_path):
+    search = JobSearch(store)
+    other = JobStore(tmp_path / "jobs.sqlite3")
+    other.publish(listing("1", "Java Developer", 18.52, 73.85))
+    assert [job_id for job_id, _ in search.search("java")] == ["1"]
+
+    other.publish(listing("1", "Go Developer", 12.97, 77.59))
+    assert search.search("java") == []
+    assert [job_id for job_id, _ in search.search("go", (12.97, 77.59))] == ["1"]
+    assert search.search("go", (18.52, 73.85)) == []
+
+    assert other.close("1")
+    assert not other.close("1")
+    assert search.search("go") == []
+    assert not search.sync()
+
+
+def test_repeat_searches_are_served_from_the_cache_until_postings_change(store):
+    store.publish(listing("1", "Java Developer"))
+    search = JobSearch(store, sync_interval=60)
+    assert [job_id for job_id, _ in search.search("java")] == ["1"]
+    assert [job_id for job_id, _ in search.search("Java ")] == ["1"]
+    assert search.cache.stats()["hits"] == 1
+
+    store.publish(listing("2", "Java Architect", posted_at=2.0))
+    assert [job_id for job_id, _ in search.search("java")] == ["1"]  # not synced yet
+    search.sync_interval = 0
+    assert [job_id for job_id, _ in search.search("java")] == ["2", "1"]
@@ -0,0 +1,178 @@
+import random
+
+import pytest
+
+from components import moderation, postings
+from components.geo import Gazetteer, Place
+from components.jobs import JobStore
+from components.salary import SalaryIndex
+from components.moderation import (
+    HashedLinearModel, JobPosting, Moderator, PhraseAutomaton, ReviewQueue, TermMatcher,
+    load_seed_examples,
+)
+
+
+@pytest.fixture(scope="module")
+def trained():
+    moderator = Moderator(TermMatcher.from_csv(), HashedLinearModel(bits=16))
+    moderator.model = moderator.train(load_seed_examples())
+    return moderator
+
+
+@pytest.fixture
+def moderator(trained, tmp_path):
+    return Moderator(trained.matcher, trained.model, ReviewQueue(tmp_path / "reviews.sqlite3"))
+
+
+def clean_posting(posting_id="p1", **fields):
+    return JobPosting(
+        posting_id, fields.pop("title", "Senior Software Engineer"),
+        fields.pop("description", "Design and build backend services in Python for our payments "
+                                  "platform. Five years of experience with PostgreSQL and Kubernetes. "
+                                  "Hybrid role with health insurance and a structured interview loop."),
+        company=fields.pop("company", "Acme Payments"), **fields,
+    )
+
+
+@pytest.mark.parametrize("phrases, tokens, expected", [
+    # Overlapping matches are all reported, including ones ending at the same word.
+    ([("a b", 0), ("b c", 1), ("b", 2), ("a b c d", 3)], "a b c d", [0, 2, 1, 3]),
+    ([("he", 0), ("she", 1), ("his", 2), ("hers", 3)], "ushers", []),
+    ([("earn daily", 0), ("daily", 1), ("earn", 2)], "earn earn daily", [2, 2, 0, 1]),
+    # A failed partial match must not swallow the start of the next one.
+    ([("a a b", 0)], "a a a b", [0]),
+    ([("x", 0), ("x", 1)], "x", [0, 1]),
+])
+def test_phrase_automaton_reports_every_overlapping_match(phrases, tokens, expected):
+    assert PhraseAutomaton(phrases).search(tokens.split()) == expected
+
+
+def test_phrase_automaton_agrees_with_a_brute_force_scan():
+    rng = random.Random(7)
+    words = "a b c d".split()
+    phrases = {" ".join(rng.choices(words, k=rng.randint(1, 4))) for _ in range(30)}
+    patterns = list(enumerate(sorted(phrases)))
+    automaton = PhraseAutomaton((phrase, index) for index, phrase in patterns)
+    for _ in range(200):
+        tokens = rng.choices(words, k=rng.randint(0, 12))
+        expected = [
+            index
+            for end in range(1, len(tokens) + 1)
+            for index, phrase in patterns
+            if tokens[max(0, end - len(phrase.split())):end] == phrase.split()
+        ]
+        assert sorted(automaton.search(tokens)) == sorted(expected)
+
+
+def test_term_matching_undoes_character_swaps_and_respects_word_boundaries(trained):
+    posting = JobPosting("p", "Data entry", "No registrati0n f33, just Pay-To-Apply!")
+    normalized = moderation._normalize(posting.text)
+    patterns = [term.pattern for term in trained.matcher.match(normalized, moderation._tokens(normalized))]
+    assert patterns == ["registration fee", "pay to apply"]
+
+    normalized = moderation._normalize("Join our mlmx team, not MLM.")
+    patterns = [term.pattern for term in trained.matcher.match(normalized, moderation._tokens(normalized))]
+    assert patterns == ["mlm"]
+
+
+def test_hashed_model_learns_and_survives_a_round_trip(trained, tmp_path):
+    spam = JobPosting("s", "Work from home", "Easy money!!! Earn 5000 per day, no interview, "
+                                             "WhatsApp only 9876543210")
+    assert trained.score(spam).spam_score > trained.score(clean_posting()).spam_score
+
+    trained.model.save(tmp_path / "model.bin")
+    loaded = HashedLinearModel.load(tmp_path / "model.bin")
+    features, _ = trained._analyse(spam)
+    assert loaded.bits == trained.model.bits
+    assert loaded.predict(features) == trained.model.predict(features)
+
+
+def test_score_rejects_block_terms_and_reviews_review_terms(moderator):
+    result = moderator.score(clean_posting(description="Pay a refundable deposit to join."))
+    assert result.decision == "reject"
+    assert "asks candidates for money" in result.reasons
+
+    result = moderator.score(clean_posting(contact_email="hr.acme@gmail.com"))
+    assert result.decision == "review"
+    assert result.reasons == ["personal email for a company posting"]
+
+    assert moderator.score(clean_posting()).decision == "approve"
+
+
+def test_score_thresholds_apply_without_term_hits(moderator):
+    moderator.review_above, moderator.reject_above = 0.0, 1.01
+    result = moderator.score(clean_posting())
+    assert (result.decision, result.reasons) == ("review", ["classifier"])
+    moderator.reject_above = 0.0
+    assert moderator.score(clean_posting()).decision == "reject"
+
+
+def test_review_queue_serves_the_riskiest_first_and_leases_claims(moderator, monkeypatch):
+    postings_ = [clean_posting("low", contact_email="a@gmail.com"),
+                 clean_posting("high", description="Earn daily from home, WhatsApp only.")]
+    results = moderator.moderate_many(postings_)
+    assert [result.decision for result in results] == ["review", "review"]
+
+    claimed = moderator.queue.claim("rev-1")
+    assert [posting.posting_id for posting, _, _ in claimed] == ["high", "low"]
+    assert moderator.queue.claim("rev-2") == []  # leased to rev-1
+
+    later = moderation.time.time() + moderator.queue.lease_seconds + 1
+    monkeypatch.setattr(moderation.time, "time", lambda: later)
+    assert len(moderator.queue.claim("rev-2")) == 2  # the lease ran out
+
+    assert moderator.queue.decide("high", False, "rev-2").posting_id == "high"
+    assert moderator.queue.decide("unknown", True, "rev-2") is None
+    assert [(posting.posting_id, label) for posting, label in moderator.queue.labelled()] == [("high", 1)]
+    assert moderator.queue.counts() == {"claimed": 1, "rejected": 1}
+
+
+@pytest.fixture
+def accepted(moderator, tmp_path, monkeypatch):
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    gazetteer = Gazetteer([Place("Pune", "Maharashtra", "India", 18.52, 73.86, 3_100_000)])
+    monkeypatch.setattr(postings, "get_moderator", lambda: moderator)
+    monkeypatch.setattr(postings, "get_job_store", lambda: store)
+    monkeypatch.setattr(postings, "get_gazetteer", lambda: gazetteer)
+    monkeypatch.setattr(postings, "get_salary_index", lambda: salaries)
+    salaries = SalaryIndex()
+    store.salaries = salaries
+    return store
+
+
+def test_approved_submissions_are_published_at_their_location(accepted):
+    posting = clean_posting(location="Pune, India", salary="₹30-40 LPA")
+    assert postings.submit_posting(posting).decision == "approve"
+    listing = accepted.get("p1")
+    assert (listing.title, listing.status, listing.lat, listing.lon) == (
+        "Senior Software Engineer", "open", 18.52, 73.86)
+    assert accepted.salaries.percentiles("senior software engineer", "Pune") == {
+        25: 35e5, 50: 35e5, 75: 35e5}
+
+
+def test_held_submissions_go_live_only_once_a_reviewer_approves(accepted):
+    held = clean_posting("held", contact_email="hr@gmail.com")
+    assert postings.submit_posting(held).decision == "review"
+    assert postings.submit_posting(clean_posting("bad", description="Registration fee required")
+                                   ).decision == "reject"
+    assert accepted.get("held") is None and accepted.get("bad") is None
+    assert accepted.salaries.sketches == {}
+
+    postings.review_posting("held", True, "rev-1")
+    assert accepted.get("held").lat is None  # no location given
+
+
+def test_retrain_does_not_make_the_next_call_reload_its_own_model(tmp_path, monkeypatch):
+    monkeypatch.setattr(moderation, "MODERATION_DIR", tmp_path)
+    monkeypatch.setattr(moderation, "MODEL_PATH", tmp_path / "model.bin")
+    monkeypatch.setattr(moderation, "_moderator", None)
+    monkeypatch.setattr(moderation, "_model_mtime", None)
+    first = moderation.get_moderator()
+    assert moderation.retrain(tmp_path / "model.bin") == len(load_seed_examples())
+    retrained = first.model
+
+    def reload(path):
+        raise AssertionError("reloaded the model retrain() just saved")
+
+    monkeypatch.setattr(HashedLinearModel, "load", staticmethod(reload))
+    assert moderation.get_moderator().model is retrained
@@ -0,0 +1,59 @@
+import asyncio
+import socket
+import threading
+
+import pytest
+
+from components.notifications import (
+    DebugSMTPServer,
+    NotificationDispatcher,
+    NotificationQueue,
+    SMTPPool,
+)
+
+
+@pytest.fixture
+def smtp_server():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = DebugSMTPServer(port=port, verbose=False)
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    listener = asyncio.run_coroutine_threadsafe(
+        asyncio.start_server(server._handle, server.host, server.port), loop).result(5)
+    yield server
+    loop.call_soon_threadsafe(listener.close)
+    loop.call_soon_threadsafe(loop.stop)
+
+
+def dispatcher(tmp_path, server, **pool_options):
+    pool = SMTPPool(server.host, server.port, size=2, **pool_options)
+    return NotificationDispatcher(NotificationQueue(tmp_path / "outbox.sqlite3"), pool,
+                                  "JobGenie <no-reply@jobgenie.local>")
+
+
+def test_dropped_idle_connection_is_replaced(tmp_path, smtp_server):
+    sender = dispatcher(tmp_path, smtp_server, check_after=0.0)
+    sender.outbox.enqueue("a@example.com", "payment_receipt", {"plan_name": "Pro"})
+    assert sender.dispatch_batch() == 1
+
+    connection, _ = sender.pool._idle.queue[0]
+    connection.sock.shutdown(socket.SHUT_RDWR)  # the server timed the session out
+    sender.outbox.enqueue("b@example.com", "payment_receipt", {"plan_name": "Pro"})
+    assert sender.dispatch_batch() == 1
+    assert sender.outbox.counts() == {"sent": 2}
+    assert len(smtp_server.messages) == 2
+
+
+def test_unbuildable_message_does_not_hold_back_the_batch(tmp_path, smtp_server):
+    sender = dispatcher(tmp_path, smtp_server)
+    sender.outbox.enqueue_many([
+        ("a@example.com", "payment_receipt", {"plan_name": "Pro"}),
+        ("bad\nheader@example.com", "payment_receipt", {"plan_name": "Pro"}),
+        ("c@example.com", "payment_receipt", {"plan_name": "Pro"}),
+        ("d@example.org", "payment_receipt", {"plan_name": "Pro"}),
+    ])
+    assert sender.dispatch_batch() == 3
+    assert sender.outbox.counts() == {"sent": 3, "dead": 1}
+    assert sender.dispatch_batch() == 0
@@ -0,0 +1,94 @@
+import asyncio
+import gc
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+from components.notifier import BrokerServer, StatusNotifier, Subscription
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_a_subscription_coalesces_updates_to_the_same_row():
+    subscription = Subscription("applications:u1")
+    subscription._push({"key": "a1", "status": "applied"})
+    subscription._push({"key": "a2", "status": "applied"})
+    subscription._push({"key": "a1", "status": "interview"})
+    assert subscription.has_pending()
+    assert subscription.drain() == [{"key": "a1", "status": "interview"},
+                                    {"key": "a2", "status": "applied"}]
+    assert not subscription.has_pending() and subscription.drain() == []
+
+
+def test_publishes_reach_only_subscribers_of_the_topic():
+    notifier = StatusNotifier()
+    mine = notifier.subscribe("applications:u1")
+    other = notifier.subscribe("applications:u2")
+    notifier.publish("applications:u1", "a1", status="offer", timestamp=1.0)
+    wait_for(mine.has_pending)
+    assert mine.drain() == [{"key": "a1", "status": "offer", "timestamp": 1.0}]
+    assert not other.has_pending()
+
+
+def test_a_dropped_subscription_is_forgotten():
+    notifier = StatusNotifier()
+    notifier.subscribe("applications:u1")
+    gc.collect()
+    seen = threading.Event()
+    notifier._loop.call_soon_threadsafe(
+        lambda: seen.set() if not notifier._topics["applications:u1"] else None)
+    assert seen.wait(5.0)
+
+
+@pytest.fixture
+def broker():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_until_complete,
+                     args=(BrokerServer("127.0.0.1", port).serve_forever(),), daemon=True).start()
+
+    def listening():
+        with socket.socket() as client:
+            return client.connect_ex(("127.0.0.1", port)) == 0
+
+    wait_for(listening)
+    return "127.0.0.1", port
+
+
+def test_publishes_are_relayed_to_other_workers_through_the_broker(broker):
+    first, second = StatusNotifier(broker), StatusNotifier(broker)
+    wait_for(lambda: first._writer is not None and second._writer is not None)
+    mine, theirs = first.subscribe("applications:u1"), second.subscribe("applications:u1")
+
+    first.publish("applications:u1", "a1", status="viewed", timestamp=2.0)
+    wait_for(theirs.has_pending)
+    assert theirs.drain() == [{"key": "a1", "status": "viewed", "timestamp": 2.0}]
+    wait_for(mine.has_pending)
+    time.sleep(0.1)
+    assert len(mine.drain()) == 1  # its own relayed copy is ignored
+
+
+def test_a_malformed_broker_line_is_skipped_without_stopping_the_bridge(broker, capsys):
+    notifier = StatusNotifier(broker)
+    wait_for(lambda: notifier._writer is not None)
+    subscription = notifier.subscribe("applications:u1")
+    good = {"origin": "elsewhere", "topic": "applications:u1",
+            "row": {"key": "a1", "status": "offer", "timestamp": 3.0}}
+    with socket.create_connection(broker) as publisher:
+        for line in (b"not json\n", b'{"origin": "elsewhere"}\n', b"[1, 2]\n",
+                     json.dumps(dict(good, row={"status": "offer"})).encode() + b"\n",
+                     json.dumps(good).encode() + b"\n"):
+            publisher.sendall(line)
+        wait_for(subscription.has_pending)
+    assert subscription.drain() == [good["row"]]
+    assert capsys.readouterr().out.count("Skipping malformed broker message") == 4
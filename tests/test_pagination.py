@@ -0,0 +1,44 @@
+import pytest
+
+from components.pagination import KeysetPaginator
+
+
+def walk(paginator, limit):
+    pages, cursor = [], None
+    while True:
+        page = paginator(cursor, limit)
+        pages.append(page.items)
+        if page.next_cursor is None:
+            return pages
+        cursor = page.next_cursor
+
+
+@pytest.mark.parametrize("count, limit", [(0, 3), (1, 3), (6, 3), (7, 3), (7, 10)])
+def test_pages_cover_every_row_exactly_once(count, limit):
+    rows = list(range(count))
+    pages = walk(KeysetPaginator(rows, key=lambda row: row), limit)
+    assert [row for page in pages for row in page] == rows
+    assert all(len(page) == limit for page in pages[:-1])
+
+
+def test_a_tiebreaker_pages_through_rows_sharing_a_key():
+    # Postings from the same second, ordered by (posted_at, job_id).
+    rows = [(1, "a"), (2, "a"), (2, "b"), (2, "c"), (3, "a")]
+    paginator = KeysetPaginator(rows, key=lambda row: row[0], tiebreaker=lambda row: row[1])
+    assert walk(paginator, 2) == [[(1, "a"), (2, "a")], [(2, "b"), (2, "c")], [(3, "a")]]
+    assert paginator(None, 2).next_cursor == (2, "a")
+
+
+def test_a_cursor_still_resumes_after_its_row_is_gone():
+    rows = [10, 20, 30, 40]
+    cursor = KeysetPaginator(rows, key=lambda row: row)(None, 2).next_cursor
+    assert KeysetPaginator([10, 30, 40], key=lambda row: row)(cursor, 2).items == [30, 40]
+
+
+@pytest.mark.parametrize("rows, problem", [
+    ([(1, "a"), (2, "a"), (2, "b")], "repeats"),
+    ([(1, "a"), (3, "b"), (2, "c")], "out of order"),
+])
+def test_rows_that_cannot_be_paged_by_key_are_rejected(rows, problem):
+    with pytest.raises(ValueError, match=problem):
+        KeysetPaginator(rows, key=lambda row: row[0])
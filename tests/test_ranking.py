@@ -0,0 +1,71 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from components.ranking import ApplicantStore, JobRequirements, PostingRanking  # noqa: E402
+
+
+@pytest.fixture
+def store():
+    store = ApplicantStore(capacity=2)
+    store.upsert("ana", ["Python", "SQL", "Spark"], 5, "basic")
+    store.upsert("ben", ["python"], 5, "basic")
+    store.upsert("cai", ["Excel"], 1, "basic")
+    return store
+
+
+def ranking(store, skills=("python", "sql"), min_years=3):
+    return PostingRanking(store, JobRequirements(list(skills), min_years=min_years))
+
+
+def test_applicants_are_ranked_by_skill_overlap_and_experience(store):
+    posting = ranking(store)
+    posting.rank_all(["cai", "ben", "ana"])
+    assert [applicant for applicant, _ in posting.top()] == ["ana", "ben", "cai"]
+    assert posting.top()[0][1] == pytest.approx(0.6 + 0.4)
+
+
+def test_a_paid_plan_lifts_an_applicant_past_an_equal_one(store):
+    store.upsert("dee", ["python"], 5, "pro_monthly")
+    posting = ranking(store)
+    posting.rank_all(["ben", "dee"])
+    assert [applicant for applicant, _ in posting.top()] == ["dee", "ben"]
+
+
+def test_add_splices_a_newcomer_into_place(store):
+    posting = ranking(store)
+    posting.rank_all(["ana", "cai"])
+    store.upsert("dee", ["python"], 5)
+    assert posting.add("dee") == 1
+    assert posting.add("ben") == 2  # ties keep earlier applicants ahead
+    assert [applicant for applicant, _ in posting.top()] == ["ana", "dee", "ben", "cai"]
+
+
+def test_adding_a_ranked_applicant_again_moves_them_instead_of_duplicating(store):
+    posting = ranking(store)
+    posting.rank_all(["ana", "ben", "cai"])
+    store.upsert("cai", ["python", "sql"], 10, "premium_monthly")
+    assert posting.add("cai") == 0
+    assert posting.add("cai") == 0
+    assert [applicant for applicant, _ in posting.top()] == ["cai", "ana", "ben"]
+
+    posting.rank_all(["ben", "ben"])
+    assert [applicant for applicant, _ in posting.top()] == ["ben"]
+
+
+def test_scoring_a_posting_does_not_grow_the_skill_vocabulary(store):
+    vocabulary = dict(store.skill_index)
+    posting = ranking(store, skills=["python", "cobol"])
+    posting.rank_all(["ana", "ben"])
+    assert store.skill_index == vocabulary
+    # An unknown required skill still counts against everyone's overlap.
+    assert posting.top()[0][1] == pytest.approx(0.6 * 0.5 + 0.4)
+
+
+def test_the_vocabulary_widens_past_one_word_of_skills():
+    store = ApplicantStore(skill_words=1)
+    store.upsert("ana", [f"skill {i}" for i in range(100)], 3)
+    store.upsert("ben", ["skill 99"], 3)
+    posting = ranking(store, skills=["skill 99"], min_years=0)
+    posting.rank_all(["ana", "ben"])
+    assert [score for _, score in posting.top()] == [pytest.approx(1.0), pytest.approx(1.0)]
@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+from components import reconciliation
+from components.reconciliation import read_stripe_json
+
+
+def charges(count):
+    return [{"id": f"ch_{i}", "object": "charge", "amount": 99900 + i, "currency": "INR",
+             "status": "succeeded", "metadata": {"reference": f"ref-{i}"}, "created": 1800000000 + i}
+            for i in range(count)]
+
+
+@pytest.mark.parametrize("layout", ["jsonl", "array", "list", "pretty list"])
+def test_reads_every_layout_a_chunk_at_a_time(tmp_path, monkeypatch, layout):
+    # Tiny chunks split objects, keys and numbers across reads.
+    init = reconciliation._JSONValues.__init__
+    monkeypatch.setattr(reconciliation._JSONValues, "__init__",
+                        lambda self, f, name: init(self, f, name, chunk_chars=7))
+    objects = charges(25)
+    envelope = {"object": "list", "data": objects, "has_more": False, "url": "/v1/charges"}
+    text = {
+        "jsonl": "\n".join(json.dumps(obj) for obj in objects) + "\n",
+        "array": json.dumps(objects),
+        "list": json.dumps(envelope),
+        "pretty list": json.dumps(envelope, indent=2),
+    }[layout]
+    path = tmp_path / "charges.json"
+    path.write_text(text)
+
+    read = list(read_stripe_json(path))
+    assert [charge.id for charge in read] == [obj["id"] for obj in objects]
+    assert read[-1].amount_minor == 99924 and read[-1].reference == "ref-24"
+    assert read[0].currency == "inr"
+
+
+def test_rejects_malformed_exports(tmp_path):
+    path = tmp_path / "charges.json"
+    path.write_text('{"object": "list", "data": [{"id": "ch_1"}, {"id": ')
+    with pytest.raises(ValueError, match="truncated"):
+        list(read_stripe_json(path))
+    path.write_text("id,amount\nch_1,999\n")
+    with pytest.raises(ValueError, match="JSON Lines or a JSON list"):
+        list(read_stripe_json(path))
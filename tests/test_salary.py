@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+from components import salary as salary_module
+from components.jobs import JobListing, JobStore
+from components.salary import SalaryIndex, parse_salary, rebuild_salary_index
+
+
+@pytest.mark.parametrize("text, low, high", [
+    ("₹12-15 LPA", 12e5, 15e5),
+    ("Rs. 45,000 per month", 45_000 * 12, 45_000 * 12),
+    ("$120k - 150k/yr", 120e3 * 83, 150e3 * 83),
+    ("50,000 - 70,000", 50_000, 70_000),
+    ("2 years exp, 10 LPA", 10e5, 10e5),
+    ("12 LPA + 2L bonus", 12e5, 12e5),
+    ("3-5 years experience, 8 to 12 LPA", 8e5, 12e5),
+    ("2+ yrs, ₹ 6.5 lakhs", 6.5e5, 6.5e5),
+])
+def test_parses_only_figures_that_read_as_pay(text, low, high):
+    salary = parse_salary(text)
+    assert (salary.low, salary.high) == pytest.approx((low, high))
+
+
+@pytest.mark.parametrize("text", ["", "5 years experience", "Openings: 3, 2 rounds"])
+def test_no_pay_figure(text):
+    assert parse_salary(text) is None
+
+
+def test_index_reports_percentiles_per_city_and_role_wide():
+    index = SalaryIndex()
+    for pay in (10, 20, 30):
+        index.add("Data Analyst", "Pune, India", f"₹{pay} LPA")
+    index.add("data analyst", "Mumbai", "₹40 LPA")
+    assert index.add("Data Analyst", "Pune", "competitive") is None
+    assert index.percentiles("Data Analyst", "pune", points=(50,)) == {50: 20e5}
+    assert index.sample_size("Data Analyst") == 4
+    assert index.percentiles("Accountant") == {}
+
+
+def test_rebuild_counts_every_stored_posting_and_workers_reload_it(tmp_path, monkeypatch):
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    store.publish(JobListing("1", "Data Analyst", "Acme", "Pune", salary="₹10 LPA"))
+    store.publish(JobListing("2", "Data Analyst", "Acme", "Pune", salary="₹20 LPA"))
+    store.publish(JobListing("2", "Data Analyst", "Acme", "Pune", salary="₹30 LPA"))  # edited
+    store.publish(JobListing("3", "Data Analyst", "Acme", "Pune"))
+    store.close("1")
+    path = tmp_path / "index.pickle"
+    monkeypatch.setattr(salary_module, "get_job_store", lambda: store)
+    monkeypatch.setattr(salary_module, "SALARY_INDEX_PATH", path)
+    monkeypatch.setattr(salary_module, "_index", None)
+
+    worker = salary_module.get_salary_index()
+    assert worker.sample_size("Data Analyst") == 0
+    assert rebuild_salary_index(path) == 2
+    os.utime(path, ns=(1, 1))  # a distinct mtime even on coarse clocks
+
+    reloaded = salary_module.get_salary_index()
+    assert reloaded is not worker
+    assert reloaded.percentiles("data analyst", "Pune", points=(0, 100)) == {0: 10e5, 100: 30e5}
+    assert salary_module.get_salary_index() is reloaded
@@ -0,0 +1,83 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from components.scheduler import CronSchedule, Scheduler
+
+# A Wednesday.
+NOON = datetime(2027, 3, 10, 12, 0)
+
+
+@pytest.mark.parametrize("expression, after, expected", [
+    ("*/15 * * * *", datetime(2027, 3, 10, 12, 7), datetime(2027, 3, 10, 12, 15)),
+    ("*/15 * * * *", datetime(2027, 3, 10, 12, 45), datetime(2027, 3, 10, 13, 0)),
+    ("5/20 * * * *", datetime(2027, 3, 10, 12, 26), datetime(2027, 3, 10, 12, 45)),
+    ("0 9-17 * * *", datetime(2027, 3, 10, 17, 30), datetime(2027, 3, 11, 9, 0)),
+    ("0 0,12 * * *", datetime(2027, 3, 10, 0, 0), datetime(2027, 3, 10, 12, 0)),
+    ("30 3 * * *", datetime(2027, 12, 31, 4, 0), datetime(2028, 1, 1, 3, 30)),
+    ("0 0 31 * *", datetime(2027, 4, 1), datetime(2027, 5, 31)),
+    ("0 0 29 2 *", datetime(2027, 3, 1), datetime(2028, 2, 29)),
+    ("0 0 * * 1-5", datetime(2027, 3, 12, 1), datetime(2027, 3, 15)),
+    ("0 0 * * 7", NOON, datetime(2027, 3, 14)),
+])
+def test_next_after(expression, after, expected):
+    assert CronSchedule(expression).next_after(after) == expected
+
+
+def test_day_of_month_or_day_of_week_when_both_are_restricted():
+    # The 15th, or any Monday, whichever comes first.
+    schedule = CronSchedule("0 0 15 * 1")
+    assert schedule.next_after(NOON) == datetime(2027, 3, 15)
+    assert schedule.next_after(datetime(2027, 3, 15)) == datetime(2027, 3, 22)
+    assert CronSchedule("0 0 13 * 6").next_after(NOON) == datetime(2027, 3, 13)
+
+
+@pytest.mark.parametrize("alias, expanded", [
+    ("@hourly", "0 * * * *"), ("@daily", "0 0 * * *"),
+    ("@weekly", "0 0 * * 0"), ("@monthly", "0 0 1 * *"),
+])
+def test_aliases(alias, expanded):
+    moment = datetime(2027, 3, 10, 12, 34)
+    for _ in range(3):
+        assert CronSchedule(alias).next_after(moment) == CronSchedule(expanded).next_after(moment)
+        moment = CronSchedule(alias).next_after(moment)
+
+
+@pytest.mark.parametrize("expression", ["* * * *", "60 * * * *", "0 24 * * *", "0 0 0 * *", "0 0 30 2 *"])
+def test_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        CronSchedule(expression).next_after(NOON)
+
+
+def test_restart_resumes_every_job(tmp_path):
+    state_path = tmp_path / "state.json"
+    first = Scheduler(state_path)
+    minutely = first.add_job("minutely", "* * * * *", lambda: None)
+    daily = first.add_job("daily", "30 3 * * *", lambda: None)
+    first._run(minutely)
+    first._run(daily)
+    daily_last_run = json.loads(state_path.read_text())["daily"]["last_run"]
+
+    # After a restart only the minutely job gets to run before the next check.
+    second = Scheduler(state_path)
+    second.add_job("minutely", "* * * * *", lambda: None)
+    restored = second.add_job("daily", "30 3 * * *", lambda: None)
+    second._run(second.jobs["minutely"])
+
+    state = json.loads(state_path.read_text())
+    assert state["daily"]["last_run"] == daily_last_run
+    assert state["minutely"]["metrics"]["runs"] == 2
+    assert restored.metrics.runs == 1 and restored.metrics.running == 0
+    expected = CronSchedule("30 3 * * *").next_after(datetime.fromtimestamp(daily_last_run))
+    assert restored.next_run == expected.timestamp()
+
+
+def test_state_keeps_jobs_this_process_does_not_register(tmp_path):
+    state_path = tmp_path / "state.json"
+    first = Scheduler(state_path)
+    first._run(first.add_job("export", "@hourly", lambda: None))
+
+    second = Scheduler(state_path)
+    second._run(second.add_job("minutely", "* * * * *", lambda: None))
+    assert set(json.loads(state_path.read_text())) == {"export", "minutely"}
@@ -0,0 +1,100 @@
+import pytest
+
+from components import search_cache
+from components.search_cache import SearchResultCache, normalize_query
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(search_cache.time, "monotonic", clock)
+    return clock
+
+
+def test_queries_differing_in_case_spacing_or_filter_order_share_a_key():
+    assert normalize_query("  Software   ENGINEER ") == normalize_query("software engineer")
+    assert (normalize_query("c++", {"city": "Pune", "remote": True})
+            == normalize_query("C++", {"remote": True, "city": "pune"}))
+    assert normalize_query("java", {"city": "Pune"}) != normalize_query("java", {"city": "Mumbai"})
+
+
+def test_a_burst_of_one_off_queries_does_not_evict_a_popular_one():
+    cache = SearchResultCache(capacity=100)
+    for _ in range(10):
+        cache.get_or_search("software engineer", lambda query, filters: ["popular"])
+    for i in range(150):
+        cache.get_or_search(f"one off {i}", lambda query, filters: ["rare"])
+
+    assert cache.get("software engineer") == (True, ["popular"])
+    assert cache.stats()["size"] <= 100
+
+
+def test_a_query_asked_more_often_than_the_victim_is_admitted():
+    cache = SearchResultCache(capacity=100)
+    for i in range(150):
+        cache.get_or_search(f"one off {i}", lambda query, filters: ["rare"])
+    for _ in range(4):
+        cache.get_or_search("data analyst", lambda query, filters: ["analyst"])
+    cache.put("push the window", ["x"])
+    cache.put("push it again", ["x"])
+
+    assert cache.get("data analyst") == (True, ["analyst"])
+    assert cache.get("push the window") == (False, None)
+
+
+def test_entries_expire_after_their_ttl(clock):
+    cache = SearchResultCache(ttl=300, negative_ttl=60)
+    cache.put("java", ["1"])
+    clock.now += 299
+    assert cache.get("java") == (True, ["1"])
+    clock.now += 1
+    assert cache.get("java") == (False, None)
+
+
+def test_zero_result_queries_are_cached_for_the_shorter_ttl(clock):
+    cache = SearchResultCache(ttl=300, negative_ttl=60)
+    searches = []
+
+    def search(query, filters):
+        searches.append(query)
+        return [] if query == "cobol" else ["1"]
+
+    for query in ("cobol", "java", "cobol", "java"):
+        cache.get_or_search(query, search)
+    assert searches == ["cobol", "java"]
+
+    clock.now += 60
+    cache.get_or_search("cobol", search)
+    cache.get_or_search("java", search)
+    assert searches == ["cobol", "java", "cobol"]
+
+
+def test_bumping_the_index_version_invalidates_every_entry():
+    cache = SearchResultCache()
+    cache.put("java", ["1"])
+    cache.put("cobol", [])
+    cache.bump_index_version()
+    assert cache.get("java") == (False, None)
+    assert cache.get("cobol") == (False, None)
+
+
+def test_results_computed_against_a_replaced_index_are_not_cached():
+    cache = SearchResultCache()
+
+    def search(query, filters):
+        cache.bump_index_version()  # a reindex lands mid-search
+        return ["stale"]
+
+    assert cache.get_or_search("java", search) == ["stale"]
+    assert cache.get("java") == (False, None)
+
+    cache.put("java", ["stale"], index_version=cache.index_version - 1)
+    assert cache.get("java") == (False, None)